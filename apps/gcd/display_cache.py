@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned caching of rendered fragments of the display pages.
+
+Each display object has a version counter kept in the cache.  The counter
+is bumped whenever an approved change touching the object is committed.
+Cached fragments are keyed on the versions of the objects they depend on,
+so after a bump stale fragments are simply no longer looked up and expire
+on their own.
+
+Changesets have such a version as well, bumped when one of their revisions
+is saved, for the cached summaries in the editing and approval queues.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import translation
+
+
+def _version_key(model_name, object_id):
+    return 'display_version_%s_%d' % (model_name, object_id)
+
+
+def _initial_version():
+    # Seed with the current time, so that a counter lost to a cache eviction
+    # or restart never re-uses the version of a fragment still in the cache.
+    return int(time.time() * 1000)
+
+
+def get_display_version(obj):
+    """
+    Returns the current version of the display object, creating it if needed.
+    """
+    key = _version_key(obj._meta.model_name, obj.id)
+    version = cache.get(key)
+    if version is None:
+        version = _initial_version()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def _get_versions(keys):
+    """
+    Returns a dictionary from the (model name, object id) keys to the
+    current versions of the objects, creating them if needed.
+    """
+    cache_keys = dict((_version_key(*key), key) for key in keys)
+    versions = cache.get_many(list(cache_keys))
+    for cache_key in cache_keys:
+        if cache_key not in versions:
+            versions[cache_key] = _initial_version()
+            if not cache.add(cache_key, versions[cache_key], None):
+                versions[cache_key] = cache.get(cache_key,
+                                                versions[cache_key])
+    return dict((cache_keys[cache_key], version)
+                for cache_key, version in versions.items())
+
+
+def get_display_versions(model_name, object_ids):
+    """
+    Returns a dictionary of the current versions of the objects with the
+    ids, creating them if needed.
+    """
+    versions = _get_versions([(model_name, object_id)
+                              for object_id in object_ids])
+    return dict((object_id, version)
+                for (_, object_id), version in versions.items())
+
+
+def bump_display_version(model_name, object_id):
+    key = _version_key(model_name, object_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def bump_display_versions(objects):
+    """
+    Bumps the versions of the given display objects once the current
+    transaction commits.
+
+    Bumping before the commit would allow a concurrent request to cache
+    the old data under the new version.
+    """
+    _bump_on_commit(set((obj._meta.model_name, obj.id) for obj in objects
+                        if obj is not None and obj.id))
+
+
+def bump_display_versions_by_id(model_name, object_ids):
+    """
+    Bumps the versions of the display objects of the model with the ids
+    once the current transaction commits, without loading the objects.
+    """
+    _bump_on_commit(set((model_name, object_id)
+                        for object_id in object_ids))
+
+
+def bump_changeset_version(changeset_id):
+    """
+    Bumps the version of the changeset once the current transaction commits.
+    """
+    _bump_on_commit(set([('changeset', changeset_id)]))
+
+
+def _bump_on_commit(keys):
+    if not keys:
+        return
+
+    def _bump():
+        for model_name, object_id in keys:
+            bump_display_version(model_name, object_id)
+
+    transaction.on_commit(_bump)
+
+
+def issue_body_key(issue, issue_detail):
+    """
+    Cache key for the rendered body of the issue page.
+
+    The versions of the series, its publisher, the indicia publisher and
+    the brand are part of the key, as the page also shows their names, the
+    neighbouring issues and the position in the cover gallery.  Issues
+    showing changed creators, features or awards are bumped themselves.
+    """
+    keys = [('issue', issue.id), ('series', issue.series_id),
+            ('publisher', issue.series.publisher_id),
+            ('indiciapublisher', issue.indicia_publisher_id),
+            ('brand', issue.brand_id)]
+    versions = _get_versions([key for key in keys if key[1]])
+    return 'issue_body_%d_%s_%d_%s_%s' % (
+      issue.id, '_'.join(str(versions.get(key, 0)) for key in keys),
+      issue_detail, translation.get_language(),
+      'my' if settings.MYCOMICS else 'www')
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.28 on 2026-10-16 19:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gcd', '0036_creator_disambiguation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoverGalleryEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('position', models.IntegerField()),
+                ('cover_position', models.IntegerField(db_index=True)),
+                ('cover', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='cover_gallery_entries', to='gcd.Cover')),
+                ('issue', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cover_gallery_entries', to='gcd.Issue')),
+                ('series', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cover_gallery_entries', to='gcd.Series')),
+            ],
+            options={
+                'db_table': 'gcd_cover_gallery_entry',
+                'ordering': ['series', 'position'],
+                'unique_together': {('series', 'position')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.28 on 2026-10-16 20:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gcd', '0037_cover_gallery_entry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreatorCreditSummary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('issue_count', models.IntegerField()),
+                ('first_key_date', models.CharField(max_length=10)),
+                ('last_key_date', models.CharField(max_length=10)),
+                ('creator', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='credit_summaries', to='gcd.Creator')),
+                ('creator_name', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='credit_summaries', to='gcd.CreatorNameDetail')),
+                ('credit_type', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='gcd.CreditType')),
+                ('feature', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='credit_summaries', to='gcd.Feature')),
+                ('series', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='credit_summaries', to='gcd.Series')),
+            ],
+            options={
+                'db_table': 'gcd_creator_credit_summary',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='creatorcreditsummary',
+            index=models.Index(fields=['series', 'creator_name'], name='gcd_creator_series__b4ed9e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorcreditsummary',
+            index=models.Index(fields=['feature', 'creator_name'], name='gcd_creator_feature_37f38a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='creatorcreditsummary',
+            index=models.Index(fields=['creator', 'series'], name='gcd_creator_creator_29fa65_idx'),
+        ),
+    ]
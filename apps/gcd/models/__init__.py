@@ -19,7 +19,7 @@ from .feature import (Feature, FeatureLogo, FeatureType, FeatureRelation,
 from .character import (Character, CharacterNameDetail, CharacterRelationType,
                         CharacterRelation, Group, GroupRelation,
                         GroupMembership, GroupMembershipType)
-from .cover import Cover
+from .cover import Cover, CoverGalleryEntry
 from .issuereprint import IssueReprint
 from .reprint import Reprint
 from .reprinttoissue import ReprintToIssue
@@ -33,6 +33,7 @@ from .creator import CreatorArtInfluence, Creator, CreatorDegree, \
                     CreatorNonComicWork, NonComicWorkType, NonComicWorkRole, \
                     NonComicWorkYear, RelationType, School, MembershipType
 from .award import Award, ReceivedAward
+from .creditsummary import CreatorCreditSummary
 from .datasource import DataSource, SourceType
 
 
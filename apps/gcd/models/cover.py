@@ -89,6 +89,75 @@ class Cover(models.Model):
     def __str__(self):
         return '%s %s cover' % (self.issue.series, self.issue.display_number)
 
+class CoverGalleryEntryManager(models.Manager):
+    def update_series(self, series):
+        """
+        Rebuilds the cover gallery entries of the series.
+
+        Needs one query for the issues and one for the covers, so this
+        is done when covers or issues are committed, and not on display.
+        """
+        issues = Issue.objects.filter(series=series, deleted=False)\
+                              .order_by('sort_code')\
+                              .values_list('id', flat=True)
+        covers = {}
+        for cover_id, issue_id in Cover.objects\
+          .filter(issue__series=series, deleted=False)\
+          .order_by('id').values_list('id', 'issue_id'):
+            covers.setdefault(issue_id, []).append(cover_id)
+
+        entries = []
+        cover_position = 0
+        for issue_id in issues:
+            if issue_id not in covers:
+                entries.append(CoverGalleryEntry(
+                  series=series, issue_id=issue_id, position=len(entries),
+                  cover_position=cover_position))
+                continue
+            for cover_id in covers[issue_id]:
+                entries.append(CoverGalleryEntry(
+                  series=series, issue_id=issue_id, cover_id=cover_id,
+                  position=len(entries), cover_position=cover_position))
+                cover_position += 1
+
+        self.filter(series=series).delete()
+        self.bulk_create(entries)
+
+
+class CoverGalleryEntry(models.Model):
+    """
+    Denormalized position of the covers and cover-less issues of a series,
+    in the order of the cover gallery.
+
+    Maintained by CoverGalleryEntryManager.update_series, so that the
+    gallery page of an issue and the scan table of a series do not need
+    to count and sort all covers and issues of the series.
+    """
+    class Meta:
+        app_label = 'gcd'
+        db_table = 'gcd_cover_gallery_entry'
+        ordering = ['series', 'position']
+        unique_together = ('series', 'position')
+
+    objects = CoverGalleryEntryManager()
+
+    series = models.ForeignKey('gcd.Series', on_delete=models.CASCADE,
+                               related_name='cover_gallery_entries')
+    issue = models.ForeignKey(Issue, on_delete=models.CASCADE,
+                              related_name='cover_gallery_entries')
+    cover = models.ForeignKey(Cover, on_delete=models.CASCADE, null=True,
+                              related_name='cover_gallery_entries')
+
+    # Position of the entry in the scan table.
+    position = models.IntegerField()
+    # Number of covers before this entry in the cover gallery.
+    cover_position = models.IntegerField(db_index=True)
+
+    def __str__(self):
+        return '%s %d: %s' % (self.series, self.position,
+                              self.cover if self.cover_id else self.issue)
+
+
 class CoverIssuePublisherTable(IssuePublisherTable):
     cover = tables.Column(accessor='active_covers',
                           verbose_name='Cover', orderable=False)
@@ -0,0 +1,206 @@
+from django.core.cache import cache
+from django.db import models
+from django.db.models import Count, Max, Min, Q
+
+from .creator import Creator, CreatorNameDetail
+from .feature import Feature, FeatureType
+from .series import Series
+from .story import CreditType, StoryCredit, CORE_TYPES
+
+# The summaries per kind of credit list, with the owner and the target
+# field of the summary, and the paths to them from the story credits.
+SUMMARY_KINDS = {
+  'name_series': ('creator_name', 'series',
+                  'creator_id', 'story__issue__series_id'),
+  'name_feature': ('creator_name', 'feature',
+                   'creator_id', 'story__feature_object'),
+  'creator_series': ('creator', 'series',
+                     'creator__creator_id', 'story__issue__series_id'),
+}
+
+
+def _summary_credits(kind):
+    """
+    Returns the conditions on the credits counted for the kind of summary,
+    the same as the live queries of the credit list pages used.
+    """
+    if kind == 'name_series':
+        return [Q(story__type__id__in=CORE_TYPES)]
+    if kind == 'creator_series':
+        return [Q(story__type__id__in=CORE_TYPES, credit_type__id__lt=6)]
+    # for features of type story only the core sequences count
+    return [Q(story__feature_object__feature_type__id=1,
+              story__type__id__in=CORE_TYPES),
+            Q(story__feature_object__feature_type__in=FeatureType.objects
+                                                           .exclude(id=1))]
+
+
+# States of the summaries, kept as the issue_count of a marker row without
+# owner and target.  Without the marker the summaries were never built.
+SUMMARIES_BUILDING = 0
+SUMMARIES_BUILT = 1
+
+
+class CreatorCreditSummaryManager(models.Manager):
+    STATE_KEY = 'creator_credit_summary_state'
+
+    def _marker(self):
+        return self.filter(creator=None, creator_name=None, series=None,
+                           feature=None)
+
+    def _state(self):
+        state = cache.get(self.STATE_KEY)
+        if state is None:
+            state = self._marker().values_list('issue_count', flat=True)\
+                                  .first()
+            state = -1 if state is None else state
+            cache.set(self.STATE_KEY, state, None)
+        return state
+
+    def _set_state(self, state):
+        self._marker().delete()
+        self.create(issue_count=state, first_key_date='', last_key_date='')
+        cache.set(self.STATE_KEY, state, None)
+
+    def is_maintained(self):
+        """
+        Whether approvals update the summaries, i.e. a build was started.
+        """
+        return self._state() in (SUMMARIES_BUILDING, SUMMARIES_BUILT)
+
+    def is_built(self):
+        """
+        Whether the summaries of all owners were built, so that the credit
+        lists can be read from them.
+        """
+        return self._state() == SUMMARIES_BUILT
+
+    def start_build(self):
+        """
+        Lets approvals maintain the summaries from now on, to be called
+        before the first rebuild().  Keeps summaries already built in use.
+        """
+        if not self.is_maintained():
+            self._set_state(SUMMARIES_BUILDING)
+
+    def finish_build(self):
+        """
+        Marks the summaries as built once rebuild() ran for all owners.
+        """
+        self._set_state(SUMMARIES_BUILT)
+
+    def _compute(self, kind, owner_filter):
+        owner, target, owner_path, target_path = SUMMARY_KINDS[kind]
+        summaries = []
+        for condition in _summary_credits(kind):
+            # one filter() call, so that the conditions on the features
+            # and the values refer to the same join
+            credits = StoryCredit.objects.filter(
+              condition, owner_filter, deleted=False,
+              **{'%s__isnull' % target_path: False}).order_by()
+            # once per credit type and once for all of them together
+            for fields in ([owner_path, target_path, 'credit_type_id'],
+                           [owner_path, target_path]):
+                for row in credits.values(*fields).annotate(
+                  num_issues=Count('story__issue', distinct=True),
+                  first_date=Min('story__issue__key_date'),
+                  last_date=Max('story__issue__key_date')):
+                    summaries.append(CreatorCreditSummary(**{
+                      '%s_id' % owner: row[owner_path],
+                      '%s_id' % target: row[target_path],
+                      'credit_type_id': row.get('credit_type_id'),
+                      'issue_count': row['num_issues'],
+                      'first_key_date': row['first_date'],
+                      'last_key_date': row['last_date']}))
+        return summaries
+
+    def _kind_rows(self, kind):
+        owner, target = SUMMARY_KINDS[kind][:2]
+        return self.filter(**{'%s__isnull' % owner: False,
+                              '%s__isnull' % target: False})
+
+    def affected_keys(self, story_ids, issue_ids):
+        """
+        Returns for each kind of summary the set of (owner id, target id)
+        pairs the credits of the stories, and of the stories of the issues,
+        currently contribute to.
+        """
+        keys = {}
+        for kind, (owner, target, owner_path, target_path) \
+                in SUMMARY_KINDS.items():
+            keys[kind] = set(StoryCredit.objects.filter(
+              Q(story_id__in=story_ids) | Q(story__issue_id__in=issue_ids),
+              deleted=False, **{'%s__isnull' % target_path: False})
+                                        .values_list(owner_path, target_path))
+        return keys
+
+    def update_keys(self, keys):
+        """
+        Recomputes the summaries for the (owner id, target id) pairs per
+        kind of summary, as returned by affected_keys().
+
+        All combinations of the owners and targets of a kind are updated,
+        which are few for the changes of one changeset.
+        """
+        for kind, pairs in keys.items():
+            if not pairs:
+                continue
+            owner, target, owner_path, target_path = SUMMARY_KINDS[kind]
+            owner_ids = set(pair[0] for pair in pairs)
+            target_ids = set(pair[1] for pair in pairs)
+            self._kind_rows(kind).filter(**{'%s__in' % owner: owner_ids,
+                                            '%s__in' % target: target_ids})\
+                                 .delete()
+            self.bulk_create(self._compute(
+              kind, Q(**{'%s__in' % owner_path: owner_ids,
+                         '%s__in' % target_path: target_ids})))
+
+    def rebuild(self, kind, first_owner_id, last_owner_id):
+        """
+        Rebuilds the summaries of the kind for the owners with ids in the
+        range, including both ends.
+        """
+        owner, target, owner_path, target_path = SUMMARY_KINDS[kind]
+        self._kind_rows(kind).filter(**{'%s__gte' % owner: first_owner_id,
+                                        '%s__lte' % owner: last_owner_id})\
+                             .delete()
+        self.bulk_create(self._compute(
+          kind, Q(**{'%s__gte' % owner_path: first_owner_id,
+                     '%s__lte' % owner_path: last_owner_id})))
+
+
+class CreatorCreditSummary(models.Model):
+    """
+    The number of issues and the first and last key date of the credits of a
+    creator name in a series or feature, or of a creator in a series, per
+    credit type and, with credit_type None, for all credits together.
+
+    Maintained on approval of story and issue changes, so the credit lists
+    of series, features and creators don't need to aggregate the credits.
+    """
+    class Meta:
+        app_label = 'gcd'
+        db_table = 'gcd_creator_credit_summary'
+        indexes = [
+            models.Index(fields=['series', 'creator_name']),
+            models.Index(fields=['feature', 'creator_name']),
+            models.Index(fields=['creator', 'series']),
+        ]
+
+    objects = CreatorCreditSummaryManager()
+
+    creator = models.ForeignKey(Creator, on_delete=models.CASCADE, null=True,
+                                related_name='credit_summaries')
+    creator_name = models.ForeignKey(CreatorNameDetail,
+                                     on_delete=models.CASCADE, null=True,
+                                     related_name='credit_summaries')
+    series = models.ForeignKey(Series, on_delete=models.CASCADE, null=True,
+                               related_name='credit_summaries')
+    feature = models.ForeignKey(Feature, on_delete=models.CASCADE, null=True,
+                                related_name='credit_summaries')
+    credit_type = models.ForeignKey(CreditType, on_delete=models.CASCADE,
+                                    null=True)
+
+    issue_count = models.IntegerField()
+    first_key_date = models.CharField(max_length=10)
+    last_key_date = models.CharField(max_length=10)
@@ -188,6 +188,16 @@ class Issue(GcdData):
     def active_credits(self):
         return self.credits.exclude(deleted=True)
 
+    def active_credits_of_type(self, credit_type_id):
+        """
+        The active credits of the credit type, taken from prefetched_credits
+        if the active credits were prefetched, e.g. for the search index.
+        """
+        if hasattr(self, 'prefetched_credits'):
+            return [credit for credit in self.prefetched_credits
+                    if credit.credit_type_id == credit_type_id]
+        return self.active_credits.filter(credit_type_id=credit_type_id)
+
     def active_stories(self):
         return self.story_set.exclude(deleted=True)
 
@@ -461,9 +471,10 @@ class Issue(GcdData):
     def full_descriptor(self):
         if self.variant_name:
             return "%s [%s]" % (self.issue_descriptor, self.variant_name)
-        if self.active_code_numbers().filter(number_type__id=1):
-            return "%s (%s)" % (self.issue_descriptor,
-              self.active_code_numbers().get(number_type__id=1).number)
+        # filtered here, so that prefetched code numbers are used
+        for code_number in self.active_code_numbers():
+            if code_number.number_type_id == 1:
+                return "%s (%s)" % (self.issue_descriptor, code_number.number)
         return self.issue_descriptor
 
     @property
@@ -208,6 +208,16 @@ class Story(GcdData):
                                                        'creator__type')
         return self._active_credits
 
+    def active_credits_of_type(self, credit_type_id):
+        """
+        The active credits of the credit type, taken from prefetched_credits
+        if the active credits were prefetched, e.g. for the search index.
+        """
+        if hasattr(self, 'prefetched_credits'):
+            return [credit for credit in self.prefetched_credits
+                    if credit.credit_type_id == credit_type_id]
+        return self.active_credits.filter(credit_type_id=credit_type_id)
+
     def stat_counts(self):
         if self.deleted:
             return {}
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+Building the search index in id ranges, optionally in several processes.
+
+haystack's update_index pages through the objects with LIMIT and OFFSET,
+which gets slower the further it gets into the large story and issue
+tables.  Here each chunk is an id range, and the objects come from the
+index_queryset() of the search index, which prefetches the credits and
+the other related objects used when preparing the documents.
+
+This is too slow for a request, use scripts/rebuild_search_index.py.
+"""
+
+import multiprocessing
+
+from django.apps import apps
+from django.db import connections as db_connections
+from django.db.models import Max, Min
+from haystack import connections
+
+# number of ids per chunk, the objects of a chunk are prepared in memory
+CHUNK_SIZE = 2000
+
+
+def id_ranges(model, chunk_size=CHUNK_SIZE, last_id=None):
+    """
+    Returns the (first id, last id) ranges, including both ends, covering
+    the ids of the model up to last_id.
+    """
+    bounds = model.objects.aggregate(Min('id'), Max('id'))
+    if bounds['id__min'] is None:
+        return []
+    if last_id is None or last_id > bounds['id__max']:
+        last_id = bounds['id__max']
+    return [(start, min(start + chunk_size - 1, last_id))
+            for start in range(bounds['id__min'], last_id + 1, chunk_size)]
+
+
+def index_chunk(model_label, first_id, last_id, using='default'):
+    """
+    Indexes the objects of the model with ids in the range, including both
+    ends, and returns the number of documents.
+    """
+    model = apps.get_model(model_label)
+    index = connections[using].get_unified_index().get_index(model)
+    objects = list(index.index_queryset(using=using)
+                        .filter(id__gte=first_id, id__lte=last_id))
+    if objects:
+        connections[using].get_backend().update(index, objects)
+    return len(objects)
+
+
+def _index_chunk(args):
+    return index_chunk(*args)
+
+
+def index_chunks(model_label, workers=1, chunk_size=CHUNK_SIZE,
+                 using='default', last_id=None):
+    """
+    Indexes the objects of the model in id ranges, with the given number of
+    worker processes, and yields (first id, last id, number of documents)
+    for each chunk when it is done, in the order of the ids.
+    """
+    model = apps.get_model(model_label)
+    chunks = [(model_label, first_id, chunk_last_id, using)
+              for first_id, chunk_last_id
+              in id_ranges(model, chunk_size, last_id)]
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk[1], chunk[2], _index_chunk(chunk)
+        return
+
+    # the workers must open their own connections instead of sharing the
+    # ones of this process
+    db_connections.close_all()
+    pool = multiprocessing.Pool(workers)
+    try:
+        for chunk, count in zip(chunks, pool.imap(_index_chunk, chunks)):
+            yield chunk[1], chunk[2], count
+    finally:
+        pool.close()
+        pool.join()
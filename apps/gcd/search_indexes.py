@@ -1,16 +1,26 @@
 from datetime import date
+from django.db.models import Prefetch
 from haystack import indexes
 from haystack.fields import MultiValueField
 from apps.gcd.models import Issue, Series, Story, Publisher, IndiciaPublisher,\
     Brand, BrandGroup, STORY_TYPES, Award, Creator, CreatorMembership,\
     CreatorArtInfluence, ReceivedAward, CreatorNonComicWork, Feature, Printer,\
-    Character, Group
+    Character, Group, StoryCredit, IssueCredit, CREDIT_TYPES
 
 from apps.oi.models import on_sale_date_fields
 
 DEFAULT_BOOST = 15.0
 
 
+def _prefetch_credits(path, credit_class):
+    # prefetched_credits is used by active_credits_of_type()
+    return Prefetch(path,
+                    queryset=credit_class.objects.filter(deleted=False)
+                                         .select_related('creator__creator',
+                                                         'creator__type'),
+                    to_attr='prefetched_credits')
+
+
 class ObjectIndex(object):
     def index_queryset(self, using=None):
         """Used when the entire index for model is updated."""
@@ -93,6 +103,12 @@ class IssueIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
     def prepare_title(self, obj):
         return obj.short_name()
 
+    def index_queryset(self, using=None):
+        """Used when the entire index for model is updated."""
+        return super(IssueIndex, self).index_queryset(using).select_related(
+          'series__country', 'series__language', 'series__publisher')\
+          .prefetch_related(_prefetch_credits('credits', IssueCredit))
+
 
 class SeriesIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
@@ -127,11 +143,26 @@ class SeriesIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
     def prepare_title_search(self, obj):
         name = obj.name
         if obj.has_issue_title:
-            for issue in obj.active_issues():
+            if hasattr(obj, 'titled_issues'):
+                issues = obj.titled_issues
+            else:
+                issues = obj.active_issues()
+            for issue in issues:
                 if issue.title:
                     name += '\n' + issue.title
         return name
 
+    def index_queryset(self, using=None):
+        """Used when the entire index for model is updated."""
+        return super(SeriesIndex, self).index_queryset(using).select_related(
+          'country', 'language', 'publisher').prefetch_related(
+          Prefetch('issue_set',
+                   queryset=Issue.objects.filter(deleted=False)
+                                         .exclude(title='')
+                                         .only('id', 'series_id', 'title',
+                                               'sort_code'),
+                   to_attr='titled_issues'))
+
 
 class StoryIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
     text = indexes.CharField(document=True, use_template=True)
@@ -198,7 +229,7 @@ class StoryIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
 
     def _prepare_credit(self, obj, field):
         return_val = [(val.strip()) for val in getattr(obj, field).split(';')]
-        credits = obj.active_credits.filter(credit_type__name=field)
+        credits = obj.active_credits_of_type(CREDIT_TYPES[field])
         if credits:
             if return_val == ['']:
                 return_val = [val.creator.display_credit(val, url=False)
@@ -233,7 +264,7 @@ class StoryIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
         return_val.extend([(val.strip()) for val in
                           getattr(obj.issue, 'editing').split(';')])
 
-        credits = obj.active_credits.filter(credit_type__name='editing')
+        credits = obj.active_credits_of_type(CREDIT_TYPES['editing'])
         if credits:
             if return_val == ['']:
                 return_val = [val.creator.display_credit(val, url=False)
@@ -243,7 +274,7 @@ class StoryIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
                                                               url=False)
                                    for val in credits])
 
-        credits = obj.issue.active_credits.filter(credit_type__name='editing')
+        credits = obj.issue.active_credits_of_type(CREDIT_TYPES['editing'])
         if credits:
             if return_val == ['']:
                 return_val = [val.creator.display_credit(val, url=False)
@@ -275,7 +306,11 @@ class StoryIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
     def index_queryset(self, using=None):
         """Used when the entire index for model is updated."""
         return super(ObjectIndex, self).index_queryset(using).exclude(
-            type=STORY_TYPES['blank']).filter(deleted=False)
+            type=STORY_TYPES['blank']).filter(deleted=False).select_related(
+            'type', 'issue__series__country', 'issue__series__language',
+            'issue__series__publisher').prefetch_related(
+            'feature_object', _prefetch_credits('credits', StoryCredit),
+            _prefetch_credits('issue__credits', IssueCredit))
 
 
 class FeatureIndex(ObjectIndex, indexes.SearchIndex, indexes.Indexable):
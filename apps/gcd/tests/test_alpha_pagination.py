@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from apps.gcd.models import Series
+from apps.gcd.views.alpha_pagination import AlphaPaginator, get_letter_counts
+
+
+ALPHA_PATH = 'apps.gcd.views.alpha_pagination'
+
+
+def test_get_letter_counts():
+    queryset = mock.MagicMock()
+    queryset.order_by.return_value.annotate.return_value.values_list\
+            .return_value.annotate.return_value = [('a', 3), ('A', 2),
+                                                   ('1', 4), (None, 1)]
+    assert get_letter_counts(queryset, 'sort_name') == {'A': 5, '1': 4, '': 1}
+    queryset.order_by.assert_called_once_with()
+
+
+@pytest.yield_fixture
+def letter_counts():
+    with mock.patch('%s.get_letter_counts' % ALPHA_PATH) as counts_mock:
+        yield counts_mock
+
+
+def test_alpha_paginator(letter_counts):
+    letter_counts.return_value = {'1': 4, 'A': 10, 'B': 5, 'C': 30, 'X': 8}
+    queryset = mock.MagicMock(model=Series)
+
+    paginator = AlphaPaginator(queryset, per_page=20)
+
+    letter_counts.assert_called_once_with(queryset, 'sort_name')
+    assert paginator.count == 57
+    assert paginator.number_offset == 4
+    assert paginator.num_pages == 3
+    assert [(repr(page), page.offset, page.count)
+            for page in paginator.page_range] == [('A-B', 4, 15),
+                                                  ('C-W', 19, 30),
+                                                  ('X-Z', 49, 8)]
+    assert paginator.page(2).number == 2
+
+
+def test_alpha_page_object_list(letter_counts):
+    letter_counts.return_value = {'A': 10, 'B': 25}
+    queryset = mock.MagicMock(model=Series)
+
+    paginator = AlphaPaginator(queryset, per_page=20)
+    paginator.page(2).object_list
+
+    queryset.__getitem__.assert_called_once_with(slice(10, 35))
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+
+from datetime import datetime
+
+import mock
+import pytest
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.gcd.models import Issue, Series, Story
+from apps.gcd.views import details
+from apps.gcd.views.conditional import conditional_display, \
+                                       display_validators, _children_modified
+
+
+CONDITIONAL = 'apps.gcd.views.conditional'
+MODIFIED = datetime(2020, 5, 17, 10, 30)
+
+
+@pytest.yield_fixture
+def validators():
+    with mock.patch('%s.display_validators' % CONDITIONAL) as validators_mock:
+        validators_mock.return_value = (MODIFIED, 7)
+        yield validators_mock
+
+
+def _view():
+    view = mock.MagicMock(side_effect=lambda request, **kwargs:
+                            HttpResponse('page'))
+    view.__name__ = 'series'
+    return view, conditional_display(Series, 'series_id',
+                                     related=('publisher',),
+                                     children=('issue',))(view)
+
+
+def _request(user=None, **headers):
+    request = RequestFactory().get('/series/3/', **headers)
+    request.user = user or AnonymousUser()
+    return request
+
+
+def test_conditional_display(validators):
+    view, conditional_view = _view()
+
+    response = conditional_view(_request(), series_id='3')
+    assert response.status_code == 200
+    assert not response.has_header('Last-Modified')
+    assert 'max-age=0' in response['Cache-Control']
+    validators.assert_called_once_with(Series, '3', ('publisher',),
+                                       ('issue',))
+
+    response = conditional_view(
+      _request(HTTP_IF_NONE_MATCH=response['ETag']), series_id='3')
+    assert response.status_code == 304
+    assert view.call_count == 1
+
+
+def test_conditional_display_changed(validators):
+    view, conditional_view = _view()
+    etag = conditional_view(_request(), series_id='3')['ETag']
+
+    validators.return_value = (MODIFIED, 8)
+    response = conditional_view(_request(HTTP_IF_NONE_MATCH=etag),
+                                series_id='3')
+    assert response.status_code == 200
+    assert response['ETag'] != etag
+
+
+def test_conditional_display_if_modified_since(validators):
+    view, conditional_view = _view()
+    conditional_view(_request(), series_id='3')
+
+    # only bumping the display version doesn't change a timestamp
+    validators.return_value = (MODIFIED, 8)
+    response = conditional_view(
+      _request(HTTP_IF_MODIFIED_SINCE='Sun, 17 May 2020 10:30:00 GMT'),
+      series_id='3')
+    assert response.status_code == 200
+    assert view.call_count == 2
+
+
+def test_conditional_display_logged_in(validators):
+    view, conditional_view = _view()
+    response = conditional_view(_request(user=mock.MagicMock(
+                                  is_authenticated=True)), series_id='3')
+    assert not response.has_header('ETag')
+    assert not validators.called
+
+
+def test_conditional_display_missing(validators):
+    validators.return_value = None
+    view, conditional_view = _view()
+    response = conditional_view(_request(), series_id='3')
+    assert view.called
+    assert not response.has_header('ETag')
+
+
+def test_display_validators():
+    with mock.patch.object(Series, 'objects') as objects_mock, \
+            mock.patch('%s.get_display_versions' % CONDITIONAL) \
+            as versions_mock:
+        values = objects_mock.filter.return_value.annotate.return_value\
+                             .values_list
+        values.return_value.first.return_value = (
+          MODIFIED, None, datetime(2021, 1, 1))
+        versions_mock.return_value = {3: 5}
+
+        assert display_validators(Series, '3', related=('publisher',),
+                                  children=('issue',)) == \
+            (datetime(2021, 1, 1), 5)
+
+    values.assert_called_once_with('modified', 'publisher__modified',
+                                   'children_0')
+    versions_mock.assert_called_once_with('series', [3])
+
+
+def test_children_modified():
+    query = _children_modified(Series, 'issue').queryset.query
+    assert query.model is Issue
+    assert [(name, annotation.function, annotation.source_expressions[0]
+             .target.name)
+            for name, annotation in query.annotation_select.items()] == \
+        [('modified', 'MAX', 'modified')]
+    assert [column.target.name for column in query.group_by] == ['series']
+    condition, = query.where.children
+    assert condition.lhs.target.name == 'series'
+    assert condition.rhs.name == 'pk'
+
+
+def test_children_modified_path():
+    query = _children_modified(Issue, 'variant_of__story').queryset.query
+    assert query.model is Story
+    assert [column.target.name for column in query.group_by] == ['issue']
+    condition, = query.where.children
+    assert condition.lhs.target.name == 'issue'
+    assert condition.rhs.name == 'variant_of'
+
+
+def test_variant_page_follows_base_stories():
+    with mock.patch.object(Issue, 'objects') as objects_mock, \
+            mock.patch('%s.get_display_versions' % CONDITIONAL) \
+            as versions_mock, \
+            mock.patch('apps.gcd.views.details.get_object_or_404') \
+            as get_mock, \
+            mock.patch('apps.gcd.views.details.show_issue') as show_mock:
+        values = objects_mock.filter.return_value.annotate.return_value\
+                             .values_list
+        # the variant, its series, no indicia publisher and brand, the
+        # base issue, the own children and the stories of the base issue
+        values.return_value.first.return_value = (
+          MODIFIED, MODIFIED, None, None, MODIFIED,
+          None, None, None, MODIFIED, None, MODIFIED)
+        versions_mock.return_value = {5: 7}
+        get_mock.return_value.deleted = False
+        show_mock.return_value = HttpResponse('page')
+
+        etag = details.issue(_request(), issue_id='5')['ETag']
+        assert details.issue(_request(HTTP_IF_NONE_MATCH=etag),
+                             issue_id='5').status_code == 304
+
+        # a story of the base issue is edited
+        values.return_value.first.return_value = (
+          MODIFIED, MODIFIED, None, None, MODIFIED,
+          None, None, None, MODIFIED, None, datetime(2021, 1, 1))
+        response = details.issue(_request(HTTP_IF_NONE_MATCH=etag),
+                                 issue_id='5')
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+        assert show_mock.call_count == 2
+
+    fields = values.call_args[0]
+    assert 'variant_of__modified' in fields
+    assert len(fields) == 11
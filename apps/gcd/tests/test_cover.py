@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from apps.gcd.models import Series, Issue, Cover, CoverGalleryEntry
+from apps.gcd.models.cover import ZOOM_MEDIUM
+from apps.gcd.views.covers import get_cover_tags
+
+
+COVER_PATH = 'apps.gcd.models.cover'
+
+
+@pytest.yield_fixture
+def gallery_mocks():
+    """
+    Patches the queries and writes of CoverGalleryEntryManager.update_series.
+
+    Yields the issue id list mock, the cover row mock and the manager mock.
+    """
+    with mock.patch('%s.Issue.objects.filter' % COVER_PATH) as issue_filter, \
+            mock.patch('%s.Cover.objects.filter' % COVER_PATH) \
+            as cover_filter, \
+            mock.patch('%s.CoverGalleryEntryManager.filter' % COVER_PATH) \
+            as entry_filter, \
+            mock.patch('%s.CoverGalleryEntryManager.bulk_create' %
+                       COVER_PATH) as bulk_create:
+        issue_ids = issue_filter.return_value.order_by.return_value\
+                                .values_list
+        cover_rows = cover_filter.return_value.order_by.return_value\
+                                 .values_list
+        yield issue_ids, cover_rows, entry_filter, bulk_create
+
+
+def test_update_series(gallery_mocks):
+    issue_ids, cover_rows, entry_filter, bulk_create = gallery_mocks
+    issue_ids.return_value = [10, 11, 12, 13]
+    # issue 11 has no cover, issue 12 two of them
+    cover_rows.return_value = [(100, 10), (101, 12), (102, 12), (103, 13)]
+    series = Series(id=1)
+
+    CoverGalleryEntry.objects.update_series(series)
+
+    entry_filter.assert_called_once_with(series=series)
+    entry_filter.return_value.delete.assert_called_once_with()
+    entries = bulk_create.call_args[0][0]
+    assert [(e.position, e.issue_id, e.cover_id, e.cover_position)
+            for e in entries] == [
+        (0, 10, 100, 0),
+        (1, 11, None, 1),
+        (2, 12, 101, 1),
+        (3, 12, 102, 2),
+        (4, 13, 103, 3),
+    ]
+
+
+def test_get_cover_tags():
+    issue = Issue(id=1, number='1')
+    variant = Issue(id=2, number='1', variant_of=issue)
+    covers = [Cover(id=5, issue=issue), Cover(id=6, issue=variant)]
+    with mock.patch('apps.gcd.views.covers.get_pending_cover_counts',
+                    return_value={6: 2}) as pending_mock, \
+            mock.patch('apps.gcd.views.covers.get_image_tag') as tag_mock:
+        cover_tags = get_cover_tags(covers, 'alt', ZOOM_MEDIUM)
+
+    pending_mock.assert_called_once_with(covers)
+    assert tag_mock.call_count == 2
+    assert cover_tags == [
+        [covers[0], issue, tag_mock.return_value, 0],
+        [covers[1], variant, tag_mock.return_value, 2]]
+
+
+def test_get_cover_tags_for_issue():
+    issue = Issue(id=1, number='1')
+    variant = Issue(id=2, number='1', variant_of=issue)
+    covers = [Cover(id=6, issue=variant)]
+    with mock.patch('apps.gcd.views.covers.get_pending_cover_counts',
+                    return_value={}), \
+            mock.patch('apps.gcd.views.covers.get_image_tag') as tag_mock:
+        cover_tags = get_cover_tags(covers, 'alt', ZOOM_MEDIUM, issue=issue)
+
+    assert cover_tags == [[covers[0], issue, tag_mock.return_value, 0]]
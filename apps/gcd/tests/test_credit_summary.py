@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.db.models import Q
+
+from apps.gcd.models import CreatorCreditSummary
+from apps.gcd.models.creditsummary import CreatorCreditSummaryManager
+
+
+SUMMARY = 'apps.gcd.models.creditsummary'
+
+
+@pytest.yield_fixture
+def credit_filter():
+    with mock.patch('%s.StoryCredit.objects.filter' % SUMMARY) as filter_mock:
+        yield filter_mock
+
+
+def test_affected_keys(credit_filter):
+    credit_filter.return_value.values_list.side_effect = [
+      [(1, 10), (2, 10)], [(1, 7)], [(5, 10)]]
+
+    keys = CreatorCreditSummary.objects.affected_keys([3], [4])
+
+    assert keys == {'name_series': {(1, 10), (2, 10)},
+                    'name_feature': {(1, 7)},
+                    'creator_series': {(5, 10)}}
+    assert credit_filter.call_args_list[1] == mock.call(
+      Q(story_id__in=[3]) | Q(story__issue_id__in=[4]), deleted=False,
+      story__feature_object__isnull=False)
+
+
+def test_compute(credit_filter):
+    rows = credit_filter.return_value.order_by.return_value.values\
+                        .return_value.annotate
+    rows.side_effect = [
+      [{'creator_id': 1, 'story__issue__series_id': 10, 'credit_type_id': 2,
+        'num_issues': 3, 'first_date': '1960-01-00',
+        'last_date': '1962-05-00'}],
+      [{'creator_id': 1, 'story__issue__series_id': 10, 'num_issues': 4,
+        'first_date': '1959-12-00', 'last_date': '1962-05-00'}]]
+
+    summaries = CreatorCreditSummary.objects._compute('name_series',
+                                                      Q(creator_id__in=[1]))
+
+    assert [(summary.creator_name_id, summary.series_id,
+             summary.credit_type_id, summary.issue_count,
+             summary.first_key_date) for summary in summaries] == [
+      (1, 10, 2, 3, '1960-01-00'), (1, 10, None, 4, '1959-12-00')]
+    assert credit_filter.return_value.order_by.return_value.values\
+                        .call_args_list == [
+      mock.call('creator_id', 'story__issue__series_id', 'credit_type_id'),
+      mock.call('creator_id', 'story__issue__series_id')]
+
+
+def test_compute_feature_conditions(credit_filter):
+    credit_filter.return_value.order_by.return_value.values.return_value\
+                 .annotate.return_value = []
+
+    CreatorCreditSummary.objects._compute('name_feature',
+                                          Q(creator_id__in=[1]))
+
+    # stories with features of type story and the others, each with
+    # all conditions in one filter call
+    assert credit_filter.call_count == 2
+
+
+def test_update_keys():
+    path = '%s.CreatorCreditSummaryManager' % SUMMARY
+    with mock.patch('%s._kind_rows' % path) as rows_mock, \
+            mock.patch('%s._compute' % path) as compute_mock, \
+            mock.patch('%s.bulk_create' % path) as create_mock:
+        CreatorCreditSummary.objects.update_keys(
+          {'name_series': {(1, 10), (2, 11)}, 'name_feature': set()})
+
+    rows_mock.assert_called_once_with('name_series')
+    rows_mock.return_value.filter.assert_called_once_with(
+      creator_name__in={1, 2}, series__in={10, 11})
+    rows_mock.return_value.filter.return_value.delete.assert_called_once_with()
+    compute_mock.assert_called_once_with(
+      'name_series', Q(creator_id__in={1, 2},
+                       story__issue__series_id__in={10, 11}))
+    create_mock.assert_called_once_with(compute_mock.return_value)
+
+
+def test_manager():
+    assert isinstance(CreatorCreditSummary.objects,
+                      CreatorCreditSummaryManager)
+
+
+def test_build_state():
+    local_cache = LocMemCache('credit-summary-test', {})
+    manager = CreatorCreditSummary.objects
+    with mock.patch('%s.cache' % SUMMARY, local_cache), \
+            mock.patch.object(CreatorCreditSummaryManager, 'filter') \
+            as filter_mock, \
+            mock.patch.object(CreatorCreditSummaryManager, 'create') \
+            as create_mock:
+        marker = filter_mock.return_value
+        marker.values_list.return_value.first.return_value = None
+        assert not manager.is_maintained()
+        assert not manager.is_built()
+        filter_mock.assert_called_once_with(creator=None, creator_name=None,
+                                            series=None, feature=None)
+
+        manager.start_build()
+        assert manager.is_maintained()
+        assert not manager.is_built()
+        create_mock.assert_called_once_with(issue_count=0, first_key_date='',
+                                            last_key_date='')
+
+        manager.finish_build()
+        assert manager.is_built()
+        create_mock.reset_mock()
+        manager.start_build()
+        assert manager.is_built()
+        assert not create_mock.called
+
+        # after an eviction the state is read from the marker again
+        local_cache.clear()
+        marker.values_list.return_value.first.return_value = 1
+        assert manager.is_built()
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+
+import gzip
+
+import mock
+import pytest
+
+from django.db.models import Q
+from django.test.utils import override_settings
+
+from apps.gcd.models import Publisher, Story
+from apps.gcd.views.csv_export import csv_rows, csv_export_response
+from apps.gcd.views.keyset_pagination import keyset_chunks
+
+
+EXPORT = 'apps.gcd.views.csv_export'
+
+
+def _publisher_row(publisher_id):
+    row = dict((field.name, None)
+               for field in Publisher._meta.concrete_fields)
+    row.update(id=publisher_id, name='Publisher %d' % publisher_id)
+    return row
+
+
+@pytest.yield_fixture
+def chunks():
+    with mock.patch('%s.keyset_chunks' % EXPORT) as chunks_mock:
+        chunks_mock.return_value = [[_publisher_row(1), _publisher_row(2)],
+                                    [_publisher_row(3)]]
+        yield chunks_mock
+
+
+def test_csv_rows(chunks):
+    queryset = mock.MagicMock(model=Publisher)
+    lines = list(csv_rows(queryset))
+
+    assert lines[0].startswith('﻿ID,name,')
+    assert len(lines) == 3
+    assert lines[1].count('\r\n') == 2
+    assert lines[2].startswith('3,Publisher 3,')
+
+
+def test_csv_rows_max_rows(chunks):
+    queryset = mock.MagicMock(model=Publisher)
+    lines = list(csv_rows(queryset, max_rows=1))
+    assert len(lines) == 2
+    assert lines[1].startswith('1,Publisher 1,')
+
+
+def test_csv_rows_credits(chunks):
+    row = dict((field.name, '') for field in Story._meta.concrete_fields)
+    row['id'] = 5
+    chunks.return_value = [[row]]
+    with mock.patch('%s._chunk_credits' % EXPORT) as credits_mock:
+        credits_mock.return_value = mock.MagicMock()
+        credits_mock.return_value.__getitem__.side_effect = \
+            lambda key: ['Stan Lee'] if key == (5, 1) else []
+        lines = list(csv_rows(mock.MagicMock(model=Story)))
+
+    credits_mock.assert_called_once_with(Story, [5])
+    assert 'script credits,pencils credits' in lines[0]
+    assert lines[1].endswith(',Stan Lee,,,,,\r\n')
+
+
+@override_settings(CSV_EXPORT_MAX_ROWS=10)
+def test_csv_export_response_gzipped(chunks):
+    queryset = mock.MagicMock(model=Publisher)
+    queryset.model.__name__ = 'Publisher'
+    response = csv_export_response(queryset, gzipped=True)
+
+    assert response['Content-Type'] == 'application/gzip'
+    assert '.csv.gz' in response['Content-Disposition']
+    content = gzip.decompress(b''.join(response.streaming_content))
+    assert content.decode('utf-8').count('\r\n') == 4
+
+
+def test_keyset_chunks():
+    queryset = mock.MagicMock()
+    values = queryset.annotate.return_value.order_by.return_value.values\
+                     .return_value
+    values.__getitem__.return_value = [{'id': 1, 'keyset_0': 1},
+                                       {'id': 2, 'keyset_0': 2}]
+    values.filter.return_value.__getitem__.return_value = [
+      {'id': 3, 'keyset_0': 3}]
+    with mock.patch('apps.gcd.views.keyset_pagination.get_keyset_ordering',
+                    return_value=None):
+        chunks = list(keyset_chunks(queryset, ['id'], 2))
+
+    assert [[row['id'] for row in rows] for rows in chunks] == [[1, 2], [3]]
+    values.filter.assert_called_once_with(Q(pk__gt=2))
+    queryset.annotate.return_value.order_by.assert_called_once_with('pk')
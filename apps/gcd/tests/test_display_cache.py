@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from django.core.cache.backends.locmem import LocMemCache
+
+from apps.gcd.models import Series, Issue, Publisher, IndiciaPublisher, \
+                            Brand
+from apps.gcd.display_cache import get_display_version, \
+                                   get_display_versions, \
+                                   bump_changeset_version, \
+                                   bump_display_versions, \
+                                   bump_display_versions_by_id, \
+                                   issue_body_key
+from apps.oi.models import StoryRevision, StoryCreditRevision
+
+
+@pytest.yield_fixture
+def local_cache():
+    local_cache = LocMemCache('display-cache-test', {})
+    with mock.patch('apps.gcd.display_cache.cache', local_cache), \
+            mock.patch('apps.gcd.display_cache.transaction.on_commit',
+                       side_effect=lambda func: func()):
+        yield local_cache
+
+
+@pytest.fixture
+def issue():
+    series = Series(id=2, name='Test Series', year_began=1940)
+    return Issue(id=1, number='1', series=series)
+
+
+def test_version_is_stable(local_cache, issue):
+    version = get_display_version(issue)
+    assert get_display_version(issue) == version
+
+
+def test_bump_changes_version(local_cache, issue):
+    version = get_display_version(issue)
+    series_version = get_display_version(issue.series)
+    bump_display_versions([issue, None])
+    assert get_display_version(issue) == version + 1
+    assert get_display_version(issue.series) == series_version
+
+
+def test_bump_is_deferred_to_commit(issue):
+    local_cache = LocMemCache('display-cache-test-deferred', {})
+    with mock.patch('apps.gcd.display_cache.cache', local_cache), \
+            mock.patch('apps.gcd.display_cache.transaction.on_commit') \
+            as on_commit_mock:
+        version = get_display_version(issue)
+        bump_display_versions([issue])
+        assert get_display_version(issue) == version
+        on_commit_mock.call_args[0][0]()
+        assert get_display_version(issue) == version + 1
+
+
+def test_issue_body_key_follows_series(local_cache, issue):
+    key = issue_body_key(issue, 1)
+    assert issue_body_key(issue, 1) == key
+    assert issue_body_key(issue, 2) != key
+    bump_display_versions([issue.series])
+    assert issue_body_key(issue, 1) != key
+
+
+def test_issue_body_key_follows_names(local_cache, issue):
+    issue.series.publisher = Publisher(id=4, name='Test Publisher')
+    issue.indicia_publisher = IndiciaPublisher(id=5, name='Test Indicia')
+    issue.brand = Brand(id=6, name='Test Brand')
+    key = issue_body_key(issue, 1)
+    bump_display_versions([issue.series.publisher])
+    assert issue_body_key(issue, 1) != key
+
+    key = issue_body_key(issue, 1)
+    bump_display_versions([issue.indicia_publisher])
+    assert issue_body_key(issue, 1) != key
+
+    key = issue_body_key(issue, 1)
+    bump_display_versions_by_id('brand', [6])
+    assert issue_body_key(issue, 1) != key
+
+    key = issue_body_key(issue, 1)
+    bump_display_versions_by_id('issue', [1, 3])
+    assert issue_body_key(issue, 1) != key
+
+
+def test_base_issue_story_changes_variant_body_key(local_cache, issue):
+    variant = Issue(id=3, number='1', series=issue.series, variant_of=issue)
+    key = issue_body_key(variant, 1)
+    story_revision = StoryRevision(issue=issue)
+    with mock.patch.object(Issue, 'active_variants', return_value=[variant]):
+        bump_display_versions(story_revision._get_display_objects())
+        assert issue_body_key(variant, 1) != key
+
+        key = issue_body_key(variant, 1)
+        bump_display_versions(StoryCreditRevision(
+          story_revision=story_revision)._get_display_objects())
+        assert issue_body_key(variant, 1) != key
+
+
+def test_changeset_versions(local_cache):
+    versions = get_display_versions('changeset', [1, 2])
+    assert get_display_versions('changeset', [2, 1]) == versions
+    bump_changeset_version(2)
+    assert get_display_versions('changeset', [1, 2]) == {
+      1: versions[1], 2: versions[2] + 1}
@@ -337,6 +337,18 @@ def test_active_stories(any_series):
         assert active_stories is qs
 
 
+def test_full_descriptor_code_number(any_series):
+    with mock.patch('%s.active_code_numbers' % ISSUE_PATH) as codes_mock:
+        codes_mock.return_value = [mock.MagicMock(number_type_id=2),
+                                   mock.MagicMock(number_type_id=1,
+                                                  number='123-4')]
+        i = Issue(number='1', series=any_series)
+        assert i.full_descriptor == '1 (123-4)'
+
+        codes_mock.return_value = []
+        assert i.full_descriptor == '1'
+
+
 def test_active_variants(any_series):
     with mock.patch('%s.variant_set' % ISSUE_PATH) as vs_mock:
         qs = mock.MagicMock(spec=QuerySet)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from django.db.models import F, Q
+
+from apps.gcd.models import Issue, Story
+from apps.gcd.views.keyset_pagination import get_keyset_ordering, \
+                                             KeysetPaginator, _seek_filter
+
+
+@pytest.fixture
+def issues():
+    return Issue.objects.annotate(series_name=F('series__sort_name'))\
+                        .order_by('-series_name', 'sort_code')
+
+
+def test_get_keyset_ordering(issues):
+    assert get_keyset_ordering(issues) == [('series_name', True, False),
+                                           ('sort_code', False, False),
+                                           ('pk', False, False)]
+
+
+def test_get_keyset_ordering_related_path():
+    stories = Story.objects.order_by('issue__series__sort_name',
+                                     'sequence_number', 'id')
+    assert get_keyset_ordering(stories) == [
+      ('issue__series__sort_name', False, False),
+      ('sequence_number', False, False),
+      ('id', False, False)]
+
+
+def test_get_keyset_ordering_unsupported():
+    # ordering by a relation uses the ordering of the related model
+    assert get_keyset_ordering(Story.objects.order_by('issue')) is None
+    assert get_keyset_ordering(Story.objects.order_by('?')) is None
+    assert get_keyset_ordering([1, 2, 3]) is None
+
+
+def test_seek_filter():
+    ordering = [('a', False, False), ('b', True, True), ('pk', False, False)]
+    seek = _seek_filter(ordering, ['x', 'y', 3], False)
+    assert seek == (Q(a__gt='x') |
+                    (Q(a='x') & (Q(b__lt='y') | Q(b__isnull=True))) |
+                    (Q(a='x') & Q(b='y') & Q(pk__gt=3)))
+
+
+def test_seek_filter_null_value():
+    ordering = [('b', False, True), ('pk', False, False)]
+    assert _seek_filter(ordering, [None, 3], False) == \
+      Q(b__isnull=False) | (Q(b__isnull=True) & Q(pk__gt=3))
+    assert _seek_filter(ordering, [None, 3], True) == \
+      Q(b__isnull=True) & Q(pk__lt=3)
+
+
+def test_cursor(issues):
+    paginator = KeysetPaginator(issues, per_page=2)
+    cursor = paginator.encode_cursor(['Action Comics', '0001', 5])
+    assert paginator.decode_cursor(cursor) == ['Action Comics', '0001', 5]
+
+    other = KeysetPaginator(issues.order_by('sort_code'), per_page=2)
+    with pytest.raises(ValueError):
+        other.decode_cursor(cursor)
+    with pytest.raises(ValueError):
+        paginator.decode_cursor('not a cursor')
+
+
+def _rows(*values):
+    return [mock.Mock(keyset_0=name, keyset_1=sort_code, keyset_2=pk)
+            for name, sort_code, pk in values]
+
+
+def test_page(issues):
+    queryset = mock.MagicMock()
+    queryset.order_by.return_value = queryset
+    queryset.annotate.return_value = queryset
+    queryset.filter.return_value = queryset
+    paginator = KeysetPaginator(queryset, per_page=2,
+                                ordering=get_keyset_ordering(issues))
+
+    queryset.__getitem__.return_value = _rows(('B', 1, 7), ('A', 1, 3),
+                                              ('A', 2, 5))
+    page = paginator.page()
+    queryset.__getitem__.assert_called_once_with(slice(None, 3))
+    assert queryset.filter.called is False
+    assert len(page) == 2
+    assert page.has_next() is True
+    assert page.has_previous() is False
+    assert paginator.decode_cursor(page.next_cursor) == ['A', 1, 3]
+
+    queryset.__getitem__.return_value = _rows(('A', 2, 5))
+    page = paginator.page(after=page.next_cursor)
+    queryset.filter.assert_called_once_with(
+      _seek_filter(paginator.ordering, ['A', 1, 3], False))
+    assert page.has_next() is False
+    assert page.has_previous() is True
+    assert paginator.decode_cursor(page.previous_cursor) == ['A', 2, 5]
+
+
+def test_page_before(issues):
+    queryset = mock.MagicMock()
+    queryset.order_by.return_value = queryset
+    queryset.annotate.return_value = queryset
+    queryset.filter.return_value = queryset
+    paginator = KeysetPaginator(queryset, per_page=2,
+                                ordering=get_keyset_ordering(issues))
+
+    # going backwards, the rows come in reverse order
+    queryset.__getitem__.return_value = _rows(('A', 1, 3), ('B', 1, 7))
+    page = paginator.page(before=paginator.encode_cursor(['A', 2, 5]))
+    queryset.order_by.assert_called_with('series_name', '-sort_code', '-pk')
+    assert [row.keyset_2 for row in page.object_list] == [7, 3]
+    assert page.has_previous() is False
+    assert page.has_next() is True
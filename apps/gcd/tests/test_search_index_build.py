@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from apps.gcd.models import Issue, Series, Story
+from apps.gcd.search_index_build import id_ranges, index_chunk, index_chunks
+from apps.gcd.search_indexes import StoryIndex, SeriesIndex
+
+
+BUILD = 'apps.gcd.search_index_build'
+
+
+def _credit(credit_type_id, name):
+    credit = mock.MagicMock(credit_type_id=credit_type_id)
+    credit.creator.display_credit.return_value = name
+    return credit
+
+
+def test_id_ranges():
+    model = mock.MagicMock()
+    model.objects.aggregate.return_value = {'id__min': 3, 'id__max': 10}
+    assert id_ranges(model, 4) == [(3, 6), (7, 10)]
+    assert id_ranges(model, 4, last_id=8) == [(3, 6), (7, 8)]
+
+
+def test_id_ranges_empty():
+    model = mock.MagicMock()
+    model.objects.aggregate.return_value = {'id__min': None, 'id__max': None}
+    assert id_ranges(model) == []
+
+
+@pytest.yield_fixture
+def haystack_connections():
+    with mock.patch('%s.connections' % BUILD) as connections_mock:
+        yield connections_mock['default']
+
+
+def test_index_chunk(haystack_connections):
+    index = haystack_connections.get_unified_index.return_value.get_index\
+                                .return_value
+    objects = index.index_queryset.return_value.filter
+    objects.return_value = [Story(id=5), Story(id=6)]
+
+    assert index_chunk('gcd.story', 5, 8) == 2
+
+    objects.assert_called_once_with(id__gte=5, id__lte=8)
+    haystack_connections.get_backend.return_value.update\
+                        .assert_called_once_with(index, objects.return_value)
+
+
+def test_index_chunk_empty(haystack_connections):
+    index = haystack_connections.get_unified_index.return_value.get_index\
+                                .return_value
+    index.index_queryset.return_value.filter.return_value = []
+
+    assert index_chunk('gcd.story', 5, 8) == 0
+    assert not haystack_connections.get_backend.called
+
+
+def test_index_chunks():
+    with mock.patch('%s.id_ranges' % BUILD) as ranges_mock, \
+            mock.patch('%s.index_chunk' % BUILD) as chunk_mock:
+        ranges_mock.return_value = [(1, 10), (11, 15)]
+        chunk_mock.side_effect = [7, 3]
+        assert list(index_chunks('gcd.issue')) == [(1, 10, 7), (11, 15, 3)]
+    assert chunk_mock.call_args_list == [
+      mock.call('gcd.issue', 1, 10, 'default'),
+      mock.call('gcd.issue', 11, 15, 'default')]
+
+
+def test_prepare_credit_prefetched():
+    story = Story(script='Writer', pencils='')
+    story.prefetched_credits = [_credit(1, 'Stan Lee'),
+                                _credit(2, 'Jack Kirby')]
+    index = StoryIndex()
+    with mock.patch('apps.gcd.models.story.Story.credits') as credits_mock:
+        assert index.prepare_script(story) == ['Writer', 'Stan Lee']
+        assert index.prepare_pencils(story) == ['Jack Kirby']
+        assert index.prepare_inks(story) is None
+    assert not credits_mock.exclude.called
+
+
+def test_prepare_title_search_prefetched():
+    series = Series(name='Tales', has_issue_title=True)
+    series.titled_issues = [Issue(title='One'), Issue(title='Two')]
+    assert SeriesIndex().prepare_title_search(series) == 'Tales\nOne\nTwo'
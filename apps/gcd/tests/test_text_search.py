@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from django.db.models import Q
+from django.test.utils import override_settings
+
+from apps.gcd.text_search import boolean_query, IcontainsEngine, \
+                                  MySQLFulltextEngine
+from apps.gcd.views.search import text_qobj
+
+
+TEXT_SEARCH = 'apps.gcd.text_search'
+
+
+def test_boolean_query():
+    assert boolean_query('The Spider-Man of X') == '+Spider* +Man*'
+    assert boolean_query('of an X') == ''
+
+
+def test_icontains_engine():
+    assert IcontainsEngine().filter('story__title', 'spider') == \
+           Q(story__title__icontains='spider')
+
+
+@pytest.yield_fixture
+def vendor():
+    with mock.patch('%s.connection' % TEXT_SEARCH) as connection_mock:
+        connection_mock.vendor = 'mysql'
+        yield connection_mock
+
+
+def test_fulltext_engine(vendor):
+    assert MySQLFulltextEngine().filter('issue__story__title',
+                                        'Spider-Man') == \
+           Q(issue__story__title__fulltext='+Spider* +Man*') & \
+           Q(issue__story__title__icontains='Spider-Man')
+
+
+@pytest.mark.parametrize('path, term', [('title', 'X'),
+                                        ('job_number', 'Spider')])
+def test_fulltext_engine_icontains(vendor, path, term):
+    assert MySQLFulltextEngine().filter(path, term) == \
+           Q(**{'%s__icontains' % path: term})
+
+
+def test_fulltext_engine_other_database(vendor):
+    vendor.vendor = 'sqlite'
+    assert MySQLFulltextEngine().filter('title', 'Spider') == \
+           Q(title__icontains='Spider')
+
+
+def test_text_qobj(vendor):
+    with override_settings(
+      TEXT_SEARCH_ENGINE='%s.MySQLFulltextEngine' % TEXT_SEARCH):
+        assert text_qobj('synopsis', 'icontains', 'Spider') == \
+               Q(synopsis__fulltext='+Spider*') & \
+               Q(synopsis__icontains='Spider')
+        assert text_qobj('synopsis', 'iexact', 'Spider') == \
+               Q(synopsis__iexact='Spider')
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Engines for the 'Contains' matching of the text fields in the advanced search.
+
+A plain icontains on the story text fields is a LIKE '%...%' which can't
+use an index, so each such search scans the whole story table.  The engine
+used is configured with TEXT_SEARCH_ENGINE in the settings.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection, NotSupportedError
+from django.db.models import CharField, Lookup, Q, TextField
+from django.utils.module_loading import import_string
+
+# Story fields with a FULLTEXT index, see create_story_fulltext_indexes.py.
+STORY_FULLTEXT_FIELDS = ('title', 'first_line', 'characters', 'synopsis',
+                         'reprint_notes', 'notes', 'script', 'pencils',
+                         'inks', 'colors', 'letters', 'editing')
+
+# innodb_ft_min_token_size, shorter words are not in the index
+MIN_WORD_LENGTH = 3
+
+# the default InnoDB stopwords, which are not in the index either
+STOPWORDS = frozenset((
+  'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en',
+  'for', 'from', 'how', 'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or',
+  'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+  'will', 'with', 'und', 'www'))
+
+
+class FulltextMatch(Lookup):
+    """
+    field__fulltext='+some* +words*' is MATCH (field) AGAINST (...) in
+    boolean mode, the field needs its own FULLTEXT index.
+    """
+    lookup_name = 'fulltext'
+
+    def as_mysql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return 'MATCH (%s) AGAINST (%s IN BOOLEAN MODE)' % (lhs, rhs), \
+               lhs_params + rhs_params
+
+    def as_sql(self, compiler, connection):
+        raise NotSupportedError('Full-text matching needs MySQL.')
+
+
+CharField.register_lookup(FulltextMatch)
+TextField.register_lookup(FulltextMatch)
+
+
+def boolean_query(term):
+    """
+    Returns the boolean mode query requiring all indexed words of the term
+    as word prefixes, or '' if none of the words are indexed.
+    """
+    words = [word for word in re.split(r'\W+', term)
+             if len(word) >= MIN_WORD_LENGTH and
+             word.lower() not in STOPWORDS]
+    return ' '.join('+%s*' % word for word in words)
+
+
+class IcontainsEngine(object):
+    """
+    Matches with icontains, i.e. LIKE '%term%'.
+    """
+    def filter(self, path, term):
+        return Q(**{'%s__icontains' % path: term})
+
+
+class MySQLFulltextEngine(IcontainsEngine):
+    """
+    Uses the FULLTEXT indexes of the story fields to find the candidates,
+    which are then checked with icontains as before.
+
+    The index only finds words starting with the searched ones, so a term
+    within a word, e.g. 'man' in 'Batman', is not found.  Searches where
+    no word is long enough for the index, or not on an indexed field, are
+    done with icontains alone.
+    """
+    def filter(self, path, term):
+        query = boolean_query(term)
+        field = path.rsplit('__', 1)[-1]
+        if connection.vendor != 'mysql' or not query or \
+           field not in STORY_FULLTEXT_FIELDS:
+            return super(MySQLFulltextEngine, self).filter(path, term)
+        return Q(**{'%s__fulltext' % path: query}) & \
+               super(MySQLFulltextEngine, self).filter(path, term)
+
+
+def get_text_search_engine():
+    return import_string(settings.TEXT_SEARCH_ENGINE)()
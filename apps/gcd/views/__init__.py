@@ -14,6 +14,7 @@ from django.shortcuts import render
 
 from .pagination import DiggPaginator
 from .alpha_pagination import AlphaPaginator
+from .keyset_pagination import KeysetPaginator, get_keyset_ordering
 
 from apps.stddata.models import Language
 from apps.stats.models import CountStats
@@ -80,15 +81,42 @@ class ResponsePaginator(object):
     Uses DiggPaginator from
     http://bitbucket.org/miracle2k/djutils/src/tip/djutils/pagination.py.
     We could reconsider writing our own code.
+
+    With keyset=True, pages are linked with cursors from KeysetPaginator
+    instead of page numbers, which keeps deep pages of long listings fast.
+    Explicit page numbers still work, e.g. from the page number form.
+    This falls back to page numbers if the ordering of the queryset does
+    not allow keyset pagination.
     """
-    def __init__(self, queryset, vars=None, per_page=100, alpha=False):
+    def __init__(self, queryset, vars=None, per_page=100, alpha=False,
+                 keyset=False):
         self.vars = vars or {}
         self.p = DiggPaginator(queryset, per_page, body=7, padding=2, tail=1)
         if alpha:
             alpha_paginator = AlphaPaginator(queryset, per_page=per_page)
             self.vars['alpha_paginator'] = alpha_paginator
+        self.keyset_paginator = None
+        if keyset:
+            ordering = get_keyset_ordering(queryset)
+            if ordering:
+                self.keyset_paginator = KeysetPaginator(
+                  queryset, per_page=per_page, ordering=ordering)
+
+    def paginate_keyset(self, request):
+        try:
+            page = self.keyset_paginator.page(
+              after=request.GET.get('after'), before=request.GET.get('before'))
+        except ValueError:
+            page = self.keyset_paginator.page()
+        self.vars['pagination_type'] = 'keyset'
+        self.vars['page'] = page
+        self.vars['items'] = page.object_list
+        return page
 
     def paginate(self, request):
+        if self.keyset_paginator and 'page' not in request.GET:
+            return self.paginate_keyset(request)
+
         page_num = 1
         self.vars['pagination_type'] = 'num'
         if ('page' in request.GET):
@@ -112,11 +140,9 @@ class ResponsePaginator(object):
                           self.alpha_paginator.page(alpha_page_num)
                         self.vars['pagination_type'] = 'alpha'
                         self.vars['alpha_page'] = alpha_page
-                        issue_count = self.alpha_paginator.number_offset
-                        for i in range(1,alpha_page_num):
-                            issue_count += \
-                              self.alpha_paginator.page(i).count
-                        page_num = int(issue_count/self.p.per_page) + 1
+                        if alpha_page:
+                            page_num = int(alpha_page.offset /
+                                           self.p.per_page) + 1
                     except ValueError:
                         page_num = 1
                 else:
@@ -129,9 +155,10 @@ class ResponsePaginator(object):
 
 
 def paginate_response(request, queryset, template, vars, per_page=100,
-                      callback_key=None, callback=None, alpha=False):
+                      callback_key=None, callback=None, alpha=False,
+                      keyset=False):
     paginator = ResponsePaginator(queryset, vars=vars, per_page=per_page,
-                                  alpha=alpha)
+                                  alpha=alpha, keyset=keyset)
     page = paginator.paginate(request)
 
     if callback_key is not None:
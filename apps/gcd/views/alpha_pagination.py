@@ -1,28 +1,32 @@
 import string
 from django.core.paginator import InvalidPage
+from django.db.models import Count
+from django.db.models.functions import Substr
 
 # alphabetical pagination is based on
 # https://djangosnippets.org/snippets/2732/
 
-# the get_field-routine comes from
-# http://stackoverflow.com/questions/20235807/how-to-get-foreign-key-values-with-getattr-from-models
 
+def get_letter_counts(queryset, field):
+    """
+    Returns a dict mapping the upper-cased first letters of the given field
+    to the number of objects in the queryset starting with them.
 
-def get_repr(value):
-    if callable(value):
-        return '%s' % value()
-    return value
+    Uses one GROUP BY query on the first character instead of loading
+    the objects themselves.
+    """
+    letter_counts = queryset.order_by()\
+                            .annotate(alpha_letter=Substr(field, 1, 1))\
+                            .values_list('alpha_letter')\
+                            .annotate(alpha_count=Count('pk'))
 
-
-def get_field(instance, field):
-    field_path = field.split('__')
-    attr = instance
-    for elem in field_path:
-        try:
-            attr = get_repr(getattr(attr, elem))
-        except AttributeError:
-            return None
-    return attr
+    chunks = {}
+    for letter, count in letter_counts:
+        # depending on the collation the database may or may not have
+        # grouped upper and lower case together
+        letter = str.upper(letter or '')
+        chunks[letter] = chunks.get(letter, 0) + count
+    return chunks
 
 
 class AlphaPaginator(object):
@@ -33,56 +37,44 @@ class AlphaPaginator(object):
         # ignore allow_empty_first_page and orphans, just here for compliance
         self.page_range = []
         self.object_list = queryset
-        self.count = len(self.object_list)
         self.number_offset = 0
 
-        # chunk up the objects so we don't need to iterate over the whole list
-        # for each letter
-        chunks = {}
-
         # we sort them by the first model ordering key
-        for obj in self.object_list:
-            if queryset:
-                obj_str = str(get_field(obj, obj._meta.ordering[0]))
-            else:
-                obj_str = str(obj)
-
-            letter = str.upper(obj_str[0])
-
-            if letter not in chunks:
-                chunks[letter] = []
+        chunks = get_letter_counts(queryset,
+                                   queryset.model._meta.ordering[0])
+        self.count = sum(chunks.values())
 
-            chunks[letter].append(obj)
+        # count issues for non-ASCII-letters start of series numbers,
+        # these are sorted before the letters
+        for letter in chunks:
+            if letter not in string.ascii_uppercase:
+                self.number_offset += chunks[letter]
 
         # the process for assigning objects to each page
-        current_page = NamePage(self)
+        current_page = NamePage(self, self.number_offset)
 
         for letter in string.ascii_uppercase:
             if letter not in chunks:
-                current_page.add([], letter)
+                current_page.add(0, letter)
                 continue
 
-            # the items in object_list starting with this letter
-            sub_list = chunks[letter]
+            # the number of objects starting with this letter
+            letter_count = chunks[letter]
 
-            new_page_count = len(sub_list) + current_page.count
-            # First, check to see if sub_list will fit or it needs to go onto
-            # a new page. If assigning this list will cause the page to
+            new_page_count = letter_count + current_page.count
+            # First, check to see if the letter will fit or it needs to go
+            # onto a new page. If assigning this letter will cause the page to
             # overflow and an underflow is closer to per_page than an overflow.
-            # and the page isn't empty (which means len(sub_list) > per_page)
+            # and the page isn't empty (which means letter_count > per_page)
             if new_page_count > per_page and current_page.count > 0 and \
               abs(per_page - current_page.count) < \
               abs(per_page - new_page_count):
                 # make a new page
                 self.page_range.append(current_page)
-                current_page = NamePage(self)
-
-            current_page.add(sub_list, letter)
+                current_page = NamePage(self, current_page.offset +
+                                              current_page.count)
 
-        # count issues for non-ASCII-letters start of series numbers
-        for letter in chunks:
-            if letter not in string.ascii_uppercase:
-                self.number_offset += len(chunks[letter])
+            current_page.add(letter_count, letter)
 
         # if we finished the for loop with a page that isn't empty, add it
         if current_page.count > 0:
@@ -104,14 +96,18 @@ class AlphaPaginator(object):
 
 
 class NamePage(object):
-    def __init__(self, paginator):
+    def __init__(self, paginator, offset):
         self.paginator = paginator
-        self.object_list = []
+        # number of objects on the pages before this one
+        self.offset = offset
+        self.count = 0
         self.letters = []
 
     @property
-    def count(self):
-        return len(self.object_list)
+    def object_list(self):
+        # only fetch the objects of this page
+        return self.paginator.object_list[self.offset:
+                                          self.offset + self.count]
 
     @property
     def start_letter(self):
@@ -136,7 +132,7 @@ class NamePage(object):
     # just added the methods I needed to use in the templates
     # feel free to add the ones you need too
     def has_other_pages(self):
-        return len(self.object_list) > 0
+        return self.count > 0
 
     def has_previous(self):
         return self.paginator.page_range.index(self)
@@ -150,9 +146,8 @@ class NamePage(object):
     def previous_page_number(self):
         return self.paginator.page_range.index(self)
 
-    def add(self, new_list, letter=None):
-        if len(new_list) > 0:
-            self.object_list = self.object_list + new_list
+    def add(self, count, letter=None):
+        self.count += count
         if letter:
             self.letters.append(letter)
 
@@ -0,0 +1,111 @@
+"""
+Conditional GET for the display pages of anonymous visitors.
+
+The ETag of a page comes from one cheap query for the modified timestamps
+of the displayed object, the objects it refers to and the latest modified
+of each kind of its children.  It further includes the display version of
+the object, bumped by approved changes touching it, DEPLOYMENT_VERSION,
+and what else the page varies on.  A matching If-None-Match is answered
+with 304 before the view runs.  There is no Last-Modified, as changes
+only bumping the display version, e.g. renamed creators or publishers
+shown on the page, don't change any of the timestamps.  Pages for logged in users show editing links and their collections,
+so they are always rendered.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import translation
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from apps.gcd.display_cache import get_display_versions
+
+
+def _children_modified(model, child):
+    # child can be a path, e.g. variant_of__story for the stories of the
+    # base issue of a variant
+    path = child.split('__')
+    name = path.pop()
+    for field in path:
+        model = model._meta.get_field(field).related_model
+    relation = model._meta.get_field(name)
+    foreign_key = relation.field.name
+    return Subquery(relation.related_model.objects
+                            .filter(**{foreign_key:
+                                       OuterRef('__'.join(path) or 'pk')})
+                            .order_by()
+                            .values(foreign_key)
+                            .annotate(modified=Max('modified'))
+                            .values('modified'))
+
+
+def display_validators(model, object_id, related=(), children=()):
+    """
+    Returns the latest modified timestamp of the object, the objects at
+    the related paths, and the children of the reverse relations, as well
+    as the display version of the object.  Returns None if there is no
+    such object.
+    """
+    annotations = dict(('children_%d' % index,
+                        _children_modified(model, child))
+                       for index, child in enumerate(children))
+    fields = ['modified'] + ['%s__modified' % path for path in related] + \
+             list(annotations)
+    values = model.objects.filter(id=object_id).annotate(**annotations)\
+                          .values_list(*fields).first()
+    if values is None:
+        return None
+    version = get_display_versions(model._meta.model_name,
+                                   [int(object_id)])[int(object_id)]
+    return max(value for value in values if value is not None), version
+
+
+def _is_conditional(request):
+    # messages are shown once, so such a page can't be served from cache
+    return request.method in ('GET', 'HEAD') and \
+           not request.user.is_authenticated and \
+           'messages' not in request.COOKIES
+
+
+def conditional_display(model, id_kwarg, related=(), children=()):
+    """
+    Decorator answering conditional GETs of anonymous visitors for the
+    display page of the object of model with the id in the id_kwarg view
+    argument.  related are paths of foreign keys whose objects are shown
+    on the page, children names of reverse relations listed on it, or
+    paths ending in one for the children of a related object.
+    """
+    def _validators(request, kwargs):
+        if not hasattr(request, '_display_validators'):
+            request._display_validators = display_validators(
+              model, kwargs[id_kwarg], related, children)
+        return request._display_validators
+
+    def _etag(request, *args, **kwargs):
+        validators = _validators(request, kwargs)
+        if validators is None:
+            return None
+        modified, version = validators
+        return hashlib.md5(('%s|%s|%d|%s|%s|%s|%s' % (
+          settings.DEPLOYMENT_VERSION, modified.isoformat(), version,
+          request.get_full_path(), translation.get_language(),
+          getattr(request, 'flavour', ''),
+          'my' if settings.MYCOMICS else 'www')).encode('utf-8')).hexdigest()
+
+    def decorator(view):
+        conditional_view = condition(etag_func=_etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _is_conditional(request):
+                return view(request, *args, **kwargs)
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                # revalidate on every visit instead of heuristic caching
+                patch_cache_control(response, private=True, max_age=0)
+            return response
+        return wrapper
+    return decorator
@@ -2,10 +2,11 @@
 from urllib.parse import quote
 
 from django.conf import settings
+from django.db.models import Q, Count
 from django.utils.safestring import mark_safe
 from django.utils.html import conditional_escape as esc
 
-from apps.gcd.models import Issue
+from apps.gcd.models import Issue, Cover
 from apps.gcd.models.cover import ZOOM_SMALL, ZOOM_MEDIUM, ZOOM_LARGE
 from apps.oi import states
 
@@ -67,38 +68,84 @@ def get_image_tag(cover, alt_text, zoom_level, can_have_cover=True):
            '" ' + ' class="' + img_class + '"/>')
 
 
-def get_image_tags_per_issue(issue, alt_text, zoom_level, as_list=False,
-                             variants=False, exclude_ids=None):
-    if issue.has_covers() or (variants and issue.variant_covers().count()):
-        covers = issue.active_covers()
-        if variants:
-            covers = covers | issue.variant_covers()
+def get_issue_covers(issue, variants=False):
+    """
+    Returns the list of active covers of the issue using one query.
+
+    With variants=True the covers of the variants of the issue, or of its
+    base issue and the other variants, are included, as with
+    issue.active_covers() | issue.variant_covers().
+    """
+    base_issue = issue.variant_of if issue.variant_of_id else issue
+    if variants:
+        covers = Cover.objects.filter(Q(issue=base_issue) |
+                                      Q(issue__variant_of=base_issue,
+                                        issue__deleted=False))
     else:
+        covers = Cover.objects.filter(issue=issue)
+    covers = covers.filter(deleted=False).select_related('issue__series')
+    # only the covers of the issue itself and of its base issue are
+    # subject to can_have_cover
+    return [cover for cover in covers
+            if cover.issue_id not in (issue.id, base_issue.id) or
+            cover.issue.can_have_cover()]
+
+
+def get_pending_cover_counts(covers):
+    """
+    Returns a dictionary of the number of active revisions per cover id,
+    using one query for all covers.
+    """
+    return dict(Cover.objects.filter(
+                  id__in=[cover.id for cover in covers],
+                  revisions__changeset__state__in=states.ACTIVE)
+                .order_by().values_list('id').annotate(Count('revisions')))
+
+
+def get_cover_tags(covers, alt_text, zoom_level, issue=None):
+    """
+    Returns a list of [cover, issue, tag, pending revision count] entries.
+
+    The covers can be of different issues, which are then taken from the
+    covers, unless the issue to link to is given.  The number of queries
+    does not depend on the number of covers.
+    """
+    pending_counts = get_pending_cover_counts(covers)
+    cover_tags = []
+    for cover in covers:
+        cover_tags.append([cover, issue if issue else cover.issue,
+                           get_image_tag(cover, alt_text, zoom_level),
+                           pending_counts.get(cover.id, 0)])
+    return cover_tags
+
+
+def get_image_tags_per_issue(issue, alt_text, zoom_level, as_list=False,
+                             variants=False, exclude_ids=None, covers=None):
+    """
+    Produces the cover tags for an issue, as one string or as a list in
+    the format of get_cover_tags.
+
+    The covers can be passed in if they were already fetched with
+    get_issue_covers.
+    """
+    if covers is None:
+        covers = get_issue_covers(issue, variants=variants)
+    if not covers:
         return mark_safe(get_image_tag(cover=None, zoom_level=zoom_level,
                     alt_text=alt_text,
                     can_have_cover=issue.can_have_cover()))
 
     if exclude_ids:
-        covers = covers.exclude(id__in=exclude_ids)
+        covers = [cover for cover in covers if cover.id not in exclude_ids]
     if as_list:
-        cover_tags = []
-        alt_string = 'Cover for %s' % issue.full_name()
-    else:
-        tag = ''
+        return get_cover_tags(covers, 'Cover for %s' % issue.full_name(),
+                              zoom_level, issue=issue)
 
+    tag = ''
     for cover in covers:
-        if as_list:
-            active = cover.revisions.filter(changeset__state__in=states.ACTIVE)
-            cover_tags.append([cover, issue,
-                               get_image_tag(cover, alt_string, zoom_level),
-                               active.count()])
-        else:
-            tag += get_image_tag(cover=cover, zoom_level=zoom_level,
-                                 alt_text=alt_text)
-    if as_list:
-        return cover_tags
-    else:
-        return mark_safe(tag)
+        tag += get_image_tag(cover=cover, zoom_level=zoom_level,
+                             alt_text=alt_text)
+    return mark_safe(tag)
 
 
 def get_image_tags_per_page(page, series=None):
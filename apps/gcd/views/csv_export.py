@@ -0,0 +1,138 @@
+"""
+Streaming CSV export of search results.
+
+The rows are read in chunks seeking on the ordering of the results, as in
+keyset pagination, so neither the database driver nor the worker holds
+the whole result set, and the response is streamed while reading.  For
+stories and issues the credits of each chunk are fetched with one query
+and added as columns.
+"""
+
+import csv
+import zlib
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from djqscsv import generate_filename
+
+from apps.gcd.models import Story, StoryCredit, Issue, IssueCredit, \
+                            CREDIT_TYPES
+from apps.gcd.views.keyset_pagination import keyset_chunks
+
+# rows read per query
+EXPORT_CHUNK_SIZE = 2000
+
+# model of the credits and the field referring to the exported object
+CREDIT_MODELS = {
+  Story: (StoryCredit, 'story_id'),
+  Issue: (IssueCredit, 'issue_id'),
+}
+
+
+class Echo(object):
+    """
+    File-like object for the csv writer, returning what is written.
+    """
+    def write(self, value):
+        return value
+
+
+def export_fields(model):
+    """
+    Returns the names of the exported fields, the concrete fields without
+    the bookkeeping ones, with foreign keys exported as ids.
+    """
+    fields = [field.name for field in model._meta.concrete_fields
+              if field.name not in {'id', 'created', 'modified', 'deleted'}]
+    return ['id'] + fields
+
+
+def credit_columns(model):
+    if model not in CREDIT_MODELS:
+        return []
+    return ['%s credits' % name for name in sorted(CREDIT_TYPES,
+                                                   key=CREDIT_TYPES.get)]
+
+
+def _chunk_credits(model, object_ids):
+    """
+    Returns the credit texts of the objects per (object id, credit type id).
+    """
+    credit_class, object_field = CREDIT_MODELS[model]
+    credits = defaultdict(list)
+    for credit in credit_class.objects.filter(
+      deleted=False, **{'%s__in' % object_field: object_ids})\
+                                      .select_related('creator__creator',
+                                                      'creator__type')\
+                                      .order_by('id'):
+        credits[(getattr(credit, object_field), credit.credit_type_id)]\
+          .append(credit.creator.display_credit(credit, url=False))
+    return credits
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    return str(value)
+
+
+def csv_rows(queryset, max_rows=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the lines of the CSV export of the queryset, at most max_rows
+    rows after the header.
+    """
+    model = queryset.model
+    fields = export_fields(model)
+    credit_fields = credit_columns(model)
+    writer = csv.writer(Echo())
+    # the BOM lets Excel recognize the encoding
+    yield '\ufeff' + writer.writerow(
+      [str(model._meta.get_field(field).verbose_name) for field in fields] +
+      credit_fields)
+
+    count = 0
+    for rows in keyset_chunks(queryset, fields, chunk_size):
+        if max_rows is not None:
+            rows = rows[:max_rows - count]
+        if credit_fields:
+            credits = _chunk_credits(model, [row['id'] for row in rows])
+        lines = []
+        for row in rows:
+            line = [_csv_value(row[field]) for field in fields]
+            if credit_fields:
+                line.extend('; '.join(credits[(row['id'], credit_type_id)])
+                            for credit_type_id in sorted(
+                              CREDIT_TYPES.values()))
+            lines.append(writer.writerow(line))
+        yield ''.join(lines)
+        count += len(rows)
+        if max_rows is not None and count >= max_rows:
+            return
+
+
+def _gzipped(lines):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for line in lines:
+        data = compressor.compress(line.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def csv_export_response(queryset, gzipped=False):
+    """
+    Returns a streaming response with the CSV export of the queryset, of
+    at most CSV_EXPORT_MAX_ROWS rows, gzipped if wanted.
+    """
+    filename = generate_filename(queryset, append_datestamp=True)
+    lines = csv_rows(queryset, max_rows=settings.CSV_EXPORT_MAX_ROWS)
+    if gzipped:
+        response = StreamingHttpResponse(_gzipped(lines),
+                                         content_type='application/gzip')
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename=%s;' % filename
+    response['Cache-Control'] = 'no-cache'
+    return response
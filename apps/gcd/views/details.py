@@ -8,18 +8,23 @@ from datetime import date, datetime, time, timedelta
 from calendar import monthrange
 from operator import attrgetter
 from random import randint
+from copy import copy
 
-from django.db.models import F, Q, Min, Count
+from django.db.models import F, Q, Min, Count, Sum
 from django.conf import settings
+from django.core.cache import cache
 import django.urls as urlresolvers
 from django.shortcuts import get_object_or_404, \
                              render
 from django.http import HttpResponseRedirect, Http404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
 
 from django_tables2 import RequestConfig
 from django_tables2.paginators import LazyPaginator
+from django_tables2.rows import BoundRows
 from django_tables2.export.export import TableExport
 
 from apps.indexer.views import ViewTerminationError
@@ -29,6 +34,7 @@ from apps.stats.models import CountStats
 
 from apps.gcd.models import Publisher, Series, Issue, StoryType, Image,\
                             IndiciaPublisher, Brand, BrandGroup, Cover,\
+                            CoverGalleryEntry, \
                             SeriesBond, Award, Creator, CreatorMembership,\
                             ReceivedAward, CreatorDegree, CreatorArtInfluence,\
                             CreatorRelation, CreatorSchool, CreatorNameDetail,\
@@ -36,18 +42,24 @@ from apps.gcd.models import Publisher, Series, Issue, StoryType, Image,\
                             Feature, FeatureLogo, FeatureRelation, \
                             Printer, IndiciaPrinter, School, Story, \
                             Character, Group, \
-                            CharacterRelation, GroupRelation, GroupMembership
+                            CharacterRelation, GroupRelation, GroupMembership,\
+                            CreatorCreditSummary
 from apps.gcd.models.creator import FeatureCreatorTable, SeriesCreatorTable
 from apps.gcd.models.issue import IssueTable, BrandGroupIssueTable,\
                                   BrandEmblemIssueTable,\
                                   IndiciaPublisherIssueTable,\
                                   IssuePublisherTable, PublisherIssueTable
 from apps.gcd.models.series import SeriesTable, CreatorSeriesTable
-from apps.gcd.models.story import CORE_TYPES, AD_TYPES, StoryTable
+from apps.gcd.models.story import CORE_TYPES, AD_TYPES, CREDIT_TYPES, \
+                                  StoryTable
+from apps.gcd.display_cache import issue_body_key
 from apps.gcd.views import paginate_response, ORDER_ALPHA, ORDER_CHRONO,\
                            ResponsePaginator
+from apps.gcd.views.conditional import conditional_display
+from apps.gcd.views.keyset_pagination import get_keyset_ordering
 from apps.gcd.views.covers import get_image_tag, get_generic_image_tag, \
                                   get_image_tags_per_issue, \
+                                  get_issue_covers, \
                                   get_image_tags_per_page
 from apps.gcd.models.cover import CoverIssuePublisherTable, \
                                   ZOOM_SMALL, ZOOM_MEDIUM, ZOOM_LARGE
@@ -118,15 +130,34 @@ def get_gcd_object(model, object_id, model_name=None):
     return object
 
 
-def generic_sortable_list(request, items, table, template, context):
-    paginator = ResponsePaginator(items, per_page=100, vars=context)
-    page_number = paginator.paginate(request).number
-
+def generic_sortable_list(request, items, table, template, context,
+                          keyset=False):
     if 'sort' in request.GET:
         extra_string = 'sort=%s' % (request.GET['sort'])
     else:
         extra_string = ''
 
+    if keyset and 'page' not in request.GET:
+        # seek on the ordering the table applies for the requested sorting
+        RequestConfig(request, paginate=False).configure(table)
+        if get_keyset_ordering(table.data.data):
+            export_format = request.GET.get("_export", None)
+            if TableExport.is_valid_format(export_format):
+                exporter = TableExport(export_format, table)
+                return exporter.response("table.{}".format(export_format))
+
+            paginator = ResponsePaginator(table.data.data, per_page=100,
+                                          vars=context, keyset=True)
+            page = paginator.paginate(request)
+            table.page = copy(page)
+            table.page.object_list = BoundRows(page.object_list, table)
+            context['table'] = table
+            context['extra_string'] = extra_string
+            return render(request, template, context)
+
+    paginator = ResponsePaginator(items, per_page=100, vars=context)
+    page_number = paginator.paginate(request).number
+
     RequestConfig(request, paginate={"paginator_class": LazyPaginator,
                                      'per_page': 100,
                                      'page': page_number}).configure(table)
@@ -204,6 +235,12 @@ def _handle_date_picker(request, url_reverse,
         return (year, month), True
 
 
+@conditional_display(Creator, 'creator_id',
+                     children=('creator_names', 'signatures', 'school_set',
+                               'degree_set', 'art_influences',
+                               'membership_set', 'non_comic_work_set',
+                               'from_related_creator',
+                               'to_related_creator'))
 def creator(request, creator_id):
     creator = get_gcd_object(Creator, creator_id)
     return show_creator(request, creator)
@@ -269,7 +306,8 @@ def creator_sequences(request, creator_id, series_id=None,
     table = StoryTable(stories, attrs={'class': 'sortable_listing'},
                        template_name='gcd/bits/sortable_table.html',
                        order_by=('issue'))
-    return generic_sortable_list(request, stories, table, template, context)
+    return generic_sortable_list(request, stories, table, template, context,
+                                 keyset=True)
 
 
 def creator_issues(request, creator_id, series_id,
@@ -278,22 +316,25 @@ def creator_issues(request, creator_id, series_id,
                            country=country, language=language)
 
 
-def creator_series(request, creator_id, country=None, language=None):
-    creator = get_gcd_object(Creator, creator_id)
-    names = creator.creator_names.filter(deleted=False)
+def _credit_summary_annotations(count_name):
+    """
+    Returns the annotations for the columns of the credit lists from the
+    CreatorCreditSummary rows the queryset is filtered on.
+    """
+    all_credits = Q(credit_summaries__credit_type=None)
+    annotations = {
+      count_name: Sum('credit_summaries__issue_count', filter=all_credits),
+      'first_credit': Min('credit_summaries__first_key_date',
+                          filter=all_credits),
+    }
+    for credit_type in ['script', 'pencils', 'inks', 'colors', 'letters']:
+        annotations[credit_type] = Sum(
+          'credit_summaries__issue_count',
+          filter=Q(credit_summaries__credit_type__id=CREDIT_TYPES[credit_type]))
+    return annotations
 
-    series = Series.objects.filter(
-      issue__story__credits__creator__in=names,
-      issue__story__type__id__in=CORE_TYPES,
-      issue__story__credits__deleted=False,
-      issue__story__credits__credit_type__id__lt=6).distinct()
-    if country:
-        country = get_object_or_404(Country, code=country)
-        series = series.filter(country=country)
-    if language:
-        language = get_object_or_404(Language, code=language)
-        series = series.filter(language=language)
 
+def _annotate_creator_series(series):
     series = series.annotate(issue_credits_count=Count('issue', distinct=True))
     series = series.annotate(first_credit=Min('issue__key_date'))
     script = Count('issue',
@@ -311,13 +352,63 @@ def creator_series(request, creator_id, country=None, language=None):
     letters = Count('issue',
                     filter=Q(issue__story__credits__credit_type__id=5),
                     distinct=True)
-    series = series.annotate(
+    return series.annotate(
+      script=script,
+      pencils=pencils,
+      inks=inks,
+      colors=colors,
+      letters=letters)
+
+
+def _annotate_creator_names(creators):
+    creators = creators.annotate(
+      first_credit=Min('storycredit__story__issue__key_date'))
+    script = Count('storycredit__story__issue',
+                   filter=Q(storycredit__credit_type__id=1), distinct=True)
+    pencils = Count('storycredit__story__issue',
+                    filter=Q(storycredit__credit_type__id=2), distinct=True)
+    inks = Count('storycredit__story__issue',
+                 filter=Q(storycredit__credit_type__id=3), distinct=True)
+    colors = Count('storycredit__story__issue',
+                   filter=Q(storycredit__credit_type__id=4), distinct=True)
+    letters = Count('storycredit__story__issue',
+                    filter=Q(storycredit__credit_type__id=5), distinct=True)
+    return creators.annotate(
+      credits_count=Count('storycredit__story__issue', distinct=True),
       script=script,
       pencils=pencils,
       inks=inks,
       colors=colors,
       letters=letters)
 
+
+def creator_series(request, creator_id, country=None, language=None):
+    creator = get_gcd_object(Creator, creator_id)
+
+    # before the summaries are built, aggregate the credits
+    use_summaries = CreatorCreditSummary.objects.is_built()
+    if use_summaries:
+        series = Series.objects.filter(credit_summaries__creator=creator)
+    else:
+        names = creator.creator_names.filter(deleted=False)
+        series = Series.objects.filter(
+          issue__story__credits__creator__in=names,
+          issue__story__type__id__in=CORE_TYPES,
+          issue__story__credits__deleted=False,
+          issue__story__credits__credit_type__id__lt=6).distinct()
+    if country:
+        country = get_object_or_404(Country, code=country)
+        series = series.filter(country=country)
+    if language:
+        language = get_object_or_404(Language, code=language)
+        series = series.filter(language=language)
+
+    if use_summaries:
+        series = series.annotate(
+          **_credit_summary_annotations('issue_credits_count'))
+    else:
+        series = _annotate_creator_series(series)
+
     context = {
         'result_disclaimer': ISSUE_CHECKLIST_DISCLAIMER + MIGRATE_DISCLAIMER,
         'item_name': 'series',
@@ -366,7 +457,8 @@ def checklist_by_id(request, creator_id, series_id=None,
     table = IssuePublisherTable(issues, attrs={'class': 'sortable_listing'},
                                 template_name='gcd/bits/sortable_table.html',
                                 order_by=('publication_date'))
-    return generic_sortable_list(request, issues, table, template, context)
+    return generic_sortable_list(request, issues, table, template, context,
+                                 keyset=True)
 
 
 def cover_checklist_by_id(request, creator_id, series_id=None,
@@ -607,6 +699,7 @@ def show_creator_signature(request, creator_signature, preview=False):
     return render(request, 'gcd/details/creator_signature.html', vars)
 
 
+@conditional_display(Award, 'award_id', children=('receivedaward',))
 def award(request, award_id):
     """
     Display the details page for an Award.
@@ -650,6 +743,9 @@ def show_school(request, school, preview=False):
                              vars)
 
 
+@conditional_display(Publisher, 'publisher_id',
+                     children=('indiciapublisher', 'brandgroup', 'branduse',
+                               'series'))
 def publisher(request, publisher_id):
     """
     Display the details page for a Publisher.
@@ -710,7 +806,8 @@ def show_publisher_issues(request, publisher_id):
       issues, attrs={'class': 'sortable_listing'},
       template_name='gcd/bits/sortable_table.html', order_by=('issues'))
     return generic_sortable_list(request, issues, table,
-                                 'gcd/bits/generic_list.html', context)
+                                 'gcd/bits/generic_list.html', context,
+                                 keyset=True)
 
 
 def show_publisher_current_series(request, publisher_id):
@@ -810,6 +907,8 @@ def publisher_monthly_covers(request,
       callback_key='tags', callback=get_image_tags_per_page)
 
 
+@conditional_display(IndiciaPublisher, 'indicia_publisher_id',
+                     related=('parent',), children=('issue',))
 def indicia_publisher(request, indicia_publisher_id):
     """
     Display the details page for an Indicia Publisher.
@@ -833,6 +932,7 @@ def show_indicia_publisher(request, indicia_publisher, preview=False):
                                  'gcd/details/indicia_publisher.html', context)
 
 
+@conditional_display(BrandGroup, 'brand_group_id', related=('parent',))
 def brand_group(request, brand_group_id):
     """
     Display the details page for a BrandGroup.
@@ -861,6 +961,7 @@ def show_brand_group(request, brand_group, preview=False):
                                  'gcd/details/brand_group.html', context)
 
 
+@conditional_display(Brand, 'brand_id', children=('in_use', 'issue'))
 def brand(request, brand_id):
     """
     Display the details page for a Brand.
@@ -991,6 +1092,7 @@ def indicia_publishers(request, publisher_id):
       })
 
 
+@conditional_display(Printer, 'printer_id', children=('indiciaprinter',))
 def printer(request, printer_id):
     """
     Display the details page for a Printer.
@@ -1034,6 +1136,8 @@ def printer_issues(request, printer_id):
     return generic_sortable_list(request, issues, table, template, context)
 
 
+@conditional_display(IndiciaPrinter, 'indicia_printer_id',
+                     related=('parent',))
 def indicia_printer(request, indicia_printer_id):
     """
     Display the details page for an Indicia Printer.
@@ -1068,6 +1172,8 @@ def indicia_printer_issues(request, indicia_printer_id):
     return generic_sortable_list(request, issues, table, template, context)
 
 
+@conditional_display(Series, 'series_id', related=('publisher',),
+                     children=('issue',))
 def series(request, series_id):
     """
     Display the details page for a series.
@@ -1229,31 +1335,17 @@ def series_details(request, series_id, by_date=False):
 def series_creatorlist(request, series_id):
     series = get_gcd_object(Series, series_id)
 
-    creators = CreatorNameDetail.objects.all()
-    creators = creators.filter(storycredit__story__issue__series=series,
-                               storycredit__story__type__id__in=CORE_TYPES,
-                               storycredit__deleted=False).distinct()\
-                       .select_related('creator')
-
-    creators = creators.annotate(
-      first_credit=Min('storycredit__story__issue__key_date'))
-    script = Count('storycredit__story__issue',
-                   filter=Q(storycredit__credit_type__id=1), distinct=True)
-    pencils = Count('storycredit__story__issue',
-                    filter=Q(storycredit__credit_type__id=2), distinct=True)
-    inks = Count('storycredit__story__issue',
-                 filter=Q(storycredit__credit_type__id=3), distinct=True)
-    colors = Count('storycredit__story__issue',
-                   filter=Q(storycredit__credit_type__id=4), distinct=True)
-    letters = Count('storycredit__story__issue',
-                    filter=Q(storycredit__credit_type__id=5), distinct=True)
-    creators = creators.annotate(
-      credits_count=Count('storycredit__story__issue', distinct=True),
-      script=script,
-      pencils=pencils,
-      inks=inks,
-      colors=colors,
-      letters=letters)
+    if CreatorCreditSummary.objects.is_built():
+        creators = CreatorNameDetail.objects.filter(
+          credit_summaries__series=series).select_related('creator')\
+          .annotate(**_credit_summary_annotations('credits_count'))
+    else:
+        creators = CreatorNameDetail.objects.all()
+        creators = creators.filter(storycredit__story__issue__series=series,
+                                   storycredit__story__type__id__in=CORE_TYPES,
+                                   storycredit__deleted=False).distinct()\
+                           .select_related('creator')
+        creators = _annotate_creator_names(creators)
 
     context = {
         'result_disclaimer': ISSUE_CHECKLIST_DISCLAIMER + MIGRATE_DISCLAIMER,
@@ -1439,17 +1531,29 @@ def _get_scan_table(series, show_cover=True):
                         alt_text='First Issue Cover',
                         can_have_cover=series.is_comics_publication), None
     # all a series' covers + all issues with no covers
-    covers = Cover.objects.filter(issue__series=series, deleted=False) \
-                          .select_related()
-    issues = series.issues_without_covers()
-
-    list_covers = list(covers)
-    scans = list(issues)
-    scans.extend(list_covers)
-    scans.sort(key=attrgetter('sort_code'))
+    entries = series.cover_gallery_entries.select_related('issue__series',
+                                                          'cover')
+    if entries:
+        scans = []
+        covers = []
+        for entry in entries:
+            if entry.cover_id:
+                entry.cover.issue = entry.issue
+                scans.append(entry.cover)
+                covers.append(entry.cover)
+            else:
+                scans.append(entry.issue)
+    else:
+        # gallery entries of the series are not built yet
+        covers = list(Cover.objects.filter(issue__series=series,
+                                           deleted=False)
+                                   .select_related())
+        scans = list(series.issues_without_covers())
+        scans.extend(covers)
+        scans.sort(key=attrgetter('sort_code'))
 
     if covers and show_cover:
-        selected_cover = covers[randint(0, covers.count()-1)]
+        selected_cover = covers[randint(0, len(covers)-1)]
         image_tag = get_image_tag(cover=selected_cover,
                                   zoom_level=ZOOM_MEDIUM,
                                   alt_text='Random Cover from Series')
@@ -1461,6 +1565,21 @@ def _get_scan_table(series, show_cover=True):
     return scans, image_tag, issue
 
 
+def _get_cover_page(issue):
+    """
+    Page of the series cover gallery showing the cover of the issue.
+    """
+    covers_before = CoverGalleryEntry.objects.filter(issue=issue)\
+                                     .values_list('cover_position', flat=True)\
+                                     .first()
+    if covers_before is None:
+        covers_before = Cover.objects.filter(
+                          issue__series=issue.series,
+                          issue__sort_code__lt=issue.sort_code,
+                          deleted=False).count()
+    return covers_before // COVERS_PER_GALLERY_PAGE + 1
+
+
 def scans(request, series_id):
     """
     Display the cover scan status matrix for a series.
@@ -1921,6 +2040,8 @@ def int_stats(request, object_type, choices):
       })
 
 
+@conditional_display(Feature, 'feature_id',
+                     children=('from_related_feature', 'to_related_feature'))
 def feature(request, feature_id):
     """
     Display the details page for a Feature.
@@ -1962,7 +2083,8 @@ def feature_sequences(request, feature_id, country=None):
     table = StoryTable(stories, attrs={'class': 'sortable_listing'},
                        template_name='gcd/bits/sortable_table.html',
                        order_by=('issue'))
-    return generic_sortable_list(request, stories, table, template, context)
+    return generic_sortable_list(request, stories, table, template, context,
+                                 keyset=True)
 
 
 def feature_issuelist_by_id(request, feature_id):
@@ -1996,38 +2118,27 @@ def feature_issuelist_by_id(request, feature_id):
 def feature_creatorlist(request, feature_id):
     feature = get_gcd_object(Feature, feature_id)
 
-    creators = CreatorNameDetail.objects.all()
     if feature.feature_type.id == 1:
-        creators = creators.filter(
-          storycredit__story__feature_object__id=feature_id,
-          storycredit__story__type__id__in=CORE_TYPES,
-          storycredit__deleted=False).distinct().select_related('creator')
         result_disclaimer = ISSUE_CHECKLIST_DISCLAIMER + MIGRATE_DISCLAIMER
     else:
-        creators = creators.filter(
-          storycredit__story__feature_object__id=feature_id,
-          storycredit__deleted=False).distinct().select_related('creator')
         result_disclaimer = MIGRATE_DISCLAIMER
 
-    creators = creators.annotate(
-      first_credit=Min('storycredit__story__issue__key_date'))
-    script = Count('storycredit__story__issue',
-                   filter=Q(storycredit__credit_type__id=1), distinct=True)
-    pencils = Count('storycredit__story__issue',
-                    filter=Q(storycredit__credit_type__id=2), distinct=True)
-    inks = Count('storycredit__story__issue',
-                 filter=Q(storycredit__credit_type__id=3), distinct=True)
-    colors = Count('storycredit__story__issue',
-                   filter=Q(storycredit__credit_type__id=4), distinct=True)
-    letters = Count('storycredit__story__issue',
-                    filter=Q(storycredit__credit_type__id=5), distinct=True)
-    creators = creators.annotate(
-      credits_count=Count('storycredit__story__issue', distinct=True),
-      script=script,
-      pencils=pencils,
-      inks=inks,
-      colors=colors,
-      letters=letters)
+    if CreatorCreditSummary.objects.is_built():
+        creators = CreatorNameDetail.objects.filter(
+          credit_summaries__feature=feature).select_related('creator')\
+          .annotate(**_credit_summary_annotations('credits_count'))
+    else:
+        creators = CreatorNameDetail.objects.all()
+        if feature.feature_type.id == 1:
+            creators = creators.filter(
+              storycredit__story__feature_object__id=feature_id,
+              storycredit__story__type__id__in=CORE_TYPES,
+              storycredit__deleted=False).distinct().select_related('creator')
+        else:
+            creators = creators.filter(
+              storycredit__story__feature_object__id=feature_id,
+              storycredit__deleted=False).distinct().select_related('creator')
+        creators = _annotate_creator_names(creators)
 
     context = {
         'result_disclaimer': result_disclaimer,
@@ -2073,6 +2184,9 @@ def show_feature_relation(request, feature_relation, preview=False):
     return render(request, 'gcd/details/feature_relation.html', vars)
 
 
+@conditional_display(Character, 'character_id',
+                     children=('character_names', 'from_related_character',
+                               'to_related_character', 'memberships'))
 def character(request, character_id):
     """
     Display the details page for a Character.
@@ -2102,6 +2216,9 @@ def show_character_relation(request, character_relation, preview=False):
     return render(request, 'gcd/details/character_relation.html', vars)
 
 
+@conditional_display(Group, 'group_id',
+                     children=('from_related_group', 'to_related_group',
+                               'members'))
 def group(request, group_id):
     """
     Display the details page for a Group.
@@ -2168,10 +2285,7 @@ def cover(request, issue_id, size):
                                          size, variants=True, as_list=True)
     extra = 'cover/%d/' % size  # TODO: remove abstraction-breaking hack.
 
-    covers = Cover.objects.filter(issue__series=issue.series,
-                                  issue__sort_code__lt=issue.sort_code,
-                                  deleted=False)
-    cover_page = covers.count()/COVERS_PER_GALLERY_PAGE + 1
+    cover_page = _get_cover_page(issue)
 
     return render(
       request, 'gcd/details/cover.html',
@@ -2277,6 +2391,11 @@ def issue_form(request):
         raise Http404
 
 
+@conditional_display(Issue, 'issue_id',
+                     related=('series', 'indicia_publisher', 'brand',
+                              'variant_of'),
+                     children=('story', 'credits', 'variant_set', 'cover',
+                               'code_number', 'variant_of__story'))
 def issue(request, issue_id):
     """
     Display the issue details page, including story details.
@@ -2312,6 +2431,24 @@ def show_issue(request, issue, preview=False):
         issue_detail = request.user.indexer.issue_detail
     else:
         issue_detail = 1
+
+    # The rendered body for anonymous users only depends on the issue data
+    # and the detail level, and is cached until an approved change bumps
+    # the display version of the issue or its series.
+    use_cache = not preview and not request.user.is_authenticated
+    if use_cache:
+        body_key = issue_body_key(issue, issue_detail)
+        issue_body = cache.get(body_key)
+        if issue_body is not None:
+            return render(
+              request, 'gcd/details/issue.html',
+              {'issue': issue,
+               'issue_body': mark_safe(issue_body),
+               'error_subject': '%s' % issue,
+               'RANDOM_IMAGE': _publisher_image_content(
+                                 issue.series.publisher_id)
+               })
+
     if issue_detail == 0:
         not_shown_types = StoryType.objects.exclude(id__in=CORE_TYPES)\
                             .values_list('id', flat=True)
@@ -2319,9 +2456,12 @@ def show_issue(request, issue, preview=False):
         not_shown_types = AD_TYPES
     else:
         not_shown_types = []
-    image_tag = get_image_tags_per_issue(issue=issue,
-                                         zoom_level=zoom_level,
-                                         alt_text=alt_text)
+    # fetch the covers of the issue and of its variants in one go
+    covers = get_issue_covers(issue, variants=True)
+    image_tag = get_image_tags_per_issue(
+                  issue=issue, zoom_level=zoom_level, alt_text=alt_text,
+                  covers=[cover for cover in covers
+                          if cover.issue_id == issue.id])
     images_count = Image.objects.filter(
       object_id=issue.id, deleted=False,
       content_type=ContentType.objects.get_for_model(issue)).count()
@@ -2329,13 +2469,12 @@ def show_issue(request, issue, preview=False):
     if preview:
         cover_page = 0
     else:
-        covers = Cover.objects.filter(issue__series=issue.series,
-                                      issue__sort_code__lt=issue.sort_code,
-                                      deleted=False)
-        cover_page = covers.count()/COVERS_PER_GALLERY_PAGE + 1
+        cover_page = _get_cover_page(issue)
 
     variant_image_tags = []
-    for variant_cover in issue.variant_covers():
+    for variant_cover in covers:
+        if variant_cover.issue_id == issue.id:
+            continue
         variant_image_tags.append(
           [variant_cover.issue,
            get_image_tag(variant_cover, zoom_level=ZOOM_SMALL,
@@ -2375,25 +2514,31 @@ def show_issue(request, issue, preview=False):
         country = None
         language = None
 
-    return render(
-      request, 'gcd/details/issue.html',
-      {'issue': issue,
-       'prev_issue': prev_issue,
-       'next_issue': next_issue,
-       'cover_story': cover_story,
-       'stories': stories,
-       'oi_indexers': oi_indexers,
-       'image_tag': image_tag,
-       'variant_image_tags': variant_image_tags,
-       'images_count': images_count,
-       'cover_page': cover_page,
-       'country': country,
-       'language': language,
-       'error_subject': '%s' % issue,
-       'preview': preview,
-       'not_shown_types': not_shown_types,
-       'RANDOM_IMAGE': _publisher_image_content(issue.series.publisher_id)
-       })
+    context = {'issue': issue,
+               'prev_issue': prev_issue,
+               'next_issue': next_issue,
+               'cover_story': cover_story,
+               'stories': stories,
+               'oi_indexers': oi_indexers,
+               'image_tag': image_tag,
+               'variant_image_tags': variant_image_tags,
+               'images_count': images_count,
+               'cover_page': cover_page,
+               'country': country,
+               'language': language,
+               'error_subject': '%s' % issue,
+               'preview': preview,
+               'not_shown_types': not_shown_types,
+               'RANDOM_IMAGE': _publisher_image_content(
+                                 issue.series.publisher_id)
+               }
+    if use_cache:
+        issue_body = render_to_string('gcd/details/issue_body.html',
+                                      context, request)
+        cache.set(body_key, issue_body, settings.ISSUE_BODY_CACHE_TIMEOUT)
+        context['issue_body'] = mark_safe(issue_body)
+
+    return render(request, 'gcd/details/issue.html', context)
 
 
 def daily_creators(request, offset=0):
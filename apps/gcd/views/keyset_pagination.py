@@ -0,0 +1,283 @@
+"""
+Keyset (also called seek) pagination for long listings.
+
+Paginating with OFFSET makes the database read and skip all rows of the
+earlier pages, so deep pages of large listings get slower and slower.
+Keyset pagination instead remembers the values of the ordering columns
+of the last row of a page and fetches the next page with a WHERE clause
+on these values, which costs the same for every page.
+
+The ordering values are passed between requests as an opaque cursor in
+the 'after' or 'before' request parameter.  As there are no page numbers,
+the total count is only needed for display and is cached.
+"""
+
+import base64
+import hashlib
+import json
+from functools import reduce
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, FieldError
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+
+def get_keyset_ordering(queryset):
+    """
+    Returns the ordering of the queryset as a list of
+    (field path, descending, nullable) tuples, with the primary key
+    appended as tie-breaker if needed.
+
+    Returns None if the queryset cannot be keyset-paginated, e.g. if it is
+    ordered by an expression or by a relation using the default ordering
+    of the related model.
+    """
+    if not hasattr(queryset, 'query'):
+        return None
+    query = queryset.query
+    if query.order_by:
+        order_by = list(query.order_by)
+    elif query.default_ordering:
+        order_by = list(query.get_meta().ordering)
+    else:
+        order_by = []
+
+    ordering = []
+    for name in order_by:
+        if not isinstance(name, str) or name == '?':
+            return None
+        descending = name.startswith('-')
+        path = name.lstrip('-')
+        if path in query.annotations:
+            try:
+                nullable = query.annotations[path].output_field.null
+            except (AttributeError, FieldError):
+                nullable = True
+            ordering.append((path, descending, nullable))
+            continue
+        opts = query.get_meta()
+        parts = path.split('__')
+        for index, part in enumerate(parts):
+            try:
+                field = opts.pk if part == 'pk' else opts.get_field(part)
+            except FieldDoesNotExist:
+                return None
+            if field.is_relation:
+                if index == len(parts) - 1:
+                    return None
+                opts = field.related_model._meta
+        ordering.append((path, descending, field.null))
+
+    if not [o for o in ordering if o[0] in ('pk', 'id')]:
+        ordering.append(('pk', False, False))
+    return ordering
+
+
+def cached_count(queryset, timeout=None):
+    """
+    Returns the count of the queryset, cached for the given timeout.
+
+    The count of a long listing changes slowly, while computing it needs
+    a full scan, so a slightly outdated count is good enough for display.
+    """
+    if timeout is None:
+        timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    try:
+        sql = str(queryset.query)
+    except Exception:
+        # e.g. EmptyResultSet, where count() does not hit the database
+        return queryset.count()
+    key = 'pagination_count_%s' % \
+          hashlib.md5(sql.encode('utf-8')).hexdigest()
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def _seek_filter(ordering, values, backwards):
+    """
+    Builds the filter selecting the rows after (or, going backwards, before)
+    the row with the given ordering values.
+
+    For ordering (a, b, pk) moving forward this is
+      a > x OR (a = x AND b > y) OR (a = x AND b = y AND pk > z)
+    with the comparisons flipped for descending columns.  NULLs sort
+    first in ascending order, as in MySQL.
+    """
+    terms = []
+    equal = Q()
+    for (path, descending, nullable), value in zip(ordering, values):
+        if descending == backwards:
+            if value is None:
+                beyond = Q(**{'%s__isnull' % path: False})
+            else:
+                beyond = Q(**{'%s__gt' % path: value})
+        else:
+            if value is None:
+                # nothing sorts before NULL
+                beyond = None
+            else:
+                beyond = Q(**{'%s__lt' % path: value})
+                if nullable:
+                    beyond |= Q(**{'%s__isnull' % path: True})
+        if beyond is not None:
+            terms.append(equal & beyond)
+        if value is None:
+            equal &= Q(**{'%s__isnull' % path: True})
+        else:
+            equal &= Q(**{path: value})
+    if not terms:
+        return Q(pk__in=[])
+    return reduce(lambda x, y: x | y, terms)
+
+
+def _order_by(ordering, backwards=False):
+    return ['%s%s' % ('-' if descending != backwards else '', path)
+            for path, descending, nullable in ordering]
+
+
+def keyset_chunks(queryset, fields, chunk_size):
+    """
+    Yields the values of the fields for the rows of the queryset, in lists
+    of up to chunk_size rows, in the ordering of the queryset.  Querysets
+    whose ordering can't be sought on are read ordered by the primary key.
+    """
+    ordering = get_keyset_ordering(queryset) or [('pk', False, False)]
+    keys = ['keyset_%d' % index for index in range(len(ordering))]
+    queryset = queryset.annotate(
+      **dict((key, F(path)) for key, (path, descending, nullable)
+             in zip(keys, ordering)))\
+                       .order_by(*_order_by(ordering))\
+                       .values(*(fields + keys))
+    chunk = queryset
+    while True:
+        rows = list(chunk[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        chunk = queryset.filter(
+          _seek_filter(ordering, [rows[-1][key] for key in keys], False))
+
+
+class KeysetPaginator(object):
+    """
+    Paginates a queryset by seeking on its ordering columns.
+
+    The ordering needs to be a total order, get_keyset_ordering() ensures
+    this by adding the primary key.
+    """
+    def __init__(self, queryset, per_page=100, ordering=None):
+        self.ordering = ordering or get_keyset_ordering(queryset)
+        if self.ordering is None:
+            raise ValueError('Queryset ordering does not allow keyset '
+                             'pagination.')
+        self.object_list = queryset.order_by(*_order_by(self.ordering))
+        self.per_page = per_page
+
+    @cached_property
+    def count(self):
+        return cached_count(self.object_list)
+
+    def _signature(self):
+        ordering = ','.join(_order_by(self.ordering))
+        return hashlib.md5(ordering.encode('utf-8')).hexdigest()[:8]
+
+    def encode_cursor(self, values):
+        data = json.dumps([self._signature(), values], default=str)
+        return base64.urlsafe_b64encode(data.encode('utf-8'))\
+                     .decode('ascii').rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """
+        Returns the ordering values encoded in the cursor.
+
+        Raises ValueError for a malformed cursor or a cursor created for
+        a different ordering, e.g. after the user changed the sorting.
+        """
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            signature, values = json.loads(
+              base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        except (TypeError, ValueError, UnicodeError):
+            raise ValueError('Invalid cursor.')
+        if signature != self._signature() or \
+           not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValueError('Cursor does not match the ordering.')
+        return values
+
+    def page(self, after=None, before=None):
+        """
+        Returns the page following the 'after' cursor or preceding the
+        'before' cursor, or the first page if neither is given.
+        """
+        backwards = before is not None
+        keys = ['keyset_%d' % index for index in range(len(self.ordering))]
+        queryset = self.object_list.annotate(
+          **dict((key, F(path)) for key, (path, descending, nullable)
+                 in zip(keys, self.ordering)))
+        if backwards:
+            queryset = queryset.filter(
+              _seek_filter(self.ordering, self.decode_cursor(before), True))\
+                               .order_by(*_order_by(self.ordering, True))
+        elif after is not None:
+            queryset = queryset.filter(
+              _seek_filter(self.ordering, self.decode_cursor(after), False))
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+        return KeysetPage(
+          rows, self, [[getattr(row, key) for key in keys] for row in rows],
+          has_previous=has_more if backwards else after is not None,
+          has_next=True if backwards else has_more)
+
+
+class KeysetPage(object):
+    """
+    Page of a KeysetPaginator, with the methods of Django's Page
+    which make sense without page numbers.
+    """
+    number = None
+
+    def __init__(self, object_list, paginator, values,
+                 has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._values = values
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __repr__(self):
+        return '<Keyset page of %d items>' % len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_previous() or self.has_next()
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return self.paginator.encode_cursor(self._values[0])
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return self.paginator.encode_cursor(self._values[-1])
@@ -17,7 +17,6 @@ import django.urls as urlresolvers
 from django.shortcuts import render
 from django.utils.http import urlquote
 
-from djqscsv import render_to_csv_response
 from haystack.query import SearchQuerySet
 
 from apps.gcd.views.search_haystack import GcdNameQuery
@@ -36,9 +35,11 @@ from apps.gcd.models import Publisher, Series, Issue, Cover, Story, StoryType,\
 from apps.gcd.models.issue import INDEXED, IssuePublisherTable
 from apps.gcd.models.story import StoryTable
 from apps.gcd.models.series import SeriesPublisherTable
+from apps.gcd.text_search import get_text_search_engine
 from apps.gcd.views import paginate_response, ORDER_ALPHA, ORDER_CHRONO
 from apps.gcd.forms.search import AdvancedSearch, PAGE_RANGE_REGEXP, \
                                   COUNT_RANGE_REGEXP
+from apps.gcd.views.csv_export import csv_export_response
 from apps.gcd.views.details import issue, COVER_TABLE_WIDTH, IS_EMPTY,\
                                    IS_NONE, generic_sortable_list
 from apps.gcd.views.covers import get_image_tags_per_page
@@ -1060,6 +1061,9 @@ def process_advanced(request, export_csv=False):
             item = items.order_by()[select]
             return HttpResponseRedirect(item.get_absolute_url())
 
+    if export_csv:
+        return csv_export_response(items, gzipped='gzip' in request.GET)
+
     heading = target.title() + ' Search Results'
     # Store the URL minus the page setting so that we can use
     # it to build the URLs for the links to other pages.
@@ -1147,16 +1151,6 @@ def process_advanced(request, export_csv=False):
     context['logic'] = logic
     context['used_search_terms'] = used_search_terms
 
-    if export_csv:
-        fields = [f.name for f in items.model._meta.get_fields()
-                  if f.auto_created is False]
-        fields = [f for f in fields if f not in {'created', 'modified',
-                                                 'deleted', 'keywords',
-                                                 'tagged_items'}]
-        fields.insert(0, 'id')
-        return render_to_csv_response(items.values(*fields),
-                                      append_datestamp=True)
-
     if item_name in ['cover', 'issue_cover']:
         context['table_width'] = COVER_TABLE_WIDTH
         context['NO_ADS'] = True
@@ -1624,7 +1618,7 @@ def search_stories(data, op):
     for field in ('script', 'pencils', 'inks', 'colors', 'letters'):
         if data[field]:
             q_objs.append(
-              Q(**{'%s%s__%s' % (prefix, field, op): data[field]}) |
+              text_qobj(prefix + field, op, data[field]) |
               Q(**{'%scredits__creator__name__%s' % (prefix, op): data[field],
                    '%scredits__credit_type__id' % (prefix):
                    CREDIT_TYPES[field]}) |
@@ -1636,8 +1630,7 @@ def search_stories(data, op):
     for field in ('title', 'first_line', 'job_number', 'characters',
                   'synopsis', 'reprint_notes', 'notes'):
         if data[field]:
-            q_and_only.append(Q(**{'%s%s__%s' % (prefix, field, op):
-                                data[field]}))
+            q_and_only.append(text_qobj(prefix + field, op, data[field]))
 
     if data['feature']:
         q_and_only.append(Q(**{'%s%s__%s' % (prefix,
@@ -1654,8 +1647,8 @@ def search_stories(data, op):
             q_and_only.append(Q(**{'%sgenre__icontains' % prefix: genre}))
 
     if data['story_editing']:
-        q_objs.append(Q(**{'%sediting__%s' % (prefix, op):
-                           data['story_editing']}) |
+        q_objs.append(text_qobj(prefix + 'editing', op,
+                                data['story_editing']) |
                       Q(**{'%scredits__creator__name__%s' % (prefix, op):
                            data['story_editing'],
                            '%scredits__credit_type__id' % (prefix):
@@ -1716,6 +1709,16 @@ def search_stories(data, op):
     return compute_qobj(data, q_and_only, q_objs)
 
 
+def text_qobj(path, op, value):
+    """
+    Matching of the story text fields, where 'Contains' is done by the
+    configured text search engine.
+    """
+    if op == 'icontains':
+        return get_text_search_engine().filter(path, value)
+    return Q(**{'%s__%s' % (path, op): value})
+
+
 def compute_prefix(target, current):
     """
     Advanced search allows searching on any of six tables in a
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stddata', '0003_script'),
+        ('indexer', '0005_indexer_cover_letterer_creator_only'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndexerRanking',
+            fields=[
+                ('indexer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='indexer.Indexer')),
+                ('imps', models.IntegerField(db_index=True)),
+                ('global_rank', models.IntegerField()),
+                ('global_levelup', models.IntegerField(null=True)),
+                ('global_leveldown', models.IntegerField(null=True)),
+                ('national_rank', models.IntegerField()),
+                ('national_levelup', models.IntegerField(null=True)),
+                ('national_leveldown', models.IntegerField(null=True)),
+                ('country', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='stddata.Country')),
+            ],
+            options={
+                'db_table': 'indexer_ranking',
+                'index_together': {('country', 'imps')},
+            },
+        ),
+    ]
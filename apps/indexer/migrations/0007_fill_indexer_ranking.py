@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.db import migrations
+
+from apps.indexer.models import ranking_fields
+
+
+# Filled here, as the rankings maintained when imps are added are only
+# correct relative to a complete table.
+def fill_indexer_ranking(apps, schema_editor):
+    Indexer = apps.get_model('indexer', 'Indexer')
+    IndexerRanking = apps.get_model('indexer', 'IndexerRanking')
+    indexers = list(Indexer.objects
+                           .exclude(user__username=settings.ANON_USER_NAME)
+                           .values_list('id', 'imps', 'country_id'))
+    IndexerRanking.objects.all().delete()
+    IndexerRanking.objects.bulk_create(
+      [IndexerRanking(indexer_id=indexer_id, **fields)
+       for indexer_id, fields in ranking_fields(indexers).items()],
+      batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('indexer', '0006_indexer_ranking'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_indexer_ranking,
+                             migrations.RunPython.noop),
+    ]
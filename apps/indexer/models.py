@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
 
+from collections import Counter, defaultdict
+
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import User, Group
-from django.core.mail import EmailMessage
 from django.template.loader import get_template
 
 from apps.stddata.models import Country, Language
@@ -122,21 +124,24 @@ class Indexer(models.Model):
         old_imps = self.imps
         self.imps = models.F('imps') + value
         self.save()
+        IndexerRanking.objects.refresh(self)
         if (old_imps < settings.MEMBERSHIP_IMPS and
            Indexer.objects.get(pk=self.pk).imps >= settings.MEMBERSHIP_IMPS):
             self.user.groups.add(Group.objects.get(name='member'))
             self.send_member_email()
 
     def send_member_email(self):
-        email = EmailMessage(from_email=settings.EMAIL_CHAIRMAN,
-                             to=[self.user.email],
-                             subject='GCD full member',
-                             body=get_template('indexer/new_member_mail.html')
-                             .render({'site_name': settings.SITE_NAME,
-                                      'chairman': settings.CHAIRMAN}
-                                     ),
-                             cc=[settings.EMAIL_CHAIRMAN])
-        email.send(fail_silently=(not settings.BETA))
+        # reached during approvals, so it goes through their outbox
+        from apps.oi.notifications import queue_email
+        queue_email(from_email=settings.EMAIL_CHAIRMAN,
+                    to=[self.user.email],
+                    subject='GCD full member',
+                    body=get_template('indexer/new_member_mail.html')
+                    .render({'site_name': settings.SITE_NAME,
+                             'chairman': settings.CHAIRMAN}
+                            ),
+                    cc=[settings.EMAIL_CHAIRMAN],
+                    fail_silently=not settings.BETA)
 
     def get_absolute_url(self):
         return self.user.get_absolute_url()
@@ -154,6 +159,189 @@ class Indexer(models.Model):
         return full_name
 
 
+def rank_levels(counts, num_above=0, next_above=None, prev_below=None):
+    """
+    Returns a dict from the imps values in counts, a dict from imps to the
+    number of indexers with them, to the rank, the imps to the next level
+    and the imps ahead of the following level of an indexer with them.
+    num_above is the number of indexers above the values in counts,
+    next_above the lowest imps above them and prev_below the highest imps
+    below them, if any.
+    """
+    levels = {}
+    higher = next_above
+    values = sorted(counts, reverse=True)
+    for position, imps in enumerate(values):
+        lower = values[position + 1] if position + 1 < len(values) \
+                else prev_below
+        levels[imps] = (
+          num_above + 1,
+          None if higher is None else higher - imps + 1,
+          0 if counts[imps] > 1 else (None if lower is None
+                                      else imps - lower))
+        num_above += counts[imps]
+        higher = imps
+    return levels
+
+
+def _level_fields(scope, levels):
+    rank, levelup, leveldown = levels
+    return {'%s_rank' % scope: rank,
+            '%s_levelup' % scope: levelup,
+            '%s_leveldown' % scope: leveldown}
+
+
+def ranking_fields(indexers):
+    """
+    Returns a dict from indexer id to the fields of the ranking of the
+    indexer, for all indexers given as (id, imps, country_id) tuples.
+    Also used by the migration filling the indexer_ranking table.
+    """
+    global_counts = Counter(imps for _, imps, _ in indexers)
+    national_counts = defaultdict(Counter)
+    for _, imps, country_id in indexers:
+        national_counts[country_id][imps] += 1
+    global_levels = rank_levels(global_counts)
+    national_levels = dict((country_id, rank_levels(counts))
+                           for country_id, counts in national_counts.items())
+
+    rankings = {}
+    for indexer_id, imps, country_id in indexers:
+        fields = {'imps': imps, 'country_id': country_id}
+        fields.update(_level_fields('global', global_levels[imps]))
+        fields.update(_level_fields('national',
+                                    national_levels[country_id][imps]))
+        rankings[indexer_id] = fields
+    return rankings
+
+
+class IndexerRankingManager(models.Manager):
+    TOTALS_KEY = 'indexer_ranking_totals'
+
+    def _refresh_window(self, scope, rankings, low, high, joined=0):
+        """
+        Recomputes the rankings with imps from the value below low up to
+        the value above high, the ones whose ranks and gaps can change when
+        an indexer moves between low and high.  joined is 1 if the indexer
+        was added to the rankings at high, -1 if removed at low, as then
+        the ranks of all indexers below change.
+        """
+        below = rankings.filter(imps__lt=low).aggregate(
+          imps=models.Max('imps'))['imps']
+        above = rankings.filter(imps__gt=high).aggregate(
+          imps=models.Min('imps'))['imps']
+        low = low if below is None else below
+        high = high if above is None else above
+
+        counts = dict(rankings.filter(imps__gte=low, imps__lte=high)
+                              .order_by().values_list('imps')
+                              .annotate(models.Count('pk')))
+        outside = rankings.filter(imps__gt=high).aggregate(
+          count=models.Count('pk'), next_above=models.Min('imps'))
+        prev_below = rankings.filter(imps__lt=low).aggregate(
+          imps=models.Max('imps'))['imps']
+        levels = rank_levels(counts, outside['count'], outside['next_above'],
+                             prev_below)
+        for imps, imps_levels in levels.items():
+            rankings.filter(imps=imps).update(
+              **_level_fields(scope, imps_levels))
+        if joined:
+            rankings.filter(imps__lt=low).update(
+              **{'%s_rank' % scope: models.F('%s_rank' % scope) + joined})
+
+    def refresh(self, indexer):
+        """
+        Updates the ranking of the indexer to its current imps and country,
+        and the rankings of the indexers around the old and new imps.
+        """
+        if indexer.user.username == settings.ANON_USER_NAME:
+            return
+        imps, country_id = Indexer.objects.filter(pk=indexer.pk)\
+                                  .values_list('imps', 'country_id').get()
+        old = self.filter(indexer_id=indexer.pk)\
+                  .values_list('imps', 'country_id').first()
+        if old is None:
+            self.create(indexer_id=indexer.pk, imps=imps,
+                        country_id=country_id, global_rank=0,
+                        national_rank=0)
+            cache.delete(self.TOTALS_KEY)
+            self._refresh_window('global', self.all(), imps, imps, 1)
+            self._refresh_window('national',
+                                 self.filter(country_id=country_id),
+                                 imps, imps, 1)
+            return
+
+        self.filter(indexer_id=indexer.pk).update(imps=imps,
+                                                  country_id=country_id)
+        old_imps, old_country_id = old
+        low, high = min(old_imps, imps), max(old_imps, imps)
+        self._refresh_window('global', self.all(), low, high)
+        if old_country_id == country_id:
+            self._refresh_window('national',
+                                 self.filter(country_id=country_id),
+                                 low, high)
+        else:
+            cache.delete(self.TOTALS_KEY)
+            self._refresh_window('national',
+                                 self.filter(country_id=old_country_id),
+                                 old_imps, old_imps, -1)
+            self._refresh_window('national',
+                                 self.filter(country_id=country_id),
+                                 imps, imps, 1)
+
+    def rebuild(self):
+        """
+        Recomputes the rankings of all indexers.
+        """
+        indexers = list(Indexer.objects
+                               .exclude(user__username=settings.ANON_USER_NAME)
+                               .values_list('id', 'imps', 'country_id'))
+        rankings = [IndexerRanking(indexer_id=indexer_id, **fields)
+                    for indexer_id, fields
+                    in ranking_fields(indexers).items()]
+        self.all().delete()
+        self.bulk_create(rankings, batch_size=1000)
+        cache.delete(self.TOTALS_KEY)
+
+    def totals(self):
+        """
+        Returns the number of ranked indexers overall and a dict with the
+        number per country id.
+        """
+        totals = cache.get(self.TOTALS_KEY)
+        if totals is None:
+            totals = dict(self.order_by().values_list('country_id')
+                              .annotate(models.Count('pk')))
+            cache.set(self.TOTALS_KEY, totals, None)
+        return sum(totals.values()), totals
+
+
+class IndexerRanking(models.Model):
+    """
+    The worldwide and national rank of an indexer by imps, with the imps to
+    the next level and ahead of the following one.  Maintained when imps
+    are added, rebuilt with scripts/rebuild_indexer_ranking.py.
+    """
+    class Meta:
+        db_table = 'indexer_ranking'
+        index_together = [('country', 'imps')]
+
+    indexer = models.OneToOneField(Indexer, on_delete=models.CASCADE,
+                                   primary_key=True, related_name='ranking')
+    imps = models.IntegerField(db_index=True)
+    country = models.ForeignKey(Country, on_delete=models.CASCADE,
+                                related_name='+')
+
+    global_rank = models.IntegerField()
+    global_levelup = models.IntegerField(null=True)
+    global_leveldown = models.IntegerField(null=True)
+    national_rank = models.IntegerField()
+    national_levelup = models.IntegerField(null=True)
+    national_leveldown = models.IntegerField(null=True)
+
+    objects = IndexerRankingManager()
+
+
 class ImpGrant(models.Model):
     class Meta:
         db_table = 'indexer_imp_grant'
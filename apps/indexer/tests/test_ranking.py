@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+
+import random
+from collections import Counter
+
+import mock
+import pytest
+
+from apps.indexer.models import Indexer, IndexerRanking, \
+                                 IndexerRankingManager, rank_levels, \
+                                 ranking_fields
+from apps.indexer.views import ranking
+
+MODELS = 'apps.indexer.models'
+VIEWS = 'apps.indexer.views'
+
+
+def _live_levels(all_imps, imps):
+    # the ranking as the live queries compute it, for one of the indexers
+    # with the imps
+    above = [value for value in all_imps if value > imps]
+    below = sorted(all_imps)
+    below.remove(imps)
+    below = [value for value in below if value <= imps]
+    return (len(above) + 1,
+            min(above) - imps + 1 if above else None,
+            imps - max(below) if below else None)
+
+
+def test_rank_levels():
+    rng = random.Random(5)
+    all_imps = [rng.choice([0, 0, 0, 3, 10, 11, 50, 200, 201, 5000])
+                for i in range(200)]
+    levels = rank_levels(Counter(all_imps))
+    for imps in set(all_imps):
+        assert levels[imps] == _live_levels(all_imps, imps)
+
+
+def test_rank_levels_window():
+    all_imps = [0, 0, 3, 10, 11, 11, 50, 200, 5000]
+    counts = Counter(all_imps)
+    # the window refreshed around an indexer moving from 10 to 50
+    window = dict((imps, count) for imps, count in counts.items()
+                  if 3 <= imps <= 200)
+    assert rank_levels(window, num_above=1, next_above=5000,
+                       prev_below=0) == \
+        dict((imps, levels) for imps, levels in rank_levels(counts).items()
+             if 3 <= imps <= 200)
+
+
+def test_ranking_fields():
+    indexers = [(1, 50, 7), (2, 10, 7), (3, 50, 8), (4, 200, 8), (5, 3, 7)]
+    rankings = ranking_fields(indexers)
+    all_imps = [imps for _, imps, _ in indexers]
+    for indexer_id, imps, country_id in indexers:
+        fields = rankings[indexer_id]
+        assert (fields['imps'], fields['country_id']) == (imps, country_id)
+        assert (fields['global_rank'], fields['global_levelup'],
+                fields['global_leveldown']) == _live_levels(all_imps, imps)
+        national_imps = [value for _, value, country in indexers
+                         if country == country_id]
+        assert (fields['national_rank'], fields['national_levelup'],
+                fields['national_leveldown']) == \
+            _live_levels(national_imps, imps)
+
+
+@pytest.yield_fixture
+def ranking_mocks():
+    with mock.patch('%s.IndexerRanking.objects' % VIEWS) as objects_mock, \
+            mock.patch('%s._live_ranking' % VIEWS) as live_mock:
+        yield objects_mock, live_mock
+
+
+def test_ranking(ranking_mocks):
+    objects_mock, live_mock = ranking_mocks
+    indexer = Indexer(id=4, imps=50, country_id=7)
+    objects_mock.filter.return_value.first.return_value = IndexerRanking(
+      indexer_id=4, imps=50, country_id=7, global_rank=30, global_levelup=2,
+      global_leveldown=0, national_rank=3, national_levelup=151,
+      national_leveldown=39)
+    objects_mock.totals.return_value = (1000, {7: 10})
+
+    assert ranking(indexer) == {
+      'national': 3, 'global': 30,
+      'national_levelup': 151, 'global_levelup': 2,
+      'national_leveldown': 39, 'global_leveldown': 0,
+      'national_percentile': 30, 'global_percentile': 3}
+    assert not live_mock.called
+
+
+def test_ranking_outdated(ranking_mocks):
+    objects_mock, live_mock = ranking_mocks
+    indexer = Indexer(id=4, imps=53, country_id=7)
+    objects_mock.filter.return_value.first.return_value = IndexerRanking(
+      indexer_id=4, imps=50, country_id=7, global_rank=30, national_rank=3)
+
+    assert ranking(indexer) == live_mock.return_value
+    live_mock.assert_called_once_with(indexer)
+
+
+class _Rankings(object):
+    """
+    The few queryset operations the ranking maintenance uses, on a list
+    of dicts standing in for the indexer_ranking rows.
+    """
+    def __init__(self, rows, conditions=()):
+        self.rows = rows
+        self.conditions = conditions
+
+    def _matches(self, row):
+        for lookup, value in self.conditions:
+            field, _, op = lookup.partition('__')
+            compare = {'': lambda a, b: a == b,
+                       'lt': lambda a, b: a < b,
+                       'gt': lambda a, b: a > b,
+                       'lte': lambda a, b: a <= b,
+                       'gte': lambda a, b: a >= b}[op]
+            if not compare(row[field], value):
+                return False
+        return True
+
+    def _selected(self):
+        return [row for row in self.rows if self._matches(row)]
+
+    def filter(self, **kwargs):
+        return _Rankings(self.rows, self.conditions + tuple(kwargs.items()))
+
+    def order_by(self):
+        return self
+
+    def aggregate(self, **kwargs):
+        rows = self._selected()
+        result = {}
+        for name, aggregate in kwargs.items():
+            if aggregate.function == 'COUNT':
+                result[name] = len(rows)
+                continue
+            values = [row[aggregate.source_expressions[0].name]
+                      for row in rows]
+            result[name] = {'MAX': max, 'MIN': min}[aggregate.function](
+              values) if values else None
+        return result
+
+    def values_list(self, *fields):
+        return _Values([tuple(row[field] for field in fields)
+                        for row in self._selected()])
+
+    def update(self, **kwargs):
+        for row in self._selected():
+            for field, value in kwargs.items():
+                if hasattr(value, 'connector'):
+                    # F(field) + joined
+                    value = row[value.lhs.name] + value.rhs.value
+                row[field] = value
+
+
+class _Values(list):
+    def first(self):
+        return self[0] if self else None
+
+    def annotate(self, count):
+        return list(Counter(values for values, in self).items())
+
+
+class _RankingManager(IndexerRankingManager):
+    def __init__(self):
+        super(_RankingManager, self).__init__()
+        self.rows = []
+
+    def all(self):
+        return _Rankings(self.rows)
+
+    def filter(self, **kwargs):
+        return self.all().filter(**kwargs)
+
+    def create(self, **kwargs):
+        row = dict((field, None) for field in (
+          'global_levelup', 'global_leveldown',
+          'national_levelup', 'national_leveldown'))
+        row.update(kwargs)
+        self.rows.append(row)
+
+
+def _refresh_all(changes):
+    """
+    Applies the changes, (indexer id, imps, country id) tuples, one after
+    the other with refresh, and checks after each that all rows match the
+    rankings computed from scratch.
+    """
+    manager = _RankingManager()
+    indexers = {}
+    with mock.patch('%s.Indexer.objects' % MODELS) as indexer_mock, \
+            mock.patch('%s.cache' % MODELS):
+        indexer_mock.filter.side_effect = lambda pk: mock.MagicMock(
+          **{'values_list.return_value.get.return_value': indexers[pk]})
+        for indexer_id, imps, country_id in changes:
+            indexers[indexer_id] = (imps, country_id)
+            manager.refresh(mock.MagicMock(pk=indexer_id))
+
+            expected = ranking_fields([(pk, imps, country_id)
+                                       for pk, (imps, country_id)
+                                       in indexers.items()])
+            assert dict((row['indexer_id'],
+                         dict((field, value) for field, value in row.items()
+                              if field != 'indexer_id'))
+                        for row in manager.rows) == expected
+
+
+def test_refresh_first_ranking():
+    _refresh_all([(1, 50, 7), (2, 10, 7), (3, 50, 8), (4, 0, 7),
+                  (5, 200, 8), (6, 50, 7), (7, 10, 7), (8, 5000, 7),
+                  (9, 0, 8)])
+
+
+def test_refresh_imps_increase():
+    indexers = [(1, 0, 7), (2, 3, 7), (3, 10, 8), (4, 10, 7), (5, 11, 7),
+                (6, 50, 8), (7, 50, 7), (8, 200, 7)]
+    _refresh_all(indexers + [
+      # into a tie, out of it, across one and to the top
+      (2, 10, 7), (2, 11, 7), (4, 49, 7), (4, 50, 7), (1, 60, 7),
+      (3, 11, 8), (5, 300, 7), (1, 300, 7), (8, 201, 7)])
+
+
+def test_refresh_country_change():
+    indexers = [(1, 0, 7), (2, 10, 7), (3, 10, 8), (4, 50, 7), (5, 50, 8),
+                (6, 200, 8)]
+    _refresh_all(indexers + [
+      (4, 50, 8), (2, 10, 8), (3, 20, 7), (1, 0, 9), (6, 300, 7),
+      (4, 0, 9)])
+
+
+def test_refresh_random():
+    rng = random.Random(7)
+    _refresh_all([(rng.randrange(1, 30), rng.choice([0, 3, 10, 11, 50, 200]),
+                   rng.choice([7, 8])) for i in range(200)])
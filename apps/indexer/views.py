@@ -9,6 +9,7 @@ out of the gcd app.
 """
 
 
+import math
 import re
 import hashlib
 from random import random
@@ -30,7 +31,7 @@ from django.utils.translation import ugettext as _
 
 from contact_form.views import ContactFormView
 
-from apps.indexer.models import Indexer, Error
+from apps.indexer.models import Indexer, IndexerRanking, Error
 from apps.indexer.forms import ProfileForm, RegistrationForm, \
                                LongUsernameAuthenticationForm
 
@@ -593,6 +594,7 @@ def update_profile(request, user_id=None):
     request.user.save()
 
     indexer = request.user.indexer
+    old_country_id = indexer.country_id
     indexer.notify_on_approve = form.cleaned_data['notify_on_approve']
     indexer.collapse_compare_view = form.cleaned_data['collapse_compare_view']
     indexer.show_wiki_links = form.cleaned_data['show_wiki_links']
@@ -606,6 +608,8 @@ def update_profile(request, user_id=None):
     indexer.no_show_sequences.set(form.cleaned_data['no_show_sequences'])
     indexer.cover_letterer_creator_only = form.cleaned_data['cover_letterer_creator_only']
     indexer.save()
+    if indexer.country_id != old_country_id:
+        IndexerRanking.objects.refresh(indexer)
 
     return HttpResponseRedirect(
       urlresolvers.reverse('view_profile',
@@ -702,7 +706,38 @@ def mentor_not_new(request, indexer_id):
 def ranking(indexer):
     """
     Returns a dictionary of indexer ranking information (by IMPs).
+
+    Read from the maintained ranking of the indexer, unless there is none
+    yet or it is for other imps or another country.
     """
+    row = IndexerRanking.objects.filter(indexer=indexer).first()
+    if row is None or row.imps != indexer.imps or \
+       row.country_id != indexer.country_id:
+        return _live_ranking(indexer)
+
+    total, national_totals = IndexerRanking.objects.totals()
+    national_total = national_totals.get(indexer.country_id, 0)
+    return {
+        'national': row.national_rank,
+        'global': row.global_rank,
+        'national_levelup': row.national_levelup,
+        'global_levelup': row.global_levelup,
+        'national_leveldown': row.national_leveldown,
+        'global_leveldown': row.global_leveldown,
+        'national_percentile': _top_percentile(row.national_rank,
+                                               national_total),
+        'global_percentile': _top_percentile(row.global_rank, total),
+        }
+
+
+def _top_percentile(rank, total):
+    # the smallest top percentage of the indexers the rank is within
+    if not total:
+        return None
+    return max(1, min(100, int(math.ceil(100.0 * rank / total))))
+
+
+def _live_ranking(indexer):
     # Query for list of indexers with more imps than this indexer (with gt and
     # not gte because indexers with equal imps are tied). When ordered by imps,
     # the first in the list is the one to beat to rise to next level.
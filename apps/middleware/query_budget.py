@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Query budget instrumentation.
+
+QueryBudgetMiddleware records for a sample of the requests the number of
+queries, the database time, the repeated queries, the template render time
+and the total time, per resolved view.  The render time is measured by the
+QueryBudgetTemplates backend.  The queries of streamed responses are
+recorded while their content is streamed, and their sample is taken once
+it is complete.  The last QUERY_BUDGET_SAMPLES samples of each view are
+kept in the cache, from which the admin report computes percentiles.
+Concurrent requests may overwrite each other's samples, which is fine for
+statistics.
+
+Views can declare the number of queries they should need with the
+query_budget decorator.  Requests exceeding it are logged, and tests can
+check it with assert_view_query_budget.
+"""
+
+import logging
+import math
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.template.backends.django import DjangoTemplates, Template, \
+                                            reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = 'query_budget_%s'
+VIEWS_KEY = 'query_budget_views'
+
+# number of repeated queries kept per view
+TOP_DUPLICATES = 10
+
+_NUMBER = re.compile(r'\b\d+(\.\d+)?\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+
+# the recorder of the sampled request of the thread, for the render time
+_sampled = threading.local()
+
+
+def fingerprint(sql):
+    """
+    Returns the SQL with literals and parameter lists collapsed, so that
+    the same query for other objects has the same fingerprint.
+    """
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    return _LIST.sub('(...)', sql)
+
+
+class QueryRecorder(object):
+    """
+    Database execute wrapper counting and timing the queries.
+    """
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.render_time = 0.0
+        self.rendering = False
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.time()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.time() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        """
+        Returns (fingerprint, count) pairs of the repeated queries, most
+        repeated first.
+        """
+        return [(sql, count) for sql, count in self.fingerprints.most_common()
+                if count > 1]
+
+
+class QueryBudgetTemplate(Template):
+    """
+    Template adding its render time to the recorder of the sampled request.
+    """
+    def render(self, context=None, request=None):
+        recorder = getattr(_sampled, 'recorder', None)
+        # templates rendered by template tags are part of the outer one
+        if recorder is None or recorder.rendering:
+            return super(QueryBudgetTemplate, self).render(context, request)
+        recorder.rendering = True
+        start = time.time()
+        try:
+            return super(QueryBudgetTemplate, self).render(context, request)
+        finally:
+            recorder.render_time += time.time() - start
+            recorder.rendering = False
+
+
+class QueryBudgetTemplates(DjangoTemplates):
+    """
+    Django template backend adding the render time of the templates to
+    the sample of the request.
+    """
+    def from_string(self, template_code):
+        return QueryBudgetTemplate(self.engine.from_string(template_code),
+                                   self)
+
+    def get_template(self, template_name):
+        try:
+            return QueryBudgetTemplate(
+              self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def query_budget(budget):
+    """
+    Declares the number of queries the view should need at most.
+    """
+    def decorator(view):
+        view.query_budget = budget
+        return view
+    return decorator
+
+
+def record_sample(view_name, recorder, elapsed, budget=None):
+    """
+    Adds the sample of a request to the statistics of the view.
+    """
+    key = STATS_KEY % view_name
+    stats = cache.get(key) or {'samples': [], 'duplicates': {},
+                               'over_budget': 0}
+    samples = stats['samples'] + [(recorder.count, recorder.time,
+                                   recorder.render_time, elapsed)]
+    stats['samples'] = samples[-settings.QUERY_BUDGET_SAMPLES:]
+    duplicates = Counter(stats['duplicates'])
+    duplicates.update(dict(recorder.duplicates()))
+    stats['duplicates'] = dict(duplicates.most_common(TOP_DUPLICATES))
+    stats['budget'] = budget
+    if budget is not None and recorder.count > budget:
+        stats['over_budget'] += 1
+    cache.set(key, stats, None)
+
+    views = cache.get(VIEWS_KEY) or set()
+    if view_name not in views:
+        cache.set(VIEWS_KEY, views | set([view_name]), None)
+
+
+def percentile(values, percent):
+    """
+    Returns the nearest-rank percentile of the values.
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    rank = max(int(math.ceil(percent / 100.0 * len(values))), 1)
+    return values[rank - 1]
+
+
+def view_statistics():
+    """
+    Returns the statistics of the recorded views, those with the most
+    queries at the 95th percentile first.
+    """
+    views = cache.get(VIEWS_KEY) or set()
+    all_stats = cache.get_many([STATS_KEY % name for name in views])
+    rows = []
+    for name in views:
+        stats = all_stats.get(STATS_KEY % name)
+        if not stats or not stats['samples']:
+            continue
+        counts, db_times, render_times, times = zip(*stats['samples'])
+        rows.append({
+          'name': name,
+          'samples': len(counts),
+          'budget': stats['budget'],
+          'over_budget': stats['over_budget'],
+          'queries': [percentile(counts, p) for p in (50, 95, 99)],
+          'db_ms': [percentile(db_times, p) * 1000 for p in (50, 95, 99)],
+          'render_ms': [percentile(render_times, p) * 1000
+                        for p in (50, 95, 99)],
+          'total_ms': [percentile(times, p) * 1000 for p in (50, 95, 99)],
+          'duplicates': sorted(stats['duplicates'].items(),
+                               key=lambda item: -item[1]),
+        })
+    rows.sort(key=lambda row: -row['queries'][1])
+    return rows
+
+
+class QueryBudgetMiddleware(object):
+    """
+    Records the queries of QUERY_BUDGET_SAMPLE_RATE of the requests.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_BUDGET_SAMPLE_RATE:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.time()
+        _sampled.recorder = recorder
+        try:
+            with connection.execute_wrapper(recorder):
+                response = self.get_response(request)
+        finally:
+            _sampled.recorder = None
+
+        match = request.resolver_match
+        if match is None:
+            return response
+        if response.streaming:
+            response.streaming_content = self._recorded_stream(
+              response.streaming_content, match, recorder, start)
+        else:
+            self._record(match, recorder, time.time() - start)
+        return response
+
+    def _recorded_stream(self, content, match, recorder, start):
+        # The content is produced after __call__ returned, so its queries
+        # are recorded chunk by chunk and the sample is taken at the end.
+        try:
+            content = iter(content)
+            while True:
+                with connection.execute_wrapper(recorder):
+                    chunk = next(content, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self._record(match, recorder, time.time() - start)
+
+    def _record(self, match, recorder, elapsed):
+        budget = getattr(match.func, 'query_budget', None)
+        if budget is not None and recorder.count > budget:
+            logger.warning('%s: %d queries exceed the budget of %d, '
+                           'repeated: %r', match.view_name, recorder.count,
+                           budget, recorder.duplicates()[:3])
+        record_sample(match.view_name, recorder, elapsed, budget)
+
+
+@contextmanager
+def assert_query_budget(budget):
+    """
+    Context manager for tests, failing if the block runs more than budget
+    queries.
+    """
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        yield recorder
+    if recorder.count > budget:
+        raise AssertionError(
+          '%d queries exceed the budget of %d, repeated: %r' % (
+            recorder.count, budget, recorder.duplicates()))
+
+
+def assert_view_query_budget(view, request, *args, **kwargs):
+    """
+    Calls the view, failing if it runs more queries than declared with
+    query_budget.
+    """
+    with assert_query_budget(view.query_budget):
+        return view(request, *args, **kwargs)
@@ -0,0 +1,129 @@
+"""
+CSV export of collections.
+
+The items are read in chunks, each with one query joining the issue,
+series, publisher, dates, locations, grade and currencies, plus one query
+each for the code numbers of the issues and the keywords of the items, and
+the CSV rows are streamed while reading.
+"""
+
+import csv
+from datetime import date
+
+from django.http import StreamingHttpResponse
+from django.utils.text import slugify
+
+from apps.gcd.views.csv_export import Echo
+from apps.mycomics.models import CollectionItem
+
+# items read per query
+EXPORT_CHUNK_SIZE = 1000
+
+# the always exported columns as header and path of the value
+BASE_COLUMNS = [
+  ('series', 'issue.series.name'),
+  ('publisher', 'issue.series.publisher.name'),
+  ('series year', 'issue.series.year_began'),
+  ('issue', 'issue.full_descriptor'),
+]
+
+# the columns exported if the collection uses the field, headers default to
+# the verbose name of the field
+OPTIONAL_COLUMNS = [
+  ('condition_used', [(None, 'grade')]),
+  ('acquisition_date_used', [(None, 'acquisition_date')]),
+  ('sell_date_used', [(None, 'sell_date')]),
+  ('location_used', [(None, 'location')]),
+  ('purchase_location_used', [(None, 'purchase_location')]),
+  ('was_read_used', [(None, 'was_read')]),
+  ('for_sale_used', [(None, 'for_sale')]),
+  ('signed_used', [(None, 'signed')]),
+  ('price_paid_used', [(None, 'price_paid'),
+                       ('', 'price_paid_currency.code')]),
+  ('market_value_used', [(None, 'market_value'),
+                         ('', 'market_value_currency.code')]),
+  ('sell_price_used', [(None, 'sell_price'),
+                       ('', 'sell_price_currency.code')]),
+]
+
+SELECT_RELATED = ['issue__series__publisher', 'grade', 'acquisition_date',
+                  'sell_date', 'location', 'purchase_location',
+                  'price_paid_currency', 'market_value_currency',
+                  'sell_price_currency']
+
+
+def _header(header, path):
+    if header is not None:
+        return header
+    return str(CollectionItem._meta.get_field(path).verbose_name)
+
+
+def export_columns(collection):
+    """
+    Returns the (header, value path) pairs of the fields the collection
+    uses, in the order of the export.
+    """
+    columns = list(BASE_COLUMNS)
+    for used, used_columns in OPTIONAL_COLUMNS:
+        if getattr(collection, used):
+            columns.extend((_header(header, path), path)
+                           for header, path in used_columns)
+    columns.append(('description', 'notes'))
+    return columns
+
+
+def _value(item, path):
+    value = item
+    for name in path.split('.'):
+        value = getattr(value, name)
+        if value is None:
+            return ''
+    return str(value)
+
+
+def _keywords(item):
+    return ', '.join(sorted(keyword.name for keyword in item.keywords.all()))
+
+
+def export_chunks(collection, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the items of the collection in lists of at most chunk_size
+    items, in the order of the collection.
+    """
+    item_ids = list(collection.items.values_list('id', flat=True))
+    for start in range(0, len(item_ids), chunk_size):
+        chunk_ids = item_ids[start:start + chunk_size]
+        items = CollectionItem.objects.filter(id__in=chunk_ids)\
+                                      .select_related(*SELECT_RELATED)\
+                                      .prefetch_related('issue__code_number',
+                                                        'keywords')\
+                                      .order_by()
+        items = dict((item.id, item) for item in items)
+        yield [items[item_id] for item_id in chunk_ids if item_id in items]
+
+
+def collection_csv_rows(collection, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the lines of the CSV export of the collection, one string for
+    the header and per chunk of items.
+    """
+    columns = export_columns(collection)
+    writer = csv.writer(Echo())
+    # the BOM lets Excel recognize the encoding
+    yield '\ufeff' + writer.writerow([header for header, path in columns] +
+                                      ['tags'])
+    for items in export_chunks(collection, chunk_size):
+        yield ''.join(writer.writerow([_value(item, path)
+                                       for header, path in columns] +
+                                      [_keywords(item)])
+                      for item in items)
+
+
+def collection_export_response(collection):
+    filename = '%s_%s.csv' % (slugify(str(collection).replace(' ', '_')),
+                              date.today().strftime('%Y%m%d'))
+    response = StreamingHttpResponse(collection_csv_rows(collection),
+                                     content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename=%s;' % filename
+    response['Cache-Control'] = 'no-cache'
+    return response
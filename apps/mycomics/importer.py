@@ -0,0 +1,191 @@
+"""
+Import of issue lists into collections.
+
+The lines of the file are parsed first.  The series are then looked up
+with one query per chunk of the distinct series names in the file, giving
+an index from the normalized name to the series with their year, publisher
+and language, against which the lines are matched in memory.  Finally the
+issue numbers are resolved with one query per chunk of matched series.
+"""
+
+import csv
+import re
+from collections import defaultdict, namedtuple
+
+from apps.gcd.models import Issue, Series
+from apps.indexer.views import ErrorWithMessage
+
+# series names respectively series read per query
+IMPORT_CHUNK_SIZE = 1000
+
+# publisher names of comicbookdb.com exports differing from ours
+COMICBOOKDB_PUBLISHERS = {
+  'Image Comics Inc.': 'Image',
+  'DC Comics': 'DC',
+  'Valiant Entertainment LLC': 'Valiant Entertainment',
+  'Archie Comic Publications Inc.': 'Archie',
+  'IDW Publishing': 'IDW',
+}
+
+_WHITESPACE = re.compile(r'\s+')
+
+# exact_publisher is set for comicbookdb.com exports, otherwise the given
+# publisher only needs to be part of the publisher name
+ImportLine = namedtuple('ImportLine', ['line', 'series', 'number', 'year',
+                                       'publisher', 'language',
+                                       'exact_publisher'])
+
+SeriesEntry = namedtuple('SeriesEntry', ['id', 'year', 'publisher',
+                                         'language'])
+
+
+def collapse(name):
+    return _WHITESPACE.sub(' ', name).strip()
+
+
+def normalize(name):
+    """
+    Returns the name in the form used as key for matching, case and
+    whitespace differences do not matter.
+    """
+    return collapse(name).casefold()
+
+
+def _comicbookdb_line(line, publisher_col):
+    title = line[0].strip()
+    if title[-1:] == ')' and title[-6:-5] == '(' and title[-5:-1].isdigit():
+        series = title[:-6]
+        year = int(title[-5:-1])
+    else:
+        raise ErrorWithMessage("Cannot find '(year)'")
+    try:
+        number = line[1].strip().lstrip('#')
+        publisher = line[publisher_col].strip()
+    except IndexError:
+        raise ErrorWithMessage("Not enough columns")
+    publisher = COMICBOOKDB_PUBLISHERS.get(publisher, publisher)
+    return ImportLine(line, collapse(series), number, year, publisher, '',
+                      True)
+
+
+def _plain_line(line):
+    # the row as read is kept for the report of the lines not found
+    columns = line + [''] * (4 - len(line))
+    return ImportLine(line, collapse(columns[0]),
+                      columns[1].strip().lstrip('#'), None,
+                      columns[2].strip(), columns[3].strip(), False)
+
+
+def parse_lines(lines):
+    """
+    Returns the ImportLines of the rows of the file, either an export of
+    comicbookdb.com or rows of series name, issue number and optionally
+    publisher name and language code.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return []
+    if first[:2] == ['Title', 'Issue Number']:
+        if 'Publisher' not in first[2:]:
+            raise ErrorWithMessage("We cannot find 'Publisher' in the "
+                                   "list of columns")
+        publisher_col = first.index('Publisher', 2)
+        return [_comicbookdb_line(line, publisher_col)
+                for line in lines if any(line)]
+    return [_plain_line(line) for line in [first] + list(lines) if any(line)]
+
+
+def series_index(names):
+    """
+    Returns a dict from the normalized names to the SeriesEntries of the
+    series with one of the names.
+    """
+    names = sorted(set(names))
+    index = defaultdict(list)
+    for start in range(0, len(names), IMPORT_CHUNK_SIZE):
+        series = Series.objects.filter(
+          name__in=names[start:start + IMPORT_CHUNK_SIZE], deleted=False)\
+          .values_list('id', 'name', 'year_began', 'publisher__name',
+                       'language__code')
+        for series_id, name, year, publisher, language in series:
+            index[normalize(name)].append(SeriesEntry(
+              series_id, year, normalize(publisher), language.casefold()))
+    return index
+
+
+def _matches(entry, line):
+    if line.year is not None and entry.year != line.year:
+        return False
+    if line.publisher:
+        publisher = normalize(line.publisher)
+        if line.exact_publisher and entry.publisher != publisher:
+            return False
+        if publisher not in entry.publisher:
+            return False
+    if line.language and entry.language != line.language.casefold():
+        return False
+    return True
+
+
+def issue_index(numbers_by_series):
+    """
+    Returns a dict from (series id, normalized number) to the ids of the
+    issues for the given numbers per series id.
+    """
+    series_ids = sorted(numbers_by_series)
+    index = defaultdict(list)
+    for start in range(0, len(series_ids), IMPORT_CHUNK_SIZE):
+        chunk = series_ids[start:start + IMPORT_CHUNK_SIZE]
+        numbers = set()
+        for series_id in chunk:
+            numbers.update(numbers_by_series[series_id])
+        issues = Issue.objects.filter(series_id__in=chunk,
+                                      number__in=sorted(numbers),
+                                      deleted=False)\
+                              .values_list('id', 'series_id', 'number')
+        for issue_id, series_id, number in issues:
+            index[(series_id, normalize(number))].append(issue_id)
+    return index
+
+
+def resolve_lines(lines):
+    """
+    Returns the ids of the issues found for the ImportLines and the lines
+    for which none was found.
+    """
+    index = series_index(line.series for line in lines if line.series)
+
+    candidates = []
+    numbers_by_series = defaultdict(set)
+    for line in lines:
+        series_ids = []
+        if line.number:
+            series_ids = [entry.id for entry
+                          in index.get(normalize(line.series), [])
+                          if _matches(entry, line)]
+        candidates.append(series_ids)
+        for series_id in series_ids:
+            numbers_by_series[series_id].add(line.number)
+    issues = issue_index(numbers_by_series)
+
+    issue_ids = set()
+    unmatched = []
+    for line, series_ids in zip(lines, candidates):
+        found = [issue_id for series_id in series_ids
+                 for issue_id in issues.get((series_id,
+                                             normalize(line.number)), [])]
+        if found:
+            issue_ids.update(found)
+        else:
+            unmatched.append(line)
+    return issue_ids, unmatched
+
+
+def import_issues(csv_file):
+    """
+    Returns the ids of the issues found for the rows of the CSV file and
+    the not found rows.
+    """
+    issue_ids, unmatched = resolve_lines(parse_lines(csv.reader(csv_file)))
+    return issue_ids, [line.line for line in unmatched]
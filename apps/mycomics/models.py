@@ -177,6 +177,40 @@ class PurchaseLocation(models.Model):
         return str(self.name)
 
 
+class CollectionItemManager(models.Manager):
+    def bulk_add(self, collection, issue_ids, batch_size=1000):
+        """
+        Adds items for the issues to the collection, with the ownership
+        default of the collection, and returns the ids of the new items.
+
+        The items and the rows of the collections relation are each
+        inserted in batches.  Where the database does not return the ids
+        of inserted rows, they are read back as the items above the
+        previous highest id not yet in a collection.  Uncommitted items of
+        other requests are not visible to our transaction, and committed
+        ones are in a collection.
+        """
+        issue_ids = list(issue_ids)
+        if not issue_ids:
+            return []
+        own = collection.own_default if collection.own_used else None
+        last_id = self.aggregate(last_id=models.Max('id'))['last_id'] or 0
+        items = self.bulk_create([self.model(issue_id=issue_id, own=own)
+                                  for issue_id in issue_ids],
+                                 batch_size=batch_size)
+        item_ids = [item.pk for item in items]
+        if None in item_ids:
+            item_ids = list(self.filter(id__gt=last_id, collections=None,
+                                        issue_id__in=issue_ids)
+                                .order_by('id').values_list('id', flat=True))
+
+        through = self.model.collections.through
+        through.objects.bulk_create(
+          [through(collection_id=collection.id, collectionitem_id=item_id)
+           for item_id in item_ids], batch_size=batch_size)
+        return item_ids
+
+
 class CollectionItem(models.Model):
     """Class for keeping record of particular item in user's collection."""
 
@@ -243,6 +277,8 @@ class CollectionItem(models.Model):
     rating = models.IntegerField(choices=RATINGS, blank=True, null=True)
     is_digital = models.BooleanField(default=False)
 
+    objects = CollectionItemManager()
+
     def show_rating(self):
         if self.rating:
             return CollectionItem.RATINGS[self.rating]
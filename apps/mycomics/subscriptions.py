@@ -0,0 +1,88 @@
+"""
+Pulling the new issues of the subscribed series of collections.
+
+The issues created since the last pull of their series are found with one
+query joining the subscriptions to the issues.  The precompute_pulls job
+runs that query for all collections at once and caches the issue ids per
+collection, together with the time of the computation.  The pull page then
+only adds the issues created since, unless a subscription was pulled or
+added after the computation, in which case the collection is recomputed.
+"""
+
+from collections import defaultdict
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db.models import F, Max
+
+from apps.gcd.models import Issue
+from apps.mycomics.models import Subscription
+
+# the precomputed pulls are refreshed by the scheduled job long before
+PULL_TIMEOUT = 24 * 60 * 60
+
+
+def _pull_key(collection_id):
+    return 'subscription_pull_%d' % collection_id
+
+
+def pull_issues(collection=None, since=None):
+    """
+    Returns the issues created since the last pull of their subscribed
+    series, for the collection or all of them, optionally only those
+    created since the given time.
+    """
+    filters = {'deleted': False,
+               'created__gte': F('series__subscription__last_pulled')}
+    if collection is not None:
+        filters['series__subscription__collection'] = collection
+    issues = Issue.objects.filter(**filters)
+    if since is not None:
+        issues = issues.filter(created__gte=since)
+    return issues
+
+
+def _store_pull(collection_id, computed, issue_ids):
+    cache.set(_pull_key(collection_id), (computed, sorted(issue_ids)),
+              PULL_TIMEOUT)
+
+
+def precompute_pulls():
+    """
+    Computes and caches the new issues of all collections with
+    subscriptions, returns the number of collections.
+    """
+    computed = datetime.now()
+    issue_ids = defaultdict(set)
+    for issue_id, collection_id in pull_issues().values_list(
+      'id', 'series__subscription__collection_id'):
+        issue_ids[collection_id].add(issue_id)
+    collection_ids = set(Subscription.objects.values_list('collection_id',
+                                                          flat=True))
+    cache.set_many(dict((_pull_key(collection_id),
+                         (computed, sorted(issue_ids[collection_id])))
+                        for collection_id in collection_ids), PULL_TIMEOUT)
+    return len(collection_ids)
+
+
+def new_issues(collection):
+    """
+    Returns the issues of the collection to pull, from the precomputed ids
+    where these are still valid.
+    """
+    entry = cache.get(_pull_key(collection.id))
+    latest_pull = collection.subscriptions.aggregate(
+      latest=Max('last_pulled'))['latest']
+    if entry is None or latest_pull is None or latest_pull >= entry[0]:
+        computed = datetime.now()
+        issue_ids = set(pull_issues(collection).values_list('id', flat=True))
+        _store_pull(collection.id, computed, issue_ids)
+    else:
+        computed, issue_ids = entry
+        issue_ids = set(issue_ids)
+        issue_ids.update(pull_issues(collection, since=computed)
+                         .values_list('id', flat=True))
+    # issues deleted or series unsubscribed since the computation
+    return Issue.objects.filter(id__in=issue_ids, deleted=False,
+                                series__subscription__collection=collection)\
+                        .distinct()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from apps.mycomics.models import Collection, CollectionItem
+from apps.mycomics.views import post_process_subscription
+
+MODELS = 'apps.mycomics.models'
+THROUGH = CollectionItem.collections.through
+
+
+@pytest.yield_fixture
+def item_mocks():
+    with mock.patch('%s.CollectionItemManager.aggregate' % MODELS) \
+            as aggregate, \
+            mock.patch('%s.CollectionItemManager.bulk_create' % MODELS) \
+            as bulk_create, \
+            mock.patch('%s.CollectionItemManager.filter' % MODELS) \
+            as item_filter, \
+            mock.patch.object(THROUGH.objects, 'bulk_create') \
+            as through_create:
+        aggregate.return_value = {'last_id': 40}
+        bulk_create.side_effect = lambda items, batch_size: items
+        yield bulk_create, item_filter, through_create
+
+
+def test_bulk_add(item_mocks):
+    bulk_create, item_filter, through_create = item_mocks
+    item_filter.return_value.order_by.return_value.values_list\
+               .return_value = [41, 42]
+    collection = Collection(id=3, own_used=True, own_default=True)
+
+    assert CollectionItem.objects.bulk_add(collection, [7, 8]) == [41, 42]
+
+    items = bulk_create.call_args[0][0]
+    assert [(item.issue_id, item.own) for item in items] == [(7, True),
+                                                             (8, True)]
+    item_filter.assert_called_once_with(id__gt=40, collections=None,
+                                        issue_id__in=[7, 8])
+    rows = through_create.call_args[0][0]
+    assert [(row.collection_id, row.collectionitem_id) for row in rows] == \
+        [(3, 41), (3, 42)]
+
+
+def test_bulk_add_returned_ids(item_mocks):
+    bulk_create, item_filter, through_create = item_mocks
+
+    def _create(items, batch_size):
+        for item_id, item in enumerate(items, 50):
+            item.id = item_id
+        return items
+    bulk_create.side_effect = _create
+    collection = Collection(id=3, own_used=False, own_default=True)
+
+    assert CollectionItem.objects.bulk_add(collection, [7]) == [50]
+    assert bulk_create.call_args[0][0][0].own is None
+    assert not item_filter.called
+
+
+def test_bulk_add_nothing(item_mocks):
+    bulk_create, item_filter, through_create = item_mocks
+    assert CollectionItem.objects.bulk_add(Collection(id=3), []) == []
+    assert not bulk_create.called
+
+
+def test_post_process_subscription():
+    collection = Collection(id=3)
+    with mock.patch('apps.mycomics.views.Subscription.objects.filter') \
+            as subscription_filter:
+        post_process_subscription(collection, [7, 8])
+    assert subscription_filter.call_args[1]['collection'] == collection
+    subscription_filter.return_value.update.assert_called_once_with(
+      last_pulled=mock.ANY)
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+
+from decimal import Decimal
+
+import mock
+import pytest
+
+from apps.gcd.models import Publisher, Series, Issue
+from apps.mycomics.export import export_columns, export_chunks, \
+                                 collection_csv_rows
+from apps.mycomics.models import Collection, CollectionItem, Location
+from apps.stddata.models import Currency, Date
+
+
+EXPORT = 'apps.mycomics.export'
+
+
+def _item(item_id, number, **kwargs):
+    series = Series(name='Tales', year_began=1960,
+                    publisher=Publisher(name='Marvel'))
+    issue = Issue(number=number, series=series, variant_name='')
+    return CollectionItem(id=item_id, issue=issue, **kwargs)
+
+
+def test_export_columns():
+    collection = Collection(acquisition_date_used=True, price_paid_used=True)
+    assert [header for header, path in export_columns(collection)] == [
+      'series', 'publisher', 'series year', 'issue', 'acquisition date',
+      'price paid', '', 'description']
+
+
+@pytest.yield_fixture
+def code_numbers():
+    with mock.patch('apps.gcd.models.issue.Issue.active_code_numbers',
+                    return_value=[]), \
+            mock.patch('%s._keywords' % EXPORT, return_value='old, signed'):
+        yield
+
+
+def test_collection_csv_rows(code_numbers):
+    collection = Collection(acquisition_date_used=True, location_used=True,
+                            price_paid_used=True)
+    items = [_item(1, '1', acquisition_date=Date(year='1961', month='05'),
+                   location=Location(name='Box'), price_paid=Decimal('2.50'),
+                   price_paid_currency=Currency(code='USD'), notes='nice'),
+             _item(2, '2')]
+    with mock.patch('%s.export_chunks' % EXPORT) as chunks_mock:
+        chunks_mock.return_value = [items[:1], items[1:]]
+        lines = list(collection_csv_rows(collection))
+
+    assert lines == [
+      '\ufeffseries,publisher,series year,issue,acquisition date,location,'
+      'price paid,,description,tags\r\n',
+      'Tales,Marvel,1960,1,1961-05,Box,2.50,USD,nice,"old, signed"\r\n',
+      'Tales,Marvel,1960,2,,,,,,"old, signed"\r\n']
+
+
+def test_export_chunks():
+    collection = mock.MagicMock()
+    collection.items.values_list.return_value = [3, 1, 2]
+    items = dict((item_id, _item(item_id, str(item_id)))
+                 for item_id in [1, 2, 3])
+    with mock.patch('%s.CollectionItem.objects' % EXPORT) as objects_mock:
+        chunk_mock = objects_mock.filter.return_value.select_related\
+                                 .return_value.prefetch_related.return_value\
+                                 .order_by
+        chunk_mock.side_effect = [[items[1], items[3]], [items[2]]]
+        chunks = list(export_chunks(collection, chunk_size=2))
+
+    assert chunks == [[items[3], items[1]], [items[2]]]
+    assert objects_mock.filter.call_args_list == [mock.call(id__in=[3, 1]),
+                                                  mock.call(id__in=[2])]
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+
+import io
+
+import mock
+import pytest
+
+from apps.indexer.views import ErrorWithMessage
+from apps.mycomics.importer import parse_lines, resolve_lines, \
+                                   import_issues, SeriesEntry, _matches
+
+IMPORTER = 'apps.mycomics.importer'
+
+
+def test_parse_lines_plain():
+    lines = parse_lines([['  Action   Comics ', '#1'], [],
+                         ['Batman', '5', 'DC', 'en']])
+    assert [(line.series, line.number, line.publisher, line.language)
+            for line in lines] == [('Action Comics', '1', '', ''),
+                                   ('Batman', '5', 'DC', 'en')]
+    # reported as read if not found
+    assert lines[0].line == ['  Action   Comics ', '#1']
+
+
+def test_parse_lines_comicbookdb():
+    line, = parse_lines([['Title', 'Issue Number', 'Issue Name', 'Publisher'],
+                         ['Saga (2012)', '#3', '', 'Image Comics Inc.']])
+    assert (line.series, line.number, line.year, line.publisher,
+            line.exact_publisher) == ('Saga', '3', 2012, 'Image', True)
+
+    with pytest.raises(ErrorWithMessage):
+        parse_lines([['Title', 'Issue Number', 'Issue Name', 'Publisher'],
+                     ['Saga', '3', '', 'Image']])
+
+
+def test_matches():
+    entry = SeriesEntry(1, 2012, 'image', 'en')
+    line, = parse_lines([['Saga', '1', 'imag', 'EN']])
+    assert _matches(entry, line)
+    assert not _matches(entry, line._replace(exact_publisher=True))
+    assert not _matches(entry, line._replace(year=2013))
+    assert not _matches(entry, line._replace(language='de'))
+
+
+@pytest.yield_fixture
+def database():
+    with mock.patch('%s.Series' % IMPORTER) as series_mock, \
+            mock.patch('%s.Issue' % IMPORTER) as issue_mock:
+        series_mock.objects.filter.return_value.values_list.return_value = [
+          (1, 'Saga', 2012, 'Image', 'en'),
+          (2, 'SAGA', 1990, 'Other', 'de'),
+          (3, 'Batman', 1940, 'DC', 'en')]
+        issue_mock.objects.filter.return_value.values_list.return_value = [
+          (11, 1, '1'), (12, 1, '1'), (21, 2, '1'), (31, 3, '5')]
+        yield series_mock, issue_mock
+
+
+def test_resolve_lines(database):
+    series_mock, issue_mock = database
+    lines = parse_lines([['saga', '1', 'Image'], ['Batman', '5'],
+                         ['Batman', '6'], ['Unknown', '1'], ['Batman']])
+    issue_ids, unmatched = resolve_lines(lines)
+
+    assert issue_ids == set([11, 12, 31])
+    assert [line.line[:2] for line in unmatched] == [
+      ['Batman', '6'], ['Unknown', '1'], ['Batman', '']]
+    series_mock.objects.filter.assert_called_once_with(
+      name__in=['Batman', 'Unknown', 'saga'], deleted=False)
+    issue_mock.objects.filter.assert_called_once_with(
+      series_id__in=[1, 3], number__in=['1', '5', '6'], deleted=False)
+
+
+def test_import_issues(database):
+    issue_ids, not_found = import_issues(io.StringIO(
+      'Title,Issue Number,Issue Name,Publisher\n'
+      'Saga (1990),1,,Other\n'
+      'Saga (1990),2,,Other\n'))
+    assert issue_ids == set([21])
+    assert not_found == [['Saga (1990)', '2', '', 'Other']]
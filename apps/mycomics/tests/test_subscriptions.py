@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+
+from datetime import datetime
+
+import mock
+import pytest
+
+from apps.mycomics.models import Collection
+from apps.mycomics.subscriptions import pull_issues, precompute_pulls, \
+                                        new_issues
+
+SUBSCRIPTIONS = 'apps.mycomics.subscriptions'
+COMPUTED = datetime(2020, 5, 17, 10, 30)
+
+
+def test_pull_issues():
+    query = pull_issues(Collection(id=3)).query
+    subscription, = [alias for alias, table in query.alias_map.items()
+                     if table.table_name == 'mycomics_subscription']
+    conditions = dict((condition.lhs.target.name, condition)
+                      for condition in query.where.children)
+    pulled = conditions['created']
+    assert pulled.lookup_name == 'gte'
+    assert (pulled.rhs.alias, pulled.rhs.target.name) == \
+        (subscription, 'last_pulled')
+    assert conditions['collection'].lhs.alias == subscription
+    assert conditions['collection'].rhs == 3
+
+
+@pytest.yield_fixture
+def pull_mocks():
+    with mock.patch('%s.cache' % SUBSCRIPTIONS) as cache_mock, \
+            mock.patch('%s.pull_issues' % SUBSCRIPTIONS) as pull_mock, \
+            mock.patch('%s.Issue' % SUBSCRIPTIONS) as issue_mock, \
+            mock.patch.object(Collection, 'subscriptions') \
+            as subscriptions_mock:
+        yield cache_mock, pull_mock, issue_mock, \
+            subscriptions_mock.aggregate
+
+
+def test_new_issues_precomputed(pull_mocks):
+    cache_mock, pull_mock, issue_mock, aggregate = pull_mocks
+    cache_mock.get.return_value = (COMPUTED, [5, 6])
+    aggregate.return_value = {'latest': datetime(2020, 5, 1)}
+    pull_mock.return_value.values_list.return_value = [7]
+    collection = Collection(id=3)
+
+    new_issues(collection)
+
+    pull_mock.assert_called_once_with(collection, since=COMPUTED)
+    assert not cache_mock.set.called
+    issue_mock.objects.filter.assert_called_once_with(
+      id__in=set([5, 6, 7]), deleted=False,
+      series__subscription__collection=collection)
+
+
+def test_new_issues_pulled_since(pull_mocks):
+    cache_mock, pull_mock, issue_mock, aggregate = pull_mocks
+    cache_mock.get.return_value = (COMPUTED, [5, 6])
+    aggregate.return_value = {'latest': datetime(2020, 6, 1)}
+    pull_mock.return_value.values_list.return_value = [7]
+    collection = Collection(id=3)
+
+    new_issues(collection)
+
+    pull_mock.assert_called_once_with(collection)
+    assert cache_mock.set.call_args[0][0] == 'subscription_pull_3'
+    assert cache_mock.set.call_args[0][1][1] == [7]
+    assert issue_mock.objects.filter.call_args[1]['id__in'] == set([7])
+
+
+def test_precompute_pulls():
+    with mock.patch('%s.cache' % SUBSCRIPTIONS) as cache_mock, \
+            mock.patch('%s.pull_issues' % SUBSCRIPTIONS) as pull_mock, \
+            mock.patch('%s.Subscription' % SUBSCRIPTIONS) \
+            as subscription_mock:
+        pull_mock.return_value.values_list.return_value = [
+          (5, 3), (6, 3), (5, 4)]
+        subscription_mock.objects.values_list.return_value = [3, 3, 4, 8]
+        assert precompute_pulls() == 3
+
+    entries = cache_mock.set_many.call_args[0][0]
+    assert dict((key, ids) for key, (computed, ids) in entries.items()) == {
+      'subscription_pull_3': [5, 6],
+      'subscription_pull_4': [5],
+      'subscription_pull_8': []}
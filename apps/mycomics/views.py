@@ -14,24 +14,22 @@ from django.conf import settings
 from django.utils.html import conditional_escape as esc
 from django.utils.html import mark_safe
 
-from djqscsv import render_to_csv_response
-import csv
-
 from apps.indexer.views import render_error, ErrorWithMessage
 from apps.gcd.models import Issue, Series
 from apps.gcd.views import ResponsePaginator, paginate_response
 from apps.gcd.views.alpha_pagination import AlphaPaginator
 from apps.gcd.views.details import do_on_sale_weekly
-from apps.gcd.templatetags.credits import show_keywords_comma
 from apps.gcd.views.search_haystack import PaginatedFacetedSearchView, \
     GcdSearchQuerySet
 
 from apps.select.views import store_select_data
 
+from apps.mycomics.export import collection_export_response
+from apps.mycomics.importer import import_issues
+from apps.mycomics.subscriptions import new_issues
 from apps.mycomics.forms import CollectionForm, CollectionItemForm, \
                                 CollectionSelectForm, CollectorForm, \
                                 LocationForm, PurchaseLocationForm
-from apps.stddata.models import Date
 from apps.stddata.forms import DateForm
 from apps.mycomics.models import Collection, CollectionItem, Subscription, \
                                  Location, PurchaseLocation
@@ -142,65 +140,7 @@ def export_collection(request, collection_id):
     """
     collection = get_object_or_404(Collection, id=collection_id,
                                    collector=request.user.collector)
-    filename = str(collection).replace(' ', '_')
-
-    export_data = ["issue__series__name", "issue__series__publisher__name",
-                   "issue__series__year_began",
-                   "issue"]
-    field_header_map = {"issue__series__name": "series",
-                        "issue__series__publisher__name": "publisher",
-                        "issue__series__year_began": "series year",
-                        "notes": "description",
-                        "id": "tags"}
-    field_serializer_map = {'issue':
-                              (lambda x:
-                               "%s" % Issue.objects.get(id=x).full_descriptor),
-                            'id':
-                              (lambda x:
-                               "%s" % show_keywords_comma(CollectionItem.objects.get(id=x))),
-                            "acquisition_date":
-                              (lambda x: "%s" % Date.objects.get(id=x)),
-                            "sell_date":
-                              (lambda x: "%s" % Date.objects.get(id=x)),}
-    if collection.condition_used:
-        export_data.append("grade")
-    if collection.acquisition_date_used:
-        export_data.append("acquisition_date")
-    if collection.sell_date_used:
-        export_data.append("sell_date")
-    if collection.location_used:
-        export_data.append("location")
-    if collection.purchase_location_used:
-        export_data.append("purchase_location")
-    if collection.was_read_used:
-        export_data.append("was_read")
-    if collection.for_sale_used:
-        export_data.append("for_sale")
-    if collection.signed_used:
-        export_data.append("signed")
-    if collection.price_paid_used:
-        export_data.append("price_paid")
-        export_data.append("price_paid_currency__code")
-        field_header_map["price_paid_currency__code"] = ""
-    if collection.market_value_used:
-        export_data.append("market_value")
-        export_data.append("market_value_currency__code")
-        field_header_map["market_value_currency__code"] = ""
-    if collection.sell_price_used:
-        export_data.append("sell_price")
-        export_data.append("sell_price_currency__code")
-        field_header_map["sell_price_currency__code"] = ""
-    export_data.append("notes")
-    export_data.append("id")
-
-    items = collection.items.all()
-
-    return render_to_csv_response(
-      items.values(*export_data),
-      append_datestamp=True,
-      field_serializer_map=field_serializer_map,
-      field_header_map=field_header_map,
-      filename=filename)
+    return collection_export_response(collection)
 
 
 def get_item_for_collector(item_id, collector):
@@ -508,10 +448,10 @@ def add_issues_to_collection(request, collection_id, issues, redirect,
                                                         collection_id)
     if not collection:
         return error_return
-    for issue in issues:
-        collected = create_collection_item(issue, collection)
-        if post_process_selection:
-            post_process_selection(collected)
+    issue_ids = list(issues.values_list('id', flat=True))
+    CollectionItem.objects.bulk_add(collection, issue_ids)
+    if post_process_selection:
+        post_process_selection(collection, issue_ids)
     request.session['collection_id'] = collection_id
     return HttpResponseRedirect(redirect)
 
@@ -622,13 +562,6 @@ def select_from_on_sale_weekly(request, year=None, week=None):
                              per_page=max(1, issues_on_sale.count()))
 
 
-def file_len(fname):
-    with open(fname, 'rb') as f:
-        for i, l in enumerate(f):
-            pass
-    return i + 1
-
-
 @login_required
 def import_items(request):
     if 'import_my_issues' in request.FILES:
@@ -638,88 +571,17 @@ def import_items(request):
             os.write(tmpfile_handle, chunk)
         os.close(tmpfile_handle)
 
-        number_of_lines = file_len(tmpfile_name)
-        if number_of_lines > 501:
-            messages.error(request, _('More than 500 lines. Please split'
-                                      ' the import file into smaller chunks.'))
-            return HttpResponseRedirect(urlresolvers.reverse('collections_list'))
         rawdata = open(tmpfile_name, 'rb').read()
         result = chardet.detect(rawdata)
         encoding = result['encoding']
 
-        tmpfile = open(tmpfile_name, encoding=encoding)
-        upload = csv.reader(tmpfile)
-        issues = Issue.objects.none()
-        line = next(upload)
-        not_found = ""
-        if line[0] == 'Title' and line[1] == 'Issue Number':
-            comicbookdb = True
-            publisher_col = -1
-            for i in range(2,len(line)):
-                if line[i] == 'Publisher':
-                    publisher_col = i
-            if publisher_col < 0:
-                raise ErrorWithMessage("We cannot find 'Publisher' in the "
-                                       "list of columns")
-        else:
-            comicbookdb = False
-            upload = csv.reader(tmpfile)
-        for line in upload:
-            if len(line) == 0:
-                break
-            issue = Issue.objects.none()
-            if comicbookdb:
-                if line[0][-1] == ')' and line[0][-6] == '(':
-                    series = line[0][:-6].strip()
-                    year_began = int(line[0][-5:-1])
-                else:
-                    raise ErrorWithMessage("Cannot find '(year)')")
-                try:
-                    number = line[1].strip().lstrip('#')
-                    publisher = line[publisher_col].strip()
-                except IndexError:
-                    raise ErrorWithMessage("Not enough columns")
-                if publisher == "Image Comics Inc.":
-                    publisher = "Image"
-                elif publisher == "DC Comics":
-                    publisher = "DC"
-                elif publisher == "Valiant Entertainment LLC":
-                    publisher = "Valiant Entertainment"
-                elif publisher == "Archie Comic Publications Inc.":
-                    publisher = "Archie"
-                elif publisher == "IDW Publishing":
-                    publisher = "IDW"
-                issue = Issue.objects.filter(
-                    series__name=series,
-                    number=number,
-                    series__publisher__name=publisher)
-            else:
-                if len(line) >= 2:
-                    series = line[0].strip()
-                    number = line[1].strip().lstrip('#')
-                    if series != '' and number != '':
-                        issue = Issue.objects.filter(
-                                              series__name__icontains=series,
-                                              number=number)
-                    else:
-                        issue = Issue.objects.none()
-                if len(line) >= 3:
-                    publisher = line[2].strip()
-                    if publisher != '':
-                        issue = issue.filter(
-                                series__publisher__name__icontains=publisher)
-                if len(line) >= 4:
-                    language_code = line[3].strip()
-                    if language_code != '':
-                        issue = issue.filter(
-                                series__language__code__iexact=language_code)
-            if issue.count() == 0:
-                not_found += '","'.join(line) + '\n'
-            else:
-                issues = issues | issue
-        issues = issues.distinct()
-        tmpfile.close()
-        os.remove(tmpfile_name)
+        try:
+            with open(tmpfile_name, encoding=encoding, newline='') as tmpfile:
+                issue_ids, not_found = import_issues(tmpfile)
+        finally:
+            os.remove(tmpfile_name)
+        issues = Issue.objects.filter(id__in=issue_ids)
+        not_found = ''.join('","'.join(line) + '\n' for line in not_found)
         cancel = HttpResponseRedirect(urlresolvers
                                       .reverse('collections_list'))
         return select_issues_from_preselection(request, issues, cancel,
@@ -783,13 +645,13 @@ def add_series_issues_to_collection(request, series_id):
             return return_url
 
 
-def post_process_subscription(item):
+def post_process_subscription(collection, issue_ids):
     # set last_pulled of a subscription to today for those series
     # for which at least one issue was added to the collection
-    subscription = item.issue.series.subscription_set\
-                                    .get(collection=item.collections.get())
-    subscription.last_pulled = datetime.today()
-    subscription.save()
+    Subscription.objects.filter(
+      collection=collection,
+      series__in=Issue.objects.filter(id__in=issue_ids).values('series_id'))\
+                        .update(last_pulled=datetime.today())
 
 
 @login_required
@@ -812,15 +674,11 @@ def subscribed_into_collection(request, collection_id):
                                collection_id=collection_id)
     if not collection:
         return error_return
-    issues = Issue.objects.none()
-    for subscription in collection.subscriptions.all():
-        new_issues = subscription.series.active_issues()\
-                                 .filter(created__gte=subscription.last_pulled)
-        issues |= new_issues
+    issues = new_issues(collection)
     return_url = HttpResponseRedirect(
       urlresolvers.reverse('subscriptions_collection',
                            kwargs={'collection_id': collection_id}))
-    if issues:
+    if issues.exists():
         return select_issues_from_preselection(request, issues, return_url,
           post_process_selection=post_process_subscription,
           collection_list=[collection])
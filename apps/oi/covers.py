@@ -3,6 +3,7 @@ import PIL.Image as pyImage
 import os
 import shutil
 import glob
+import uuid
 
 import django.urls as urlresolvers
 from django.conf import settings
@@ -10,19 +11,23 @@ from django.shortcuts import render, get_object_or_404
 from django.core.files import File
 from django.utils.safestring import mark_safe
 from django.utils.html import conditional_escape as esc
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, JsonResponse
+from django.core.exceptions import PermissionDenied
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.contenttypes.models import ContentType
 from apps.indexer.views import render_error
 
 from apps.gcd.models import Cover, Issue, Image
+from apps.gcd.display_cache import bump_display_versions
 from apps.gcd.views.covers import get_image_tag, get_image_tags_per_issue, \
                                   get_generic_image_tag
 
 from apps.oi.models import (
   Changeset, CoverRevision, ImageRevision, IssueRevision, StoryRevision,
   StoryType, ImageType, CTYPES, states,
-  _get_revision_lock, _free_revision_lock)
+  COVER_FILES_READY, COVER_FILES_GENERATING, COVER_FILES_MOVING,
+  COVER_FILES_FAILED, _get_revision_lock, _free_revision_lock)
+from apps.oi.jobs import enqueue_on_commit
 from apps.oi.forms import UploadScanForm, UploadVariantScanForm, \
                           GatefoldScanForm, UploadImageForm
 from apps.oi.templatetags.editing import is_locked
@@ -34,6 +39,14 @@ UPLOAD_WIDTH = 3
 
 SHOW_GATEFOLD_WIDTH = 1000
 
+# names of the file states of cover revisions for status requests
+COVER_FILE_STATUS = {
+    COVER_FILES_READY: 'ready',
+    COVER_FILES_GENERATING: 'generating',
+    COVER_FILES_MOVING: 'moving',
+    COVER_FILES_FAILED: 'failed',
+}
+
 # where to put our covers,
 LOCAL_NEW_SCANS = settings.NEW_COVERS_DIR
 
@@ -118,6 +131,12 @@ def get_preview_image_tag(revision, alt_text, zoom_level, request=None):
                 return 'only editors can view covers which were replaced'
     elif revision.deleted:
         return get_image_tag(revision.cover, esc(alt_text), zoom_level)
+    elif revision.file_status in [COVER_FILES_GENERATING, COVER_FILES_FAILED]:
+        # the scaled images are not there (yet)
+        return mark_safe('<img class="no_cover" src="' + settings.STATIC_URL +
+                         'img/nocover.gif" alt="Cover is ' +
+                         COVER_FILE_STATUS[revision.file_status] +
+                         '" class="cover_img"/>')
     else:
         suffix = "w%d/%d.jpg" % (width, revision.id)
         img_url = NEW_COVERS_LOCATION + \
@@ -164,7 +183,82 @@ def check_cover_dir(scan_dir):
         for width in [100, 200, 400]:
             _create_cover_dir(scan_dir + "/w" + str(width))
 
+def _revision_scan_name(revision):
+    """
+    Returns the file name of the uploaded scan of a cover revision, or None
+    if it is not there (anymore).
+    """
+    for name in glob.glob(revision.base_dir() + str(revision.id) + '*'):
+        if os.path.splitext(os.path.basename(name))[0] == str(revision.id):
+            return name
+    return None
+
+
+def _set_file_status(revision, file_status, only_if=None):
+    revisions = CoverRevision.objects.filter(id=revision.id)
+    if only_if is not None:
+        revisions = revisions.filter(file_status=only_if)
+    revisions.update(file_status=file_status)
+    revision.file_status = file_status
+
+
+def queue_generate_sizes(revision):
+    """
+    Generates the scaled images of an uploaded cover in the background.
+    """
+    _set_file_status(revision, COVER_FILES_GENERATING)
+    enqueue_on_commit(generate_revision_sizes, revision.id,
+                      queue=settings.COVER_JOBS_QUEUE)
+
+
+def generate_revision_sizes(revision_id):
+    """
+    Job generating the scaled images of an uploaded cover.
+
+    Re-running it just generates the images again.
+    """
+    revision = CoverRevision.objects.get(id=revision_id)
+    if revision.file_status != COVER_FILES_GENERATING:
+        # already done, or approved and moved in the meantime
+        return
+    try:
+        generate_sizes(revision, pyImage.open(_revision_scan_name(revision)))
+    except Exception:
+        _set_file_status(revision, COVER_FILES_FAILED,
+                         only_if=COVER_FILES_GENERATING)
+        raise
+    # an approval in the meantime has already queued the move
+    _set_file_status(revision, COVER_FILES_READY,
+                     only_if=COVER_FILES_GENERATING)
+
+
 def copy_approved_cover(cover_revision):
+    """
+    Moves the files of an approved cover in place in the background.
+    """
+    _set_file_status(cover_revision, COVER_FILES_MOVING)
+    enqueue_on_commit(move_approved_cover, cover_revision.id,
+                      queue=settings.COVER_JOBS_QUEUE)
+
+
+def move_approved_cover(revision_id):
+    """
+    Job moving the uploaded scan and the scaled images of an approved
+    cover revision to the directory of the cover.
+
+    Each step is skipped if it was already done, so the job can be re-run
+    after a failure.
+    """
+    cover_revision = CoverRevision.objects.get(id=revision_id)
+    try:
+        _move_approved_cover(cover_revision)
+    except Exception:
+        _set_file_status(cover_revision, COVER_FILES_FAILED)
+        raise
+    _set_file_status(cover_revision, COVER_FILES_READY)
+
+
+def _move_approved_cover(cover_revision):
     cover = cover_revision.cover
     # here we want a server error to get notice to the admins
     # that the file transfer did not take place
@@ -172,64 +266,118 @@ def copy_approved_cover(cover_revision):
 
     # replacement cover
     if cover_revision.is_replacement:
-        # get current cover
+        # get previous cover, the job runs after the approval
         old_cover = CoverRevision.objects.filter(cover=cover,
           changeset__change_type=CTYPES['cover'],
-          changeset__state=states.APPROVED).order_by('-created')[0]
+          changeset__state=states.APPROVED,
+          created__lt=cover_revision.created).order_by('-created')[0]
         if old_cover.created <= settings.NEW_SITE_COVER_CREATION_DATE:
             # uploaded file too old, not stored, copy large file
             suffix = "/uploads/%d_%s.jpg" % (cover.id,
                      old_cover.changeset.created.strftime('%Y%m%d_%H%M%S'))
             target_name = cover.base_dir() + suffix
             source_name = cover.base_dir() + "/w400/%d.jpg" % cover.id
-            shutil.move(source_name, target_name)
-
-    source_name = glob.glob(cover_revision.base_dir() + \
-                            str(cover_revision.id) + '*')[0]
-
-    target_name = "%s/uploads/%d_%s%s" % (cover.base_dir(), cover.id,
-                    cover_revision.changeset.created.strftime('%Y%m%d_%H%M%S'),
-                    os.path.splitext(source_name)[1])
-    shutil.move(source_name, target_name)
+            if not os.path.exists(target_name):
+                shutil.move(source_name, target_name)
+
+    source_name = _revision_scan_name(cover_revision)
+    upload_name = "%s/uploads/%d_%s" % (cover.base_dir(), cover.id,
+                    cover_revision.changeset.created.strftime('%Y%m%d_%H%M%S'))
+    if source_name:
+        # the scaled images are missing if the approval was faster than
+        # the generating job, which writes each of them atomically
+        if not all(os.path.exists("%s/w%d/%d.jpg" % (
+                     cover_revision.base_dir(), width, cover_revision.id))
+                   for width in [100, 200, 400]):
+            generate_sizes(cover_revision, pyImage.open(source_name))
+        shutil.move(source_name,
+                    upload_name + os.path.splitext(source_name)[1])
+    elif not glob.glob(upload_name + '*'):
+        raise IOError('Uploaded scan of cover revision %d not found.' %
+                      cover_revision.id)
 
     for width in [100, 200, 400]:
         source_name = "%s/w%d/%d.jpg" % (cover_revision.base_dir(), width,
                                          cover_revision.id)
         target_name = "%s/w%d/%d.jpg" % (cover.base_dir(), width, cover.id)
-        shutil.move(source_name, target_name)
+        if os.path.exists(source_name) or not os.path.exists(target_name):
+            shutil.move(source_name, target_name)
+
+
+def get_scaled_sizes(cover, image_size):
+    """
+    Returns the sizes of the 400, 200 and 100 pixel wide images for a scan
+    of the given size, and the box of the front part of a wraparound.
+
+    For wraparounds the 400 image shows the full scan with the front part
+    400 pixels wide, and the smaller ones only the front part.  Landscape
+    covers use the height as base size for the 400 image.
+    """
+    if cover.is_wraparound:
+        # coordinates in PIL are measured from the top/left corner
+        front = (cover.front_left, cover.front_top,
+                 cover.front_right, cover.front_bottom)
+    else:
+        front = (0, 0) + image_size
+    front_size = front[2] - front[0], front[3] - front[1]
+
+    if cover.is_wraparound:
+        # ratio between widths of full cover and its front part times 400
+        width = float(image_size[0]) / float(front_size[0])*400.
+        large = int(width), int(width / image_size[0] * image_size[1])
+        if large[1] < 400:
+            large = int(image_size[0]*400./image_size[1]), 400
+    elif front_size[0] > front_size[1]:
+        large = int(400./front_size[1]*front_size[0]), 400
+    else:
+        large = 400, int(400./front_size[0]*front_size[1])
+    sizes = {400: large}
+    for width in [200, 100]:
+        sizes[width] = width, int(float(width)/front_size[0]*front_size[1])
+    return sizes, front
+
+
+def _save_scaled(image, name):
+    # written to a temporary file and renamed, so that the move of an
+    # approved cover never finds a partly written image
+    tmp_name = '%s.%s.tmp' % (name, uuid.uuid4().hex)
+    try:
+        image.save(tmp_name, 'JPEG', subsampling='4:4:4')
+        os.rename(tmp_name, name)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
 
 
 def generate_sizes(cover, im):
+    """
+    Writes the 400, 200 and 100 pixel wide images of a cover scan.
+
+    JPEG scans are only decoded at the reduced scale still large enough
+    for the 400 image, and each smaller image is scaled down from the
+    previous one instead of from the full scan.  Each image appears at its
+    name only once completely written.
+    """
     base_dir = cover.base_dir()
+    sizes, front = get_scaled_sizes(cover, im.size)
+    full_width = float(im.size[0])
+
+    # no-op for other formats than JPEG
+    im.draft('RGB', sizes[400])
     if im.mode != "RGB":
         im = im.convert("RGB")
 
+    scaled = im.resize(sizes[400], pyImage.LANCZOS)
+    _save_scaled(scaled, "%s/w400/%d.jpg" % (base_dir, cover.id))
+
     if cover.is_wraparound:
-        # coordinates in PIL are measured from the top/left corner
-        front_part = im.crop((cover.front_left, cover.front_top,
-                              cover.front_right, cover.front_bottom))
-        full_cover = im
-        im = front_part
+        factor = scaled.size[0] / full_width
+        scaled = scaled.crop(tuple(int(round(coordinate * factor))
+                                   for coordinate in front))
 
-    for width in [100, 200, 400]:
-        scaled_name = "%s/w%d/%d.jpg" % (base_dir, width, cover.id)
-        if cover.is_wraparound and width == 400:
-            # ratio between widths of full cover and its front part times 400
-            width = float(full_cover.size[0]) / \
-                    float(cover.front_right - cover.front_left)*400.
-            size = int(width), \
-                   int(width / full_cover.size[0] * full_cover.size[1])
-            if size[1] < 400:
-                size = int(full_cover.size[0]*400./full_cover.size[1]), 400
-            scaled = full_cover.resize(size, pyImage.ANTIALIAS)
-        else:
-            if width == 400 and im.size[0] > im.size[1]:
-                # for landscape covers use height as base size
-                size = int(float(width)/im.size[1]*im.size[0]), width
-            else:
-                size = width, int(float(width)/im.size[0]*im.size[1])
-            scaled = im.resize(size, pyImage.ANTIALIAS)
-        scaled.save(scaled_name, subsampling='4:4:4')
+    for width in [200, 100]:
+        scaled = scaled.resize(sizes[width], pyImage.LANCZOS)
+        _save_scaled(scaled, "%s/w%d/%d.jpg" % (base_dir, width, cover.id))
 
 
 @login_required
@@ -246,6 +394,7 @@ def edit_covers(request, issue_id):
           request,
           'oi/edit/edit_covers.html',
           {'issue': issue,
+           'issue_locked': is_locked(issue),
            'covers': covers,
            'table_width': UPLOAD_WIDTH
           })
@@ -305,9 +454,52 @@ def uploaded_cover(request, revision_id):
                   {'marked_covers' : marked_covers,
                    'blank_issues' : blank_issues,
                    'revision': revision,
+                   'file_status': COVER_FILE_STATUS[revision.file_status],
                    'issue' : issue,
                    'tag'   : tag})
 
+
+@login_required
+def cover_file_status(request, revision_id):
+    """
+    Returns the state of the files of a cover revision as JSON, to poll
+    while they are generated or moved in the background.
+    """
+    revision = get_object_or_404(CoverRevision, id=revision_id)
+    if request.user != revision.changeset.indexer and \
+       not request.user.has_perm('indexer.can_approve'):
+        raise PermissionDenied
+    return JsonResponse({'status': COVER_FILE_STATUS[revision.file_status]})
+
+
+@login_required
+def retry_cover_files(request, revision_id):
+    """
+    Queues the generating or moving of the files of a cover revision again
+    after the background job failed.
+    """
+    if request.method != 'POST':
+        return render_error(request,
+            'This page may only be accessed through the proper form',
+            redirect=False)
+
+    revision = get_object_or_404(CoverRevision, id=revision_id)
+    if request.user != revision.changeset.indexer and \
+       not request.user.has_perm('indexer.can_approve'):
+        return render_error(request,
+          'Only the uploader or an editor can retry processing this cover.')
+
+    if revision.changeset.state == states.APPROVED:
+        if revision.file_status == COVER_FILES_FAILED:
+            copy_approved_cover(revision)
+        return HttpResponseRedirect(urlresolvers.reverse('compare',
+          kwargs={'id': revision.changeset.id}))
+
+    if revision.file_status == COVER_FILES_FAILED:
+        queue_generate_sizes(revision)
+    return HttpResponseRedirect(urlresolvers.reverse('upload_cover_complete',
+      kwargs={'revision_id': revision.id}))
+
 def process_edited_gatefold_cover(request):
     ''' process the edited gatefold cover and generate CoverRevision '''
 
@@ -375,7 +567,6 @@ def process_edited_gatefold_cover(request):
 
     shutil.move(tmp_name, destination_name)
 
-    im = pyImage.open(destination_name)
     revision.is_wraparound = True
     # convert from scaled to real values
     width = cd['width']
@@ -387,7 +578,7 @@ def process_edited_gatefold_cover(request):
     revision.front_top = top
     revision.front_bottom = top + height
     revision.save()
-    generate_sizes(revision, im)
+    queue_generate_sizes(revision)
 
     return finish_cover_revision(request, revision, cd)
 
@@ -568,7 +759,7 @@ def handle_uploaded_cover(request, cover, issue, variant=False,
                 revision.front_bottom = im.size[1]
                 revision.front_top = 0
                 revision.save()
-            generate_sizes(revision, im)
+            queue_generate_sizes(revision)
         else:
             changeset.delete()
             os.remove(destination.name)
@@ -820,6 +1011,8 @@ def mark_cover(request, marked, cover_id=None, revision_id=None):
         cover = get_object_or_404(CoverRevision, id=revision_id)
     cover.marked = marked
     cover.save()
+    if cover_id:
+        bump_display_versions([cover.issue.series])
 
     # Typically present, but not for direct URLs
     if 'HTTP_REFERER' in request.META:
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Running slow work of the editing workflow outside of the request.
+
+Jobs go to the RQ queues configured in RQ_QUEUES.  Only with
+JOBS_RUN_INLINE, for tests and setups without a redis server, are they
+simply run synchronously.  Jobs need to be safe to run more than once, as
+failed jobs are retried by re-enqueueing them.
+"""
+
+import threading
+
+import django_rq
+
+from django.conf import settings
+from django.db import transaction
+
+# per connection alias, the jobs already enqueued by the commit hooks of
+# enqueue_once_on_commit
+_enqueued = threading.local()
+
+
+def enqueue(func, *args, **kwargs):
+    """
+    Runs func(*args, **kwargs) in a worker of the given queue.
+
+    The queue defaults to 'default'.  Arguments need to be picklable,
+    so pass ids instead of model instances.
+    """
+    queue = kwargs.pop('queue', 'default')
+    if settings.JOBS_RUN_INLINE:
+        func(*args, **kwargs)
+        return None
+    return django_rq.get_queue(queue).enqueue(func, *args, **kwargs)
+
+
+def enqueue_on_commit(func, *args, **kwargs):
+    """
+    Enqueues the job once the current transaction commits, so that the
+    worker sees the data the job is about.
+    """
+    transaction.on_commit(lambda: enqueue(func, *args, **kwargs))
+
+
+def enqueue_once_on_commit(func, queue='default', using=None):
+    """
+    Enqueues func() once the current transaction commits, however often
+    this is called within the transaction, e.g. once per approved object.
+    """
+    alias = transaction.get_connection(using).alias
+    enqueued = _enqueued.__dict__.setdefault(alias, set())
+    # The hooks of a transaction all run after the calls within it, so the
+    # first hook to run enqueues the job.  The hooks of a rolled back
+    # transaction never run and leave nothing behind.
+    enqueued.discard(func)
+
+    def enqueue_once():
+        if func not in enqueued:
+            enqueued.add(func)
+            enqueue(func, queue=queue)
+    transaction.on_commit(enqueue_once, using=using)
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-16 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oi', '0035_creator_disambiguation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coverrevision',
+            name='file_status',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.28 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oi', '0037_search_index_update'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_email', models.CharField(max_length=255)),
+                ('to', models.TextField()),
+                ('cc', models.TextField(blank=True)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('fail_silently', models.BooleanField(default=False)),
+            ],
+            options={
+                'db_table': 'oi_email_notification',
+            },
+        ),
+    ]
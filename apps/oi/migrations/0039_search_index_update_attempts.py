@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-17 10:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oi', '0038_email_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchindexupdate',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -28,25 +28,29 @@ from imagekit.processors import ResizeToFit
 from taggit.managers import TaggableManager
 
 from apps.oi import states, relpath
+from apps.oi.signals import display_committed
 
 from apps.stddata.models import Country, Language, Date, Script
 from apps.stats.models import RecentIndexedIssue, CountStats
 
 from apps.gcd.models import (
     Publisher, IndiciaPublisher, BrandGroup, Brand, BrandUse, Series,
-    SeriesBond, Cover, Image, Issue, IssueCredit, PublisherCodeNumber,
-    CodeNumberType, Story, StoryCredit, Feature,
+    SeriesBond, Cover, CoverGalleryEntry, Image, Issue, IssueCredit,
+    PublisherCodeNumber, CodeNumberType, Story, StoryCredit, Feature,
     BiblioEntry, Reprint, ReprintToIssue, ReprintFromIssue, IssueReprint,
     SeriesPublicationType, SeriesBondType, StoryType, CreditType, FeatureType,
     FeatureLogo, FeatureRelation, Character, CharacterRelation,
     CharacterNameDetail, Group, GroupRelation, GroupMembership, ImageType,
-    Printer, IndiciaPrinter,
+    Printer, IndiciaPrinter, CreatorCreditSummary,
     Creator, CreatorArtInfluence, CreatorDegree, CreatorMembership,
     CreatorNameDetail, CreatorNonComicWork, CreatorSchool, CreatorRelation,
     CreatorSignature, NonComicWorkYear, Award, ReceivedAward, DataSource,
     STORY_TYPES, CREDIT_TYPES)
 
 from apps.gcd.models.gcddata import GcdData
+from apps.gcd.display_cache import bump_changeset_version, \
+                                   bump_display_versions, \
+                                   bump_display_versions_by_id
 
 from apps.gcd.models.issue import issue_descriptor
 from apps.gcd.models.story import show_feature, show_feature_as_text
@@ -145,6 +149,13 @@ IMP_IMAGE_VALUE = 5
 IMP_APPROVER_VALUE = 3
 IMP_DELETE = 1
 
+# State of the image files of a cover revision, which are generated and
+# moved in the background.
+COVER_FILES_READY = 0
+COVER_FILES_GENERATING = 1
+COVER_FILES_MOVING = 2
+COVER_FILES_FAILED = 3
+
 # Reprint link type "constants"
 REPRINT_TYPES = {
     'story_to_story': 0,
@@ -177,27 +188,8 @@ def update_count(field, delta, language=None, country=None):
     updates statistics, for all, per language, and per country
     CountStats with language=None is for all languages
     '''
-    stat = CountStats.objects.get(name=field, language=None, country=None)
-    stat.count = F('count') + delta
-    stat.save()
-
-    if language:
-        stat = CountStats.objects.filter(name=field, language=language)
-        if stat.count():
-            stat = stat[0]
-            stat.count = F('count') + delta
-            stat.save()
-        else:
-            CountStats.objects.init_stats(language=language)
-
-    if country:
-        stat = CountStats.objects.filter(name=field, country=country)
-        if stat.count():
-            stat = stat[0]
-            stat.count = F('count') + delta
-            stat.save()
-        else:
-            CountStats.objects.init_stats(country=country)
+    CountStats.objects.update_count(field, delta, language=language,
+                                    country=country)
 
 
 def set_series_first_last(series):
@@ -314,6 +306,29 @@ def _imps_for_years(revision, field_name, year_began, year_ended):
     return False, None
 
 
+def _issue_with_variants(issue):
+    """
+    The issue and its variants, whose pages show the stories of the issue.
+    """
+    return [issue] + list(issue.active_variants())
+
+
+def _issue_ids_showing(stories, issues=None):
+    """
+    The ids of the issues showing the stories or issues of the querysets,
+    including the variants of the issues with the stories.
+    """
+    issue_ids = set(stories.filter(deleted=False)
+                           .values_list('issue_id', flat=True))
+    issue_ids |= set(Issue.objects.filter(variant_of_id__in=issue_ids,
+                                          deleted=False)
+                                  .values_list('id', flat=True))
+    if issues is not None:
+        issue_ids |= set(issues.filter(deleted=False)
+                               .values_list('id', flat=True))
+    return issue_ids
+
+
 class Changeset(models.Model):
 
     state = models.IntegerField(db_index=True)
@@ -837,33 +852,41 @@ class Changeset(models.Model):
             raise ErrorWithMessage(
                   "Only REVIEWING changes with an approver can be approved.")
 
-        for revision in self.revisions:
-            # TODO rethink the depency handling during committing
-            #
-            # We might have saved other revision due to dependencies.
-            # Other types, later in the itertools.chain, are fresh,
-            # but revision of the same type can became stale
-            # in self.revisions, so refresh_from_db. Could do a
-            # check for type, i.e. same as before, to reduce db calls.
-            # save the source status before the refresh for locks ?
-            source = revision.source
-
-            revision.refresh_from_db()
-
-            # For adds we might generate additional revisions, and call
-            # commit_to_display when generating these approvals. Check
-            # committed status to avoid double adds.
-            # TODO check regarding stats
-            # TODO revision generated later in the chain will be
-            #      picked by up self.revisions anyway, so maybe not needed
-            #      for purpose of avoiding double adds.
-            #      But check shouldn't hurt anyway ?
-            if revision.committed is not True:
-                # adds have a (created) source only after commit_to_display
-                if source:
-                    _free_revision_lock(source)
-                # first free the lock, commit_to_display might delete source
-                revision.commit_to_display()
+        # credit summaries which the changes might remove credits from,
+        # as long as the summaries are not built there are none to update
+        maintain_summaries = CreatorCreditSummary.objects.is_maintained()
+        if maintain_summaries:
+            credit_summary_keys = self._credit_summary_keys()
+
+        # the statistics are updated at once after all revisions
+        with CountStats.objects.batch():
+            for revision in self.revisions:
+                # TODO rethink the depency handling during committing
+                #
+                # We might have saved other revision due to dependencies.
+                # Other types, later in the itertools.chain, are fresh,
+                # but revision of the same type can became stale
+                # in self.revisions, so refresh_from_db. Could do a
+                # check for type, i.e. same as before, to reduce db calls.
+                # save the source status before the refresh for locks ?
+                source = revision.source
+
+                revision.refresh_from_db()
+
+                # For adds we might generate additional revisions, and call
+                # commit_to_display when generating these approvals. Check
+                # committed status to avoid double adds.
+                # TODO check regarding stats
+                # TODO revision generated later in the chain will be
+                #      picked by up self.revisions anyway, so maybe not needed
+                #      for purpose of avoiding double adds.
+                #      But check shouldn't hurt anyway ?
+                if revision.committed is not True:
+                    # adds have a (created) source only after commit_to_display
+                    if source:
+                        _free_revision_lock(source)
+                    # first free the lock, commit_to_display might delete source
+                    revision.commit_to_display()
 
         self.comments.create(commenter=self.approver,
                              text=notes,
@@ -876,9 +899,35 @@ class Changeset(models.Model):
         self.approver.indexer.add_imps(IMP_APPROVER_VALUE)
 
         # TODO remove once all type of revisions are re-factored
+        display_objects = []
+        display_issue_ids = set()
+        gallery_series = set()
         for revision in self.revisions:
             revision.committed = True
             revision.save()
+            display_objects.extend(revision._get_display_objects())
+            display_issue_ids |= revision._get_display_issue_ids()
+            gallery_series.update(revision._get_cover_gallery_series())
+        for series in gallery_series:
+            CoverGalleryEntry.objects.update_series(series)
+        if maintain_summaries:
+            for kind, keys in self._credit_summary_keys().items():
+                credit_summary_keys[kind] |= keys
+            CreatorCreditSummary.objects.update_keys(credit_summary_keys)
+        bump_display_versions(display_objects)
+        bump_display_versions_by_id('issue', display_issue_ids)
+
+    def _credit_summary_keys(self):
+        """
+        The credit summaries the credits of the stories and issues of this
+        changeset currently count for.
+        """
+        story_ids = self.storyrevisions.exclude(story=None)\
+                                       .values_list('story_id', flat=True)
+        issue_ids = self.issuerevisions.exclude(issue=None)\
+                                       .values_list('issue_id', flat=True)
+        return CreatorCreditSummary.objects.affected_keys(list(story_ids),
+                                                          list(issue_ids))
 
     def disapprove(self, notes=''):
         """
@@ -1084,6 +1133,49 @@ class RevisionLock(models.Model):
     locked_object = GenericForeignKey('content_type', 'object_id')
 
 
+class SearchIndexUpdate(models.Model):
+    """
+    Outbox of display objects committed by approved changes whose search
+    index documents still need to be updated, written in the transaction
+    of the approval.  See apps.oi.search_outbox.
+    """
+    class Meta:
+        db_table = 'oi_search_index_update'
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.IntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.IntegerField(default=0)
+
+
+class EmailNotification(models.Model):
+    """
+    Outbox of e-mails of the editing workflow, written in the transaction
+    that causes them and sent after it commits.  See apps.oi.notifications.
+    """
+    class Meta:
+        db_table = 'oi_email_notification'
+
+    from_email = models.CharField(max_length=255)
+    to = models.TextField()
+    cc = models.TextField(blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.IntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    # dropped after a failed attempt instead of retried
+    fail_silently = models.BooleanField(default=False)
+
+    @property
+    def recipients(self):
+        return self.to.split('\n')
+
+    @property
+    def cc_recipients(self):
+        return self.cc.split('\n') if self.cc else []
+
+
 class RevisionManager(models.Manager):
     """
     Custom manager base class for revisions.
@@ -1271,6 +1363,17 @@ class Revision(models.Model):
         """
         raise NotImplementedError
 
+    def save(self, *args, **kwargs):
+        super(Revision, self).save(*args, **kwargs)
+        # invalidates the cached queue summary of the changeset
+        if self.changeset_id:
+            bump_changeset_version(self.changeset_id)
+
+    def delete(self, *args, **kwargs):
+        if self.changeset_id:
+            bump_changeset_version(self.changeset_id)
+        return super(Revision, self).delete(*args, **kwargs)
+
     # #####################################################################
     # Properties indicating the type of action this Revision is performing.
     @property
@@ -1950,6 +2053,31 @@ class Revision(models.Model):
         """
         pass
 
+    def _get_display_objects(self):
+        """
+        Returns the display objects whose pages show data of this revision.
+
+        Their cached display fragments are invalidated on approval.
+        Child classes whose data is shown on the page of another object,
+        e.g. stories on the issue page, should override this.
+        """
+        return [self.source]
+
+    def _get_display_issue_ids(self):
+        """
+        Returns the ids of the issues whose pages show data of this revision.
+
+        Used instead of _get_display_objects for objects shown on the pages
+        of possibly many issues, e.g. creator names in the credits.
+        """
+        return set()
+
+    def _get_cover_gallery_series(self):
+        """
+        Returns the series whose cover gallery order changed by this revision.
+        """
+        return []
+
     def _copy_fields_to(self, target):
         """
         Used to copy fields from a revision to a display object.
@@ -2041,6 +2169,10 @@ class Revision(models.Model):
             self._adjust_stats(changes, old_stats, new_stats)
         self._handle_dependents(changes)
 
+        committed = deleted_source if self.deleted else self.source
+        if committed:
+            display_committed.send(sender=type(committed), instance=committed)
+
     # #####################################################################
     # Methods not involved in the Revision lifecycle.
 
@@ -3021,6 +3153,8 @@ class CoverRevision(Revision):
     front_top = models.IntegerField(default=0, null=True)
 
     file_source = models.CharField(max_length=255, null=True)
+    file_status = models.IntegerField(default=COVER_FILES_READY,
+                                      db_index=True)
 
     def _get_source(self):
         return self.cover
@@ -3028,6 +3162,19 @@ class CoverRevision(Revision):
     def _get_source_name(self):
         return 'cover'
 
+    def _get_display_objects(self):
+        # covers also show on the base issue of a variant, and the
+        # series is needed for the cover gallery page of the issue
+        issue = self.cover.issue if self.cover else self.issue
+        return [issue, issue.variant_of, issue.series]
+
+    def _get_cover_gallery_series(self):
+        # for cover moves self.issue is the old issue of the cover
+        series = [self.issue.series]
+        if self.cover:
+            series.append(self.cover.issue.series)
+        return series
+
     def _get_blank_values(self):
         """
         Covers don't do field comparisons, so just return an empty
@@ -3138,7 +3285,10 @@ class CoverRevision(Revision):
                 not (self.deleted and
                      (self.previous().created <
                       settings.NEW_SITE_COVER_CREATION_DATE))):
-                if self.changeset.state == states.APPROVED or self.deleted:
+                # until the background job has moved them, the files of
+                # an approved cover are still in the upload directory
+                if (self.changeset.state == states.APPROVED and
+                    self.file_status == COVER_FILES_READY) or self.deleted:
                     if self.deleted:
                         suffix = "/uploads/%d_%s" % (
                             self.cover.id,
@@ -3680,6 +3830,9 @@ class IssueCreditRevision(Revision):
     def source(self, value):
         self.issue_credit = value
 
+    def _get_display_objects(self):
+        return [self.issue_revision.issue]
+
     def _pre_save_object(self, changes):
         self.issue_credit.issue = self.issue_revision.issue
 
@@ -3816,6 +3969,24 @@ class IssueRevision(Revision):
     def source(self, value):
         self.issue = value
 
+    def _get_display_objects(self):
+        # The series needs to be included for the neighbouring issues,
+        # and a base issue shows its variants, which in turn show its stories.
+        objects = _issue_with_variants(self.issue) + [self.series,
+                                                     self.variant_of]
+        if self.series_changed:
+            objects.append(self.previous_revision.series)
+        return objects
+
+    def _get_cover_gallery_series(self):
+        # Edits keep the sort code, only adds, deletes and moves
+        # change the order of the issues.
+        if self.series_changed:
+            return [self.series, self.previous_revision.series]
+        if self.added or self.deleted:
+            return [self.series]
+        return []
+
     @property
     def series_changed(self):
         """ True if the series changed and this is neither add nor delete. """
@@ -4017,12 +4188,15 @@ class IssueRevision(Revision):
 
         num_issues = self._same_series_revisions().count()
         if later_issues.last().sort_code - after_code > num_issues:
-            # Someone else already made space here.
+            # Someone else already made space here, or the sort codes
+            # have a large enough gap.
             return
 
-        for later_issue in later_issues:
-            later_issue.sort_code += num_issues
-            later_issue.save()
+        from apps.oi.sort_codes import apply_sort_codes, gapped_sort_codes
+        apply_sort_codes(
+          gapped_sort_codes(later_issues.order_by('sort_code'),
+                            after_code + num_issues + 1),
+          'sort_code', scope=Issue.objects.filter(series=self.series))
 
     def _handle_prerequisites(self, changes):
         if self.edited and not self.series_changed:
@@ -4845,6 +5019,9 @@ class StoryCreditRevision(Revision):
     def source(self, value):
         self.story_credit = value
 
+    def _get_display_objects(self):
+        return _issue_with_variants(self.story_revision.issue)
+
     def _handle_prerequisites(self, changes):
         if self.signed_as:
             creator = self.creator.creator
@@ -4966,6 +5143,9 @@ class StoryRevision(Revision):
     def source(self, value):
         self.story = value
 
+    def _get_display_objects(self):
+        return _issue_with_variants(self.issue)
+
     @classmethod
     def _get_stats_category_field_tuples(cls):
         return frozenset({('issue', 'series', 'country',),
@@ -5897,6 +6077,12 @@ class FeatureRevision(Revision):
     def source(self, value):
         self.feature = value
 
+    def _get_display_issue_ids(self):
+        if self.added:
+            return set()
+        return _issue_ids_showing(
+          Story.objects.filter(feature_object=self.feature))
+
     def _pre_initial_save(self, fork=False, fork_source=None,
                           exclude=frozenset(), **kwargs):
         self.leading_article = self.feature.name != self.feature.sort_name
@@ -5984,6 +6170,12 @@ class FeatureLogoRevision(Revision):
     def source(self, value):
         self.feature_logo = value
 
+    def _get_display_issue_ids(self):
+        if self.added:
+            return set()
+        return _issue_ids_showing(
+          Story.objects.filter(feature_logo=self.feature_logo))
+
     def _pre_initial_save(self, fork=False, fork_source=None,
                           exclude=frozenset(), **kwargs):
         self.leading_article = (self.feature_logo.name !=
@@ -6770,6 +6962,14 @@ class ReprintRevision(Revision):
         else:
             return None
 
+    def _get_display_objects(self):
+        objects = [self.origin_issue, self.target_issue]
+        if self.origin_story:
+            objects.append(self.origin_story.issue)
+        if self.target_story:
+            objects.append(self.target_story.issue)
+        return objects
+
     def _get_source_name(self):
         # is also used to determine which prevision revision to use
         # when reserving a reprint link
@@ -7120,6 +7320,9 @@ class ImageRevision(Revision):
     def _get_source_name(self):
         return 'image'
 
+    def _get_display_objects(self):
+        return [self.object]
+
     def _get_blank_values(self):
         """
         Images don't do field comparisons, so just return an empty
@@ -7210,6 +7413,13 @@ class AwardRevision(Revision):
     def source(self, value):
         self.award = value
 
+    def _get_display_issue_ids(self):
+        if self.added:
+            return set()
+        return _issue_ids_showing(
+          Story.objects.filter(awards__award=self.award),
+          Issue.objects.filter(awards__award=self.award))
+
     def get_absolute_url(self):
         if self.award is None:
             return "/award/revision/%i/preview" % self.id
@@ -7274,6 +7484,18 @@ class ReceivedAwardRevision(Revision):
     def source(self, value):
         self.received_award = value
 
+    def _get_display_issue_ids(self):
+        # the award is shown with the story or issue receiving it
+        received_award = self.received_award
+        if received_award.content_type == \
+           ContentType.objects.get_for_model(Story):
+            return _issue_ids_showing(
+              Story.objects.filter(id=received_award.object_id))
+        if received_award.content_type == \
+           ContentType.objects.get_for_model(Issue):
+            return set([received_award.object_id])
+        return set()
+
     def _do_complete_added_revision(self, recipient=None, award=None):
         self.recipient = recipient
         self.award = award
@@ -7577,6 +7799,14 @@ class CreatorRevision(Revision):
     def source(self, value):
         self.creator = value
 
+    def _get_display_issue_ids(self):
+        # the creator names are shown in the credits
+        if self.added:
+            return set()
+        return _issue_ids_showing(
+          Story.objects.filter(credits__creator__creator=self.creator),
+          Issue.objects.filter(credits__creator__creator=self.creator))
+
     def _pre_initial_save(self, fork=False, fork_source=None,
                           exclude=frozenset(), **kwargs):
         # clone date instances
@@ -8039,6 +8269,13 @@ class CreatorNameDetailRevision(Revision):
     def source(self, value):
         self.creator_name_detail = value
 
+    def _get_display_issue_ids(self):
+        if self.added:
+            return set()
+        return _issue_ids_showing(
+          Story.objects.filter(credits__creator=self.creator_name_detail),
+          Issue.objects.filter(credits__creator=self.creator_name_detail))
+
     def _do_complete_added_revision(self, creator_revision):
         self.creator_revision = creator_revision
 
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+E-mails of the editing workflow.
+
+The views approving, disapproving or discussing changes hold locks on the
+changeset until the request commits, so they don't talk to the mail
+server.  Their e-mails are written as EmailNotification rows in the same
+transaction, and sent by a job on NOTIFICATION_QUEUE once it commits.
+E-mails of a rolled back request are never sent.  Failed e-mails stay in
+the outbox and are retried by the next job, up to NOTIFICATION_MAX_ATTEMPTS
+times, unless queued to fail silently; scripts/deliver_notifications.py
+retries them from cron.  The mail server is never contacted in the request,
+so with JOBS_RUN_INLINE the e-mails are only sent by that script.
+"""
+
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+
+from apps.oi.jobs import enqueue_once_on_commit
+from apps.oi.models import EmailNotification
+
+logger = logging.getLogger(__name__)
+
+# number of e-mails locked and sent per transaction
+BATCH_SIZE = 100
+
+
+def queue_email(to, subject, body, from_email=None, cc=(),
+                fail_silently=False):
+    """
+    Adds an e-mail to the outbox, to be sent after the current transaction
+    commits.  With fail_silently, a failed e-mail is dropped without
+    logging an error.
+    """
+    notification = EmailNotification.objects.create(
+      from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+      to='\n'.join(to), cc='\n'.join(cc), subject=subject, body=body,
+      fail_silently=fail_silently)
+    if not settings.JOBS_RUN_INLINE:
+        enqueue_once_on_commit(deliver_notifications,
+                               queue=settings.NOTIFICATION_QUEUE)
+    return notification
+
+
+def email_user(user, subject, message, from_email=None):
+    """
+    Queued replacement of User.email_user.
+    """
+    return queue_email([user.email], subject, message, from_email)
+
+
+def _message(notification, connection):
+    return EmailMessage(subject=notification.subject,
+                        body=notification.body,
+                        from_email=notification.from_email,
+                        to=notification.recipients,
+                        cc=notification.cc_recipients,
+                        connection=connection)
+
+
+def deliver_notifications(batch_size=BATCH_SIZE):
+    """
+    Sends the e-mails in the outbox, deleting the sent ones.  Returns the
+    number of e-mails sent.
+
+    The rows of a batch are locked while sending, so concurrent jobs don't
+    send an e-mail twice.
+    """
+    sent = 0
+    last_id = 0
+    with get_connection(settings.NOTIFICATION_EMAIL_BACKEND) as connection:
+        while True:
+            with transaction.atomic():
+                notifications = list(
+                  EmailNotification.objects.select_for_update()
+                  .filter(id__gt=last_id,
+                          attempts__lt=settings.NOTIFICATION_MAX_ATTEMPTS)
+                  .order_by('id')[:batch_size])
+                if not notifications:
+                    return sent
+                delivered = []
+                dropped = []
+                for notification in notifications:
+                    try:
+                        _message(notification, connection).send()
+                    except Exception as error:
+                        if notification.fail_silently:
+                            logger.info('Dropped e-mail %d: %r',
+                                        notification.id, error)
+                            dropped.append(notification.id)
+                            continue
+                        notification.attempts += 1
+                        notification.last_error = repr(error)
+                        notification.save(update_fields=['attempts',
+                                                         'last_error'])
+                        log = logger.error if notification.attempts >= \
+                          settings.NOTIFICATION_MAX_ATTEMPTS else \
+                          logger.warning
+                        log('Sending e-mail %d failed (attempt %d): %r',
+                            notification.id, notification.attempts, error)
+                    else:
+                        delivered.append(notification.id)
+                EmailNotification.objects.filter(id__in=delivered + dropped)\
+                                         .delete()
+            sent += len(delivered)
+            last_id = notifications[-1].id
+
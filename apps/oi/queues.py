@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Assembly of the editing, pending and reviews queues.
+
+All changesets of a queue are fetched with one query and grouped into the
+sections of the queue in Python.  What the queues show about the revisions
+of a changeset, its name, descriptor, action, whether it is editable and
+the country of its flag, needs several queries per changeset, so it is
+cached per changeset, keyed on the version of the changeset which is
+bumped whenever one of its revisions is saved.  Names of other objects in
+the summaries, e.g. of the series of an issue, can be outdated for up to
+QUEUE_SUMMARY_CACHE_TIMEOUT.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+
+from apps.gcd.display_cache import get_display_versions
+from apps.oi.models import Changeset, CTYPES
+
+# The sections of the queues, in the order shown, with the change types
+# in the section, the path to the country shown as flag, and whether the
+# section is ordered by the state first.
+QUEUE_SECTIONS = [
+  ('Awards', 'award', ['award'], None, False),
+  ('Creators', 'creator', ['creator'],
+   'creatorrevisions__birth_country__id', False),
+  ('Creator Signatures', 'creator_signature', ['creator_signature'],
+   'creatorsignaturerevisions__creator__birth_country__id', False),
+  ('Publishers', 'publisher', ['publisher'],
+   'publisherrevisions__country__id', False),
+  ('Indicia / Colophon Publishers', 'indicia_publisher',
+   ['indicia_publisher'], 'indiciapublisherrevisions__country__id', False),
+  ('Brand Groups', 'brand_groups', ['brand_group'],
+   'brandgrouprevisions__parent__country__id', False),
+  ('Brand Emblems', 'brands', ['brand'],
+   'brandrevisions__group__parent__country__id', False),
+  ('Brand Uses', 'brand_uses', ['brand_use'],
+   'branduserevisions__publisher__country__id', False),
+  ('Printers', 'printer', ['printer'],
+   'printerrevisions__country__id', False),
+  ('Indicia Printers', 'indicia_printer', ['indicia_printer'],
+   'indiciaprinterrevisions__country__id', False),
+  ('Series', 'series', ['series'], 'seriesrevisions__country__id', False),
+  ('Features', 'feature', ['feature'], None, False),
+  ('Feature Logos', 'feature_logo', ['feature_logo'], None, False),
+  ('Characters', 'character', ['character'], None, False),
+  ('Groups', 'group', ['group'], None, False),
+  ('Group Memberships', 'group_membership', ['group_membership'], None,
+   False),
+  ('Issue Skeletons', 'issue', ['issue_add'],
+   'issuerevisions__series__country__id', False),
+  ('Issue Bulk Changes', 'issue', ['issue_bulk'],
+   'issuerevisions__series__country__id', True),
+  ('Issues', 'issue', ['issue', 'variant_add', 'two_issues'],
+   'issuerevisions__series__country__id', True),
+  ('Received Awards', 'received_award', ['received_award'], None, False),
+  ('Creator Art Influences', 'creator_art_influence',
+   ['creator_art_influence'],
+   'creatorartinfluencerevisions__creator__birth_country__id', False),
+  ('Creator Degrees', 'creator_degree', ['creator_degree'],
+   'creatordegreerevisions__creator__birth_country__id', False),
+  ('Creator Memberships', 'creator_membership', ['creator_membership'],
+   'creatormembershiprevisions__creator__birth_country__id', False),
+  ('Creator Non Comic Works', 'creator_non_comic_work',
+   ['creator_non_comic_work'],
+   'creatornoncomicworkrevisions__creator__birth_country__id', False),
+  ('Creator Relations', 'creator_relation', ['creator_relation'],
+   'creatorrelationrevisions__from_creator__birth_country__id', False),
+  ('Creator Schools', 'creator_school', ['creator_school'],
+   'creatorschoolrevisions__creator__birth_country__id', False),
+  ('Series Bonds', 'series_bond', ['series_bond'],
+   'seriesbondrevisions__origin__country__id', False),
+  ('Feature Relations', 'feature_relation', ['feature_relation'], None,
+   False),
+  ('Character Relations', 'character_relation', ['character_relation'],
+   None, False),
+  ('Group Relations', 'group_relation', ['group_relation'], None, False),
+  ('Covers', 'cover', ['cover'],
+   'coverrevisions__issue__series__country__id', True),
+  ('Images', 'image', ['image'], None, True),
+]
+
+
+class QueueSection(object):
+    def __init__(self, object_name, object_type, country_path,
+                 order_by_state):
+        self.object_name = object_name
+        self.object_type = object_type
+        self.country_path = country_path
+        self.order_by_state = order_by_state
+        self.changesets = []
+
+
+def _summary_key(changeset_id, version):
+    return 'queue_summary_%d_%d' % (changeset_id, version)
+
+
+def _revision_summary(changeset):
+    return {
+      'queue_name': changeset.queue_name(),
+      'queue_descriptor': changeset.queue_descriptor(),
+      'changeset_action': changeset.changeset_action(),
+      'editable': changeset.editable(),
+    }
+
+
+def _compute_summaries(section, changesets):
+    summaries = {}
+    countries = {}
+    if section.country_path:
+        countries = dict(Changeset.objects
+                                  .filter(id__in=[changeset.id
+                                                  for changeset in changesets])
+                                  .order_by().values_list('id')
+                                  .annotate(country=Max(section.country_path)))
+    for changeset in changesets:
+        summary = _revision_summary(changeset)
+        summary['country'] = countries.get(changeset.id)
+        summaries[changeset.id] = summary
+    return summaries
+
+
+def queue_sections(**kwargs):
+    """
+    Returns the sections of the queue with the changesets selected by the
+    keyword arguments, each changeset with the summary of its revisions
+    set as queue_summary and its country.
+    """
+    sections = []
+    section_for_type = {}
+    for object_name, object_type, change_types, country_path, \
+            order_by_state in QUEUE_SECTIONS:
+        section = QueueSection(object_name, object_type, country_path,
+                               order_by_state)
+        sections.append(section)
+        for change_type in change_types:
+            section_for_type[CTYPES[change_type]] = section
+
+    changesets = list(Changeset.objects.filter(
+      change_type__in=list(section_for_type), **kwargs)
+                               .select_related('indexer__indexer',
+                                               'approver__indexer')
+                               .order_by('modified', 'id'))
+    for changeset in changesets:
+        section_for_type[changeset.change_type].changesets.append(changeset)
+
+    versions = get_display_versions('changeset',
+                                    [changeset.id for changeset in changesets])
+    keys = dict((changeset.id, _summary_key(changeset.id,
+                                            versions[changeset.id]))
+                for changeset in changesets)
+    cached = cache.get_many(list(keys.values()))
+    summaries = {}
+    for section in sections:
+        missing = [changeset for changeset in section.changesets
+                   if keys[changeset.id] not in cached]
+        if missing:
+            summaries.update(_compute_summaries(section, missing))
+    if summaries:
+        cache.set_many(dict((keys[changeset_id], summary)
+                            for changeset_id, summary in summaries.items()),
+                       settings.QUEUE_SUMMARY_CACHE_TIMEOUT)
+
+    for changeset in changesets:
+        summary = summaries.get(changeset.id) or cached[keys[changeset.id]]
+        changeset.queue_summary = summary
+        changeset.country = summary['country']
+
+    for section in sections:
+        if section.order_by_state:
+            # stable, so within a state still by modified and id
+            section.changesets.sort(key=lambda changeset: changeset.state)
+    return sections
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Keeping the search index current with the approved changes.
+
+OutboxSignalProcessor, set as HAYSTACK_SIGNAL_PROCESSOR, records the
+indexed display objects committed by Revision.commit_to_display as
+SearchIndexUpdate rows in the transaction of the approval.  Once that
+commits, a job updates the documents of the recorded objects in bulk and
+removes those of deleted objects.  Rows are only deleted after their
+objects were indexed.  If a bulk update fails, the objects are indexed one
+by one, and the rows of the ones still failing stay in the outbox and are
+retried by the next job, up to SEARCH_INDEX_MAX_ATTEMPTS times, so they
+don't hold up the other updates.  scripts/process_search_outbox.py retries
+them from cron.
+
+Updating the index is never done in the request, so with JOBS_RUN_INLINE
+nothing is recorded and the index is updated with update_index instead.
+"""
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from haystack import connections
+from haystack.exceptions import NotHandled
+from haystack.signals import BaseSignalProcessor
+
+from apps.oi.jobs import enqueue_once_on_commit
+from apps.oi.models import SearchIndexUpdate
+from apps.oi.signals import display_committed
+
+logger = logging.getLogger(__name__)
+
+# number of outbox rows handled per bulk update
+BATCH_SIZE = 500
+
+
+def _is_indexed(model, using='default'):
+    try:
+        connections[using].get_unified_index().get_index(model)
+    except NotHandled:
+        return False
+    return True
+
+
+def index_objects(model, object_ids, using='default'):
+    """
+    Updates the documents of the objects of the model with the ids, and
+    removes the documents of those no longer in the index queryset.
+    """
+    index = connections[using].get_unified_index().get_index(model)
+    backend = connections[using].get_backend()
+    objects = list(index.index_queryset(using=using)
+                        .filter(id__in=object_ids))
+    if objects:
+        backend.update(index, objects)
+    for object_id in set(object_ids) - set(obj.id for obj in objects):
+        backend.remove('%s.%d' % (model._meta.label_lower, object_id))
+
+
+def _index_updates(updates, using):
+    """
+    Indexes the objects of the outbox rows.  Returns the set of the
+    (content type id, object id) pairs of the objects that failed.
+    """
+    object_ids = defaultdict(set)
+    for update in updates:
+        object_ids[update.content_type_id].add(update.object_id)
+    failed = set()
+    for content_type_id, ids in object_ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        try:
+            index_objects(model, ids, using)
+        except Exception:
+            # find the objects failing, to not hold up the others
+            for object_id in sorted(ids):
+                try:
+                    index_objects(model, [object_id], using)
+                except Exception as error:
+                    logger.warning('Indexing %s %d failed: %r',
+                                   model._meta.label_lower, object_id, error)
+                    failed.add((content_type_id, object_id))
+    return failed
+
+
+def process_outbox(batch_size=BATCH_SIZE, using='default'):
+    """
+    Indexes the objects recorded in the outbox, in batches, deleting the
+    rows of the indexed ones.  Returns the number of rows handled.
+    """
+    handled = 0
+    last_id = 0
+    while True:
+        updates = list(SearchIndexUpdate.objects.filter(
+          id__gt=last_id, attempts__lt=settings.SEARCH_INDEX_MAX_ATTEMPTS)
+                                        .order_by('id')[:batch_size])
+        if not updates:
+            return handled
+        failed = _index_updates(updates, using)
+        done = [update.id for update in updates
+                if (update.content_type_id, update.object_id) not in failed]
+        retried = [update for update in updates if update.id not in done]
+        SearchIndexUpdate.objects.filter(id__in=done).delete()
+        if retried:
+            SearchIndexUpdate.objects.filter(
+              id__in=[update.id for update in retried])\
+                                     .update(attempts=F('attempts') + 1)
+            for update in retried:
+                if update.attempts + 1 >= settings.SEARCH_INDEX_MAX_ATTEMPTS:
+                    logger.error('Gave up indexing object %d of content '
+                                 'type %d, outbox row %d.', update.object_id,
+                                 update.content_type_id, update.id)
+        handled += len(done)
+        last_id = updates[-1].id
+
+
+class OutboxSignalProcessor(BaseSignalProcessor):
+    """
+    Records the indexed objects committed by approved changes, instead of
+    updating their documents during the approval.
+    """
+    def setup(self):
+        display_committed.connect(self.handle_commit)
+
+    def teardown(self):
+        display_committed.disconnect(self.handle_commit)
+
+    def handle_commit(self, sender, instance, **kwargs):
+        if settings.JOBS_RUN_INLINE or not _is_indexed(sender):
+            return
+        SearchIndexUpdate.objects.create(
+          content_type=ContentType.objects.get_for_model(sender),
+          object_id=instance.id)
+        enqueue_once_on_commit(process_outbox,
+                               queue=settings.SEARCH_INDEX_QUEUE)
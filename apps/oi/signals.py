@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Signals of the editing workflow.
+"""
+
+from django.dispatch import Signal
+
+# Sent by Revision.commit_to_display for the display object written, which
+# for deletions is the deleted object, with the object as instance.
+display_committed = Signal(providing_args=['instance'])
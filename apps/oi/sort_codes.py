@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+Rewriting the sort codes of issues and the sequence numbers of stories.
+
+The new codes are computed in memory and written with bulk updates instead
+of saving each object.  Sort codes of issues are unique per series, and
+MySQL checks unique keys row by row within an UPDATE, so unique codes are
+written in two phases: the changed objects are first moved above all
+codes in use, and then to their new codes.
+
+Issues are numbered with gaps of SORT_CODE_GAP, so that issues added
+between two others usually fit without moving the later ones.
+"""
+
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.gcd.display_cache import bump_changeset_version
+from apps.oi.models import Revision
+
+# objects written per UPDATE
+BATCH_SIZE = 500
+
+
+def gapped_sort_codes(objects, first_code, gap=None):
+    """
+    Returns (object, code) pairs numbering the objects in their order,
+    starting at first_code with gaps of SORT_CODE_GAP.
+    """
+    if gap is None:
+        gap = settings.SORT_CODE_GAP
+    return [(obj, first_code + gap * index)
+            for index, obj in enumerate(objects)]
+
+
+def _bulk_update(model, objects, fields):
+    if any(model_field.name == 'modified'
+           for model_field in model._meta.concrete_fields):
+        now = timezone.now()
+        for obj in objects:
+            obj.modified = now
+        fields = fields + ['modified']
+    model.objects.bulk_update(objects, fields, batch_size=BATCH_SIZE)
+
+
+def apply_sort_codes(sort_codes, field, scope=None):
+    """
+    Sets the codes of the (object, code) pairs in the field, writing only
+    the changed ones.
+
+    If the codes are unique, scope is the queryset of all objects sharing
+    the codes, e.g. all issues of the series including the deleted ones.
+    The new codes must not collide with the codes of objects in scope that
+    are not part of sort_codes.
+    """
+    changed = [(obj, code) for obj, code in sort_codes
+               if getattr(obj, field) != code]
+    if not changed:
+        return []
+    model = type(changed[0][0])
+    objects = [obj for obj, code in changed]
+
+    if scope is not None:
+        used = scope.aggregate(Max(field))['%s__max' % field]
+        offset = max(used if used is not None else 0,
+                     max(code for obj, code in changed)) + 1
+        for index, obj in enumerate(objects):
+            setattr(obj, field, offset + index)
+        _bulk_update(model, objects, [field])
+
+    for obj, code in changed:
+        setattr(obj, field, code)
+    _bulk_update(model, objects, [field])
+
+    if issubclass(model, Revision):
+        # Revision.save isn't called
+        for changeset_id in set(obj.changeset_id for obj in objects):
+            bump_changeset_version(changeset_id)
+    return objects
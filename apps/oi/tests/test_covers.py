@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+
+import os
+from datetime import datetime
+
+import mock
+import pytest
+import PIL.Image as pyImage
+
+from django.core.exceptions import PermissionDenied
+
+from apps.oi.covers import queue_generate_sizes, generate_revision_sizes, \
+                           _move_approved_cover, get_scaled_sizes, \
+                           generate_sizes, cover_file_status
+from apps.oi.models import CoverRevision, COVER_FILES_READY, \
+                           COVER_FILES_GENERATING, COVER_FILES_FAILED
+
+
+COVERS = 'apps.oi.covers'
+
+
+@pytest.yield_fixture
+def status_update():
+    with mock.patch('%s.CoverRevision.objects.filter' % COVERS) \
+            as filter_mock:
+        yield filter_mock
+
+
+def test_queue_generate_sizes(status_update):
+    revision = CoverRevision(id=3)
+    with mock.patch('%s.enqueue_on_commit' % COVERS) as enqueue_mock:
+        queue_generate_sizes(revision)
+
+    status_update.assert_called_once_with(id=3)
+    status_update.return_value.update.assert_called_once_with(
+      file_status=COVER_FILES_GENERATING)
+    assert revision.file_status == COVER_FILES_GENERATING
+    enqueue_mock.assert_called_once_with(generate_revision_sizes, 3,
+                                         queue='default')
+
+
+@pytest.yield_fixture
+def generate_mocks(status_update):
+    with mock.patch('%s.CoverRevision.objects.get' % COVERS) as get_mock, \
+            mock.patch('%s._revision_scan_name' % COVERS), \
+            mock.patch('%s.pyImage.open' % COVERS), \
+            mock.patch('%s.generate_sizes' % COVERS) as generate_mock:
+        get_mock.return_value = CoverRevision(
+          id=3, file_status=COVER_FILES_GENERATING)
+        yield get_mock, generate_mock
+
+
+def test_generate_revision_sizes(status_update, generate_mocks):
+    generate_revision_sizes(3)
+
+    generate_mocks[1].assert_called_once()
+    status_update.return_value.filter.assert_called_once_with(
+      file_status=COVER_FILES_GENERATING)
+    status_update.return_value.filter.return_value.update\
+                 .assert_called_once_with(file_status=COVER_FILES_READY)
+
+
+def test_generate_revision_sizes_done(status_update, generate_mocks):
+    generate_mocks[0].return_value.file_status = COVER_FILES_READY
+    generate_revision_sizes(3)
+
+    assert generate_mocks[1].called is False
+    assert status_update.called is False
+
+
+def test_generate_revision_sizes_fails(status_update, generate_mocks):
+    generate_mocks[1].side_effect = IOError
+    with pytest.raises(IOError):
+        generate_revision_sizes(3)
+
+    status_update.return_value.filter.return_value.update\
+                 .assert_called_once_with(file_status=COVER_FILES_FAILED)
+
+
+def test_move_approved_cover_twice(tmpdir):
+    upload_dir = tmpdir.mkdir('new_covers')
+    cover_dir = tmpdir.join('covers')
+    upload_dir.join('3.png').write('scan')
+    for width in [100, 200, 400]:
+        upload_dir.mkdir('w%d' % width).join('3.jpg').write('w%d' % width)
+
+    revision = mock.MagicMock(id=3, is_replacement=False)
+    revision.base_dir.return_value = str(upload_dir) + '/'
+    revision.changeset.created = datetime(2020, 5, 4, 3, 2, 1)
+    revision.cover.id = 7
+    revision.cover.base_dir.return_value = str(cover_dir)
+
+    with mock.patch('%s.generate_sizes' % COVERS) as generate_mock:
+        _move_approved_cover(revision)
+        # a retry after a failure finds the files already moved
+        _move_approved_cover(revision)
+
+    assert generate_mock.called is False
+    assert os.listdir(str(upload_dir.join('w400'))) == []
+    assert cover_dir.join('uploads', '7_20200504_030201.png').read() == 'scan'
+    for width in [100, 200, 400]:
+        assert cover_dir.join('w%d' % width, '7.jpg').read() == \
+          'w%d' % width
+
+
+def test_move_approved_cover_partly_generated(tmpdir):
+    upload_dir = tmpdir.mkdir('new_covers')
+    cover_dir = tmpdir.join('covers')
+    upload_dir.join('3.png').write('scan')
+    for width in [100, 200, 400]:
+        upload_dir.mkdir('w%d' % width)
+    # the generating job is still writing the smaller images
+    upload_dir.join('w400', '3.jpg').write('w400')
+
+    revision = mock.MagicMock(id=3, is_replacement=False)
+    revision.base_dir.return_value = str(upload_dir) + '/'
+    revision.changeset.created = datetime(2020, 5, 4, 3, 2, 1)
+    revision.cover.id = 7
+    revision.cover.base_dir.return_value = str(cover_dir)
+
+    def _generate(cover, im):
+        for width in [100, 200]:
+            upload_dir.join('w%d' % width, '3.jpg').write('w%d' % width)
+
+    with mock.patch('%s.generate_sizes' % COVERS) as generate_mock, \
+            mock.patch('%s.pyImage' % COVERS):
+        generate_mock.side_effect = _generate
+        _move_approved_cover(revision)
+
+    assert generate_mock.call_count == 1
+    for width in [100, 200, 400]:
+        assert cover_dir.join('w%d' % width, '7.jpg').read() == \
+          'w%d' % width
+
+
+def test_get_scaled_sizes():
+    cover = CoverRevision(is_wraparound=False)
+    assert get_scaled_sizes(cover, (1000, 1500)) == (
+      {400: (400, 600), 200: (200, 300), 100: (100, 150)},
+      (0, 0, 1000, 1500))
+    # landscape
+    assert get_scaled_sizes(cover, (1500, 1000))[0][400] == (600, 400)
+
+
+def test_get_scaled_sizes_wraparound():
+    cover = CoverRevision(is_wraparound=True, front_left=1000,
+                          front_right=2000, front_top=0, front_bottom=1500)
+    assert get_scaled_sizes(cover, (2000, 1500)) == (
+      {400: (800, 600), 200: (200, 300), 100: (100, 150)},
+      (1000, 0, 2000, 1500))
+
+
+@pytest.mark.parametrize('wraparound', [False, True])
+def test_generate_sizes(tmpdir, wraparound):
+    scan = str(tmpdir.join('scan.jpg'))
+    pyImage.new('RGB', (2000, 1500), (200, 10, 10)).save(scan)
+    for width in [100, 200, 400]:
+        tmpdir.mkdir('w%d' % width)
+    cover = CoverRevision(id=3, is_wraparound=wraparound, front_left=1000,
+                          front_right=2000, front_top=0, front_bottom=1500)
+    sizes = get_scaled_sizes(cover, (2000, 1500))[0]
+
+    with mock.patch.object(CoverRevision, 'base_dir',
+                           return_value=str(tmpdir)):
+        generate_sizes(cover, pyImage.open(scan))
+
+    for width in [100, 200, 400]:
+        # no temporary files are left behind
+        assert os.listdir(str(tmpdir.join('w%d' % width))) == ['3.jpg']
+        scaled = pyImage.open(str(tmpdir.join('w%d' % width, '3.jpg')))
+        assert scaled.size == sizes[width]
+
+
+@pytest.yield_fixture
+def status_request():
+    with mock.patch('%s.get_object_or_404' % COVERS) as get_mock:
+        revision = get_mock.return_value
+        revision.file_status = COVER_FILES_READY
+        request = mock.MagicMock()
+        request.user.is_authenticated = True
+        request.user.has_perm.return_value = False
+        yield request, revision
+
+
+def test_cover_file_status(status_request):
+    request, revision = status_request
+    revision.changeset.indexer = request.user
+    response = cover_file_status(request, 3)
+    assert response.status_code == 200
+
+
+def test_cover_file_status_other_user(status_request):
+    request, revision = status_request
+    with pytest.raises(PermissionDenied):
+        cover_file_status(request, 3)
@@ -4,6 +4,7 @@
 import mock
 import pytest
 
+from django.conf import settings
 from django.db import models
 
 from apps.gcd.models import Series, Issue, INDEXED
@@ -302,7 +303,10 @@ def _set_up_sort_code_query_sets(revision_list, later_issue_list,
     except IndexError:
         later_mock.last.return_value = None
     later_mock.__iter__.side_effect = lambda: iter(later_issue_list)
+    later_mock.order_by.return_value = later_issue_list
     obj_mock.filter.return_value.order_by.return_value = later_mock
+    obj_mock.filter.return_value.aggregate.return_value = {
+        'sort_code__max': max([i.sort_code for i in later_issue_list] or [0])}
 
 
 def test_ensure_sort_code_space_no_after(multiple_issue_revs):
@@ -326,16 +330,16 @@ def test_ensure_sort_code_space_no_after(multiple_issue_revs):
 
     rev3._ensure_sort_code_space()
 
-    # We still add the same amount to sort codes even though part of the gap
-    # was already present.  This is because the specific sort code values
-    # don't matter, and always adding the same amount makes the code simpler.
-    # So these end up one higher than necessary, which is correct.
-    assert i1.sort_code == 3
-    i1.save.assert_called_once_with()
-    assert i4.sort_code == 4
-    i4.save.assert_called_once_with()
-    assert i5.sort_code == 5
-    i5.save.assert_called_once_with()
+    # The later issues are renumbered with gaps after the space needed,
+    # even though part of the gap was already present.
+    gap = settings.SORT_CODE_GAP
+    assert i1.sort_code == 2
+    assert i4.sort_code == 2 + gap
+    assert i5.sort_code == 2 + 2 * gap
+    assert not i1.save.called
+    # Moved above the used sort codes first, then to the new ones.
+    assert obj_mock.bulk_update.call_count == 2
+    assert obj_mock.bulk_update.call_args[0][0] == [i1, i4, i5]
 
 
 def test_ensure_sort_code_space_with_after(multiple_issue_revs):
@@ -353,9 +357,9 @@ def test_ensure_sort_code_space_with_after(multiple_issue_revs):
     assert not i1.save.called
 
     assert i4.sort_code == 3
-    i4.save.assert_called_once_with()
-    assert i5.sort_code == 4
-    i5.save.assert_called_once_with()
+    assert i5.sort_code == 3 + settings.SORT_CODE_GAP
+    assert not i4.save.called
+    assert obj_mock.bulk_update.call_count == 2
 
 
 def test_ensure_sort_code_space_append_to_series(multiple_issue_revs):
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from apps.oi.jobs import enqueue, enqueue_once_on_commit
+
+JOBS = 'apps.oi.jobs'
+
+
+def test_enqueue_inline():
+    func = mock.MagicMock()
+    with mock.patch('%s.settings' % JOBS) as settings_mock:
+        settings_mock.JOBS_RUN_INLINE = True
+        enqueue(func, 1, queue='covers')
+    func.assert_called_once_with(1)
+
+
+def test_enqueue():
+    func = mock.MagicMock()
+    with mock.patch('%s.settings' % JOBS) as settings_mock, \
+            mock.patch('%s.django_rq' % JOBS) as rq_mock:
+        settings_mock.JOBS_RUN_INLINE = False
+        enqueue(func, 1, queue='covers')
+    assert not func.called
+    rq_mock.get_queue.assert_called_once_with('covers')
+    rq_mock.get_queue.return_value.enqueue.assert_called_once_with(func, 1)
+
+
+@pytest.yield_fixture
+def commit_hooks():
+    hooks = []
+    with mock.patch('%s.transaction.on_commit' % JOBS) as on_commit, \
+            mock.patch('%s.enqueue' % JOBS) as enqueue_mock:
+        on_commit.side_effect = lambda hook, using: hooks.append(hook)
+        yield hooks, enqueue_mock
+
+
+def _commit(hooks):
+    for hook in hooks:
+        hook()
+    del hooks[:]
+
+
+def test_enqueue_once_on_commit(commit_hooks):
+    hooks, enqueue_mock = commit_hooks
+    func = mock.MagicMock()
+    other = mock.MagicMock()
+    for i in range(3):
+        enqueue_once_on_commit(func, queue='search')
+    enqueue_once_on_commit(other)
+    assert not enqueue_mock.called
+
+    _commit(hooks)
+    assert enqueue_mock.call_args_list == [mock.call(func, queue='search'),
+                                           mock.call(other, queue='default')]
+
+    # the next transaction enqueues it again
+    enqueue_once_on_commit(func, queue='search')
+    _commit(hooks)
+    assert enqueue_mock.call_count == 3
+
+
+def test_enqueue_once_on_commit_rollback(commit_hooks):
+    hooks, enqueue_mock = commit_hooks
+    func = mock.MagicMock()
+    enqueue_once_on_commit(func)
+    # rolled back, the hooks are discarded
+    del hooks[:]
+
+    enqueue_once_on_commit(func)
+    _commit(hooks)
+    enqueue_mock.assert_called_once_with(func, queue='default')
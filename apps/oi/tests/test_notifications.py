@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from django.core import mail
+from django.test.utils import override_settings
+
+from apps.oi.models import EmailNotification
+from apps.oi.notifications import email_user, deliver_notifications, \
+                                  queue_email
+
+
+NOTIFICATIONS = 'apps.oi.notifications'
+
+
+@pytest.yield_fixture
+def queue_mocks():
+    with mock.patch('%s.EmailNotification.objects.create' % NOTIFICATIONS) \
+            as create_mock, \
+            mock.patch('%s.enqueue_once_on_commit' % NOTIFICATIONS) \
+            as enqueue_mock:
+        yield create_mock, enqueue_mock
+
+
+def test_email_user(queue_mocks):
+    create_mock, enqueue_mock = queue_mocks
+    user = mock.MagicMock(email='indexer@example.com')
+    email_user(user, 'GCD comment', 'Body', 'indexing@example.com')
+    create_mock.assert_called_once_with(
+      from_email='indexing@example.com', to='indexer@example.com', cc='',
+      subject='GCD comment', body='Body', fail_silently=False)
+    enqueue_mock.assert_called_once_with(deliver_notifications,
+                                         queue='default')
+
+
+def test_queue_email_inline(queue_mocks):
+    create_mock, enqueue_mock = queue_mocks
+    with override_settings(JOBS_RUN_INLINE=True):
+        queue_email(['indexer@example.com'], 'GCD comment', 'Body')
+    assert create_mock.called
+    assert not enqueue_mock.called
+
+
+def _notification(notification_id, to='indexer@example.com', cc=''):
+    return EmailNotification(id=notification_id, from_email='gcd@example.com',
+                             to=to, cc=cc, subject='Subject %d' %
+                             notification_id, body='Body')
+
+
+@pytest.yield_fixture
+def outbox():
+    with mock.patch('%s.EmailNotification.objects' % NOTIFICATIONS) \
+            as objects_mock, \
+            mock.patch('%s.transaction' % NOTIFICATIONS), \
+            override_settings(
+              NOTIFICATION_EMAIL_BACKEND='django.core.mail.backends.locmem.'
+                                         'EmailBackend',
+              NOTIFICATION_MAX_ATTEMPTS=3):
+        mail.outbox = []
+        yield objects_mock
+
+
+def test_deliver_notifications(outbox):
+    pending = outbox.select_for_update.return_value.filter.return_value\
+                    .order_by.return_value.__getitem__
+    pending.side_effect = [
+      [_notification(1, to='a@example.com\nb@example.com'),
+       _notification(2, cc='chair@example.com')], []]
+
+    assert deliver_notifications() == 2
+
+    assert [message.recipients() for message in mail.outbox] == [
+      ['a@example.com', 'b@example.com'],
+      ['indexer@example.com', 'chair@example.com']]
+    assert outbox.select_for_update.return_value.filter.call_args_list == [
+      mock.call(id__gt=0, attempts__lt=3), mock.call(id__gt=2, attempts__lt=3)]
+    outbox.filter.assert_called_once_with(id__in=[1, 2])
+
+
+def test_deliver_notifications_failed(outbox):
+    pending = outbox.select_for_update.return_value.filter.return_value\
+                    .order_by.return_value.__getitem__
+    failing = _notification(1)
+    pending.side_effect = [[failing, _notification(2)], []]
+
+    with mock.patch('%s._message' % NOTIFICATIONS) as message_mock, \
+            mock.patch.object(EmailNotification, 'save') as save_mock:
+        message_mock.return_value.send.side_effect = [IOError('refused'), 1]
+        assert deliver_notifications() == 1
+
+    assert failing.attempts == 1
+    assert 'refused' in failing.last_error
+    save_mock.assert_called_once_with(update_fields=['attempts', 'last_error'])
+    outbox.filter.assert_called_once_with(id__in=[2])
+
+
+def test_deliver_notifications_fail_silently(outbox):
+    pending = outbox.select_for_update.return_value.filter.return_value\
+                    .order_by.return_value.__getitem__
+    failing = _notification(1)
+    failing.fail_silently = True
+    pending.side_effect = [[failing, _notification(2)], []]
+
+    with mock.patch('%s._message' % NOTIFICATIONS) as message_mock, \
+            mock.patch.object(EmailNotification, 'save') as save_mock, \
+            mock.patch('%s.logger' % NOTIFICATIONS) as logger_mock:
+        message_mock.return_value.send.side_effect = [IOError('refused'), 1]
+        assert deliver_notifications() == 1
+
+    assert not save_mock.called
+    assert not logger_mock.error.called
+    outbox.filter.assert_called_once_with(id__in=[2, 1])
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from apps.oi import states
+from apps.oi.models import CTYPES
+from apps.oi.queues import queue_sections, QUEUE_SECTIONS
+
+
+QUEUES = 'apps.oi.queues'
+
+
+def _changeset(changeset_id, change_type, state=states.PENDING):
+    return mock.MagicMock(id=changeset_id, change_type=CTYPES[change_type],
+                          state=state)
+
+
+@pytest.yield_fixture
+def queue():
+    with mock.patch('%s.Changeset.objects.filter' % QUEUES) as filter_mock, \
+            mock.patch('%s.get_display_versions' % QUEUES) as versions_mock, \
+            mock.patch('%s.cache' % QUEUES) as cache_mock, \
+            mock.patch('%s._revision_summary' % QUEUES) as summary_mock:
+        versions_mock.side_effect = lambda model_name, ids: \
+            dict((changeset_id, 7) for changeset_id in ids)
+        summary_mock.side_effect = lambda changeset: {
+          'queue_name': 'changeset %d' % changeset.id}
+        yield filter_mock, cache_mock, summary_mock
+
+
+def _sections(queue, changesets, cached={}):
+    filter_mock, cache_mock, summary_mock = queue
+    filter_mock.return_value.select_related.return_value.order_by\
+               .return_value = changesets
+    filter_mock.return_value.order_by.return_value.values_list.return_value\
+               .annotate.return_value = [(changeset.id, 3)
+                                         for changeset in changesets]
+    cache_mock.get_many.return_value = cached
+    return dict((section.object_name, section)
+                for section in queue_sections(state__in=states.ACTIVE))
+
+
+def test_queue_sections_grouped(queue):
+    changesets = [_changeset(1, 'issue', states.REVIEWING),
+                  _changeset(2, 'cover'),
+                  _changeset(3, 'two_issues', states.PENDING),
+                  _changeset(4, 'award')]
+
+    sections = _sections(queue, changesets)
+
+    assert len(sections) == len(QUEUE_SECTIONS)
+    assert sections['Issues'].changesets == [changesets[2], changesets[0]]
+    assert sections['Covers'].changesets == [changesets[1]]
+    assert sections['Awards'].changesets == [changesets[3]]
+    assert sections['Series'].changesets == []
+    assert changesets[0].queue_summary == {'queue_name': 'changeset 1',
+                                           'country': 3}
+    # the award section has no country
+    assert changesets[3].country is None
+
+
+def test_queue_sections_fixed_queries(queue):
+    filter_mock, cache_mock, summary_mock = queue
+    changesets = [_changeset(n, 'issue') for n in range(1, 50)]
+
+    _sections(queue, changesets)
+
+    # the queue, and the countries of the one section with changes
+    assert filter_mock.call_count == 2
+    assert summary_mock.call_count == 49
+    assert len(cache_mock.set_many.call_args[0][0]) == 49
+
+
+def test_queue_sections_cached(queue):
+    filter_mock, cache_mock, summary_mock = queue
+    changesets = [_changeset(1, 'series'), _changeset(2, 'series')]
+    cached = {'queue_summary_1_7': {'queue_name': 'cached', 'country': 5}}
+
+    _sections(queue, changesets, cached)
+
+    summary_mock.assert_called_once_with(changesets[1])
+    assert changesets[0].queue_summary['queue_name'] == 'cached'
+    assert changesets[0].country == 5
+    assert list(cache_mock.set_many.call_args[0][0]) == ['queue_summary_2_7']
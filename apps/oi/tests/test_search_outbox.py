@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from apps.gcd.models import Story
+from apps.oi.models import SearchIndexUpdate
+from apps.oi.search_outbox import OutboxSignalProcessor, index_objects, \
+                                  process_outbox
+
+
+OUTBOX = 'apps.oi.search_outbox'
+
+
+@pytest.yield_fixture
+def processor():
+    with mock.patch('%s.display_committed' % OUTBOX):
+        yield OutboxSignalProcessor(mock.MagicMock(), mock.MagicMock())
+
+
+def test_handle_commit(processor):
+    with mock.patch('%s._is_indexed' % OUTBOX, return_value=True), \
+            mock.patch('%s.ContentType.objects.get_for_model' % OUTBOX) \
+            as content_type_mock, \
+            mock.patch('%s.SearchIndexUpdate.objects.create' % OUTBOX) \
+            as create_mock, \
+            mock.patch('%s.enqueue_once_on_commit' % OUTBOX) as enqueue_mock:
+        processor.handle_commit(Story, Story(id=12))
+    create_mock.assert_called_once_with(
+      content_type=content_type_mock.return_value, object_id=12)
+    enqueue_mock.assert_called_once_with(process_outbox, queue='default')
+
+
+def test_handle_commit_not_indexed(processor):
+    with mock.patch('%s._is_indexed' % OUTBOX, return_value=False), \
+            mock.patch('%s.SearchIndexUpdate.objects.create' % OUTBOX) \
+            as create_mock:
+        processor.handle_commit(Story, Story(id=12))
+    assert not create_mock.called
+
+
+def test_handle_commit_inline(processor):
+    with mock.patch('%s.settings' % OUTBOX) as settings_mock, \
+            mock.patch('%s._is_indexed' % OUTBOX, return_value=True), \
+            mock.patch('%s.SearchIndexUpdate.objects.create' % OUTBOX) \
+            as create_mock, \
+            mock.patch('%s.enqueue_once_on_commit' % OUTBOX) as enqueue_mock:
+        settings_mock.JOBS_RUN_INLINE = True
+        processor.handle_commit(Story, Story(id=12))
+    assert not create_mock.called
+    assert not enqueue_mock.called
+
+
+@pytest.yield_fixture
+def haystack_connections():
+    with mock.patch('%s.connections' % OUTBOX) as connections_mock:
+        yield connections_mock['default']
+
+
+def test_index_objects(haystack_connections):
+    index = haystack_connections.get_unified_index.return_value.get_index\
+                                .return_value
+    objects = [Story(id=1), Story(id=3)]
+    index.index_queryset.return_value.filter.return_value = objects
+
+    index_objects(Story, set([1, 2, 3]))
+
+    backend = haystack_connections.get_backend.return_value
+    backend.update.assert_called_once_with(index, objects)
+    backend.remove.assert_called_once_with('gcd.story.2')
+
+
+def _update(update_id, content_type_id, object_id, attempts=0):
+    return SearchIndexUpdate(id=update_id, content_type_id=content_type_id,
+                             object_id=object_id, attempts=attempts)
+
+
+@pytest.yield_fixture
+def outbox():
+    with mock.patch('%s.SearchIndexUpdate.objects' % OUTBOX) as objects_mock, \
+            mock.patch('%s.ContentType.objects.get_for_id' % OUTBOX) \
+            as content_type_mock, \
+            mock.patch('%s.index_objects' % OUTBOX) as index_mock:
+        content_type_mock.return_value.model_class.return_value = Story
+        yield objects_mock, index_mock
+
+
+def _batches(objects_mock, *batches):
+    objects_mock.filter.return_value.order_by.return_value.__getitem__\
+                .side_effect = list(batches) + [[]]
+
+
+def test_process_outbox(outbox):
+    objects_mock, index_mock = outbox
+    _batches(objects_mock,
+             [_update(1, 7, 10), _update(2, 7, 11), _update(3, 7, 10)])
+
+    assert process_outbox() == 3
+
+    index_mock.assert_called_once_with(Story, set([10, 11]), 'default')
+    assert objects_mock.filter.call_args_list == [
+      mock.call(id__gt=0, attempts__lt=5),
+      mock.call(id__in=[1, 2, 3]),
+      mock.call(id__gt=3, attempts__lt=5)]
+    objects_mock.filter.return_value.delete.assert_called_once_with()
+    assert not objects_mock.filter.return_value.update.called
+
+
+def test_process_outbox_failed(outbox):
+    objects_mock, index_mock = outbox
+    _batches(objects_mock,
+             [_update(1, 7, 10), _update(2, 7, 11), _update(3, 7, 10)],
+             [_update(4, 7, 12, attempts=4)])
+
+    def index_objects(model, ids, using):
+        if 10 in ids or 12 in ids:
+            raise IOError
+    index_mock.side_effect = index_objects
+
+    with mock.patch('%s.logger' % OUTBOX) as logger_mock:
+        assert process_outbox() == 1
+
+    # the failing objects are found one by one, the others still indexed
+    assert index_mock.call_args_list == [
+      mock.call(Story, set([10, 11]), 'default'),
+      mock.call(Story, [10], 'default'),
+      mock.call(Story, [11], 'default'),
+      mock.call(Story, set([12]), 'default'),
+      mock.call(Story, [12], 'default')]
+    assert objects_mock.filter.call_args_list == [
+      mock.call(id__gt=0, attempts__lt=5),
+      mock.call(id__in=[2]),
+      mock.call(id__in=[1, 3]),
+      mock.call(id__gt=3, attempts__lt=5),
+      mock.call(id__in=[]),
+      mock.call(id__in=[4]),
+      mock.call(id__gt=4, attempts__lt=5)]
+    assert objects_mock.filter.return_value.update.call_count == 2
+    # the row of object 12 reached the last attempt
+    assert logger_mock.error.call_count == 1
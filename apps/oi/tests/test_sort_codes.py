@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from django.test.utils import override_settings
+
+from apps.gcd.models import Issue, Series
+from apps.oi.models import StoryRevision
+from apps.oi.sort_codes import apply_sort_codes, gapped_sort_codes
+from apps.oi.views import _reorder_children
+
+
+SORT_CODES = 'apps.oi.sort_codes'
+
+
+@pytest.yield_fixture
+def issue_objects():
+    with mock.patch.object(Issue, 'objects') as objects_mock:
+        yield objects_mock
+
+
+def _issues(*sort_codes):
+    series = Series(name='Some Series')
+    return [Issue(id=index + 1, series=series, sort_code=sort_code)
+            for index, sort_code in enumerate(sort_codes)]
+
+
+@override_settings(SORT_CODE_GAP=10)
+def test_gapped_sort_codes():
+    i1, i2 = _issues(0, 1)
+    assert gapped_sort_codes([i1, i2], 5) == [(i1, 5), (i2, 15)]
+    assert gapped_sort_codes([i1, i2], 0, gap=1) == [(i1, 0), (i2, 1)]
+
+
+def test_apply_sort_codes_unique(issue_objects):
+    i1, i2, i3 = _issues(0, 1, 2)
+    scope = mock.MagicMock()
+    scope.aggregate.return_value = {'sort_code__max': 7}
+    codes = []
+    issue_objects.bulk_update.side_effect = \
+        lambda objects, fields, **kwargs: codes.append(
+          [issue.sort_code for issue in objects])
+
+    changed = apply_sort_codes([(i1, 10), (i2, 1), (i3, 0)], 'sort_code',
+                               scope=scope)
+
+    assert changed == [i1, i3]
+    # above both the used and the new codes first
+    assert codes == [[11, 12], [10, 0]]
+    assert issue_objects.bulk_update.call_args[0][1] == ['sort_code',
+                                                         'modified']
+    assert i1.modified is not None
+
+
+def test_apply_sort_codes_unchanged(issue_objects):
+    i1, i2 = _issues(0, 10)
+    assert apply_sort_codes([(i1, 0), (i2, 10)], 'sort_code',
+                            scope=mock.MagicMock()) == []
+    assert not issue_objects.bulk_update.called
+
+
+def test_apply_sort_codes_revisions():
+    stories = [StoryRevision(id=1, changeset_id=3, sequence_number=1),
+               StoryRevision(id=2, changeset_id=3, sequence_number=0)]
+    with mock.patch.object(StoryRevision, 'objects') as objects_mock, \
+            mock.patch('%s.bump_changeset_version' % SORT_CODES) as bump_mock:
+        apply_sort_codes([(stories[1], 1), (stories[0], 0)],
+                         'sequence_number')
+
+    # one UPDATE without a unique key
+    objects_mock.bulk_update.assert_called_once_with(
+      stories[::-1], ['sequence_number', 'modified'], batch_size=500)
+    bump_mock.assert_called_once_with(3)
+
+
+@override_settings(SORT_CODE_GAP=10)
+def test_reorder_children_issues():
+    i1, i2, deleted = _issues(5, 6, 7)
+    child_set = mock.MagicMock()
+    with mock.patch('apps.oi.views.apply_sort_codes') as apply_mock:
+        assert _reorder_children(None, None, [i2, i1], 'sort_code',
+                                 child_set, commit=False) == [(i2, 10),
+                                                              (i1, 20)]
+        assert not apply_mock.called
+
+        _reorder_children(None, None, [i2, i1], 'sort_code', child_set,
+                          commit=True, extras=[deleted])
+    apply_mock.assert_called_once_with([(i2, 10), (i1, 20), (deleted, 30)],
+                                       'sort_code', scope=child_set)
+
+
+def test_reorder_children_skip():
+    stories = [StoryRevision(id=1, sequence_number=0),
+               StoryRevision(id=2, sequence_number=1)]
+    added = StoryRevision(sequence_number=1)
+    with mock.patch('apps.oi.views.apply_sort_codes') as apply_mock:
+        _reorder_children(None, None, stories, 'sequence_number', stories,
+                          commit=True, unique=False, skip=added)
+    assert added.sequence_number == 1
+    apply_mock.assert_called_once_with([(stories[0], 0), (stories[1], 2)],
+                                       'sequence_number', scope=None)
@@ -232,6 +232,10 @@ urlpatterns = [
       oi_covers.process_edited_gatefold_cover, name='gatefold_cover'),
     url(r'^uploaded_cover/(?P<revision_id>\d+)/$', oi_covers.uploaded_cover,
       name='upload_cover_complete'),
+    url(r'^uploaded_cover/(?P<revision_id>\d+)/status/$',
+      oi_covers.cover_file_status, name='cover_file_status'),
+    url(r'^uploaded_cover/(?P<revision_id>\d+)/retry/$',
+      oi_covers.retry_cover_files, name='retry_cover_files'),
     url(r'^mark_cover_revision/(?P<revision_id>.+)/$', oi_covers.mark_cover,
       {'marked': True}, name='mark_cover_revision'),
     url(r'^unmark_cover_revision/(?P<revision_id>.+)/$', oi_covers.mark_cover,
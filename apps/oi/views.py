@@ -2,7 +2,6 @@
 
 
 import re
-import sys
 import glob
 import PIL.Image as pyImage
 from urllib.parse import unquote
@@ -13,7 +12,7 @@ from django.urls import reverse
 from django.http import HttpResponseRedirect
 from django.shortcuts import get_object_or_404, render
 from django.db import transaction, IntegrityError
-from django.db.models import Min, Max, Count, F
+from django.db.models import Max, Count, F
 from django.utils.html import mark_safe, conditional_escape as esc
 
 from django.contrib.auth.models import User
@@ -25,14 +24,16 @@ from apps.stddata.models import Country
 from apps.indexer.views import ViewTerminationError, render_error
 
 from apps.gcd.models import (
-    Brand, BrandGroup, BrandUse, Cover, Image, IndiciaPublisher, Issue,
-    IssueReprint, Publisher, Reprint, ReprintFromIssue, ReprintToIssue,
+    Brand, BrandGroup, BrandUse, Cover, CoverGalleryEntry, Image,
+    IndiciaPublisher, Issue, IssueReprint, Publisher, Reprint,
+    ReprintFromIssue, ReprintToIssue,
     Series, SeriesBond, Story, StoryType, Award, ReceivedAward, Creator,
     CreatorMembership, CreatorArtInfluence, CreatorDegree, CreatorNonComicWork,
     CreatorRelation, CreatorSchool, CreatorNameDetail, CreditType,
     STORY_TYPES, BiblioEntry, Feature, FeatureLogo, FeatureRelation, Printer,
     IndiciaPrinter, CreatorSignature, Character, CharacterRelation, Group,
     GroupRelation, GroupMembership)
+from apps.gcd.display_cache import bump_display_versions
 from apps.gcd.views import paginate_response
 # need this for preview-call
 from apps.gcd.views.details import show_publisher, show_indicia_publisher, \
@@ -106,6 +107,9 @@ from apps.oi.covers import get_preview_image_tag, \
                            get_preview_generic_image_tag, \
                            get_preview_image_tags_per_page, UPLOAD_WIDTH
 from apps.oi import states
+from apps.oi.notifications import email_user
+from apps.oi.queues import queue_sections
+from apps.oi.sort_codes import apply_sort_codes
 from apps.oi.templatetags.editing import is_locked
 
 REVISION_CLASSES = {
@@ -549,7 +553,7 @@ thanks,
            settings.SITE_NAME,
            settings.SITE_URL)
 
-        changeset.approver.email_user('GCD change to review', email_body,
+        email_user(changeset.approver, 'GCD change to review', email_body,
           settings.EMAIL_INDEXING)
 
     if comment_text:
@@ -783,7 +787,7 @@ thanks,
        settings.SITE_NAME,
        settings.SITE_URL)
 
-            changeset.approver.email_user('Reviewed GCD change discarded',
+            email_user(changeset.approver, 'Reviewed GCD change discarded',
               email_body, settings.EMAIL_INDEXING)
         if comment_text:
             send_comment_observer(request, changeset, comment_text)
@@ -861,7 +865,7 @@ thanks,
        settings.SITE_NAME,
        settings.SITE_URL)
 
-        changeset.indexer.email_user('GCD change rejected', email_body,
+        email_user(changeset.indexer, 'GCD change rejected', email_body,
           settings.EMAIL_INDEXING)
         if comment_text:
             send_comment_observer(request, changeset, comment_text)
@@ -949,7 +953,7 @@ thanks,
              urlresolvers.reverse('compare', kwargs={'id': changeset.id }),
            settings.SITE_NAME,
            settings.SITE_URL)
-        changeset.indexer.email_user('GCD comment', email_body,
+        email_user(changeset.indexer, 'GCD comment', email_body,
             settings.EMAIL_INDEXING)
 
         send_comment_observer(request, changeset, comment_text)
@@ -999,7 +1003,7 @@ thanks,
              urlresolvers.reverse('compare', kwargs={'id': changeset.id }),
            settings.SITE_NAME,
            settings.SITE_URL)
-        changeset.indexer.email_user('GCD comment', email_body,
+        email_user(changeset.indexer, 'GCD comment', email_body,
             settings.EMAIL_INDEXING)
 
         send_comment_observer(request, changeset, comment_text)
@@ -1080,10 +1084,12 @@ thanks,
         subject = 'GCD change put into discussion'
 
     if request.user == changeset.indexer:
-        changeset.approver.email_user(subject, email_body, settings.EMAIL_INDEXING)
+        email_user(changeset.approver, subject, email_body,
+                   settings.EMAIL_INDEXING)
         return HttpResponseRedirect(urlresolvers.reverse('editing'))
     else:
-        changeset.indexer.email_user(subject, email_body, settings.EMAIL_INDEXING)
+        email_user(changeset.indexer, subject, email_body,
+                   settings.EMAIL_INDEXING)
 
         if request.user.approved_changeset.filter(state=states.REVIEWING).count():
             return HttpResponseRedirect(urlresolvers.reverse('reviewing'))
@@ -1170,8 +1176,8 @@ thanks,
             send_comment_observer(request, changeset, comment_text)
         else:
             subject = 'GCD change approved'
-        changeset.indexer.email_user(subject, email_body,
-                                     settings.EMAIL_INDEXING)
+        email_user(changeset.indexer, subject, email_body,
+                   settings.EMAIL_INDEXING)
 
     # Note that series ongoing reservations must be processed first, as
     # they could potentially apply to the issue reservations if we ever
@@ -1265,7 +1271,7 @@ thanks,
        urlresolvers.reverse('editing'),
        settings.SITE_NAME, settings.SITE_URL)
 
-    indexer.email_user('GCD automatic reservation declined',
+    email_user(indexer, 'GCD automatic reservation declined',
       email_body,
       settings.EMAIL_INDEXING)
 
@@ -1293,7 +1299,7 @@ thanks,
        course_of_action,
        settings.SITE_NAME, settings.SITE_URL)
 
-    indexer.email_user('GCD automatic reservation declined',
+    email_user(indexer, 'GCD automatic reservation declined',
       email_body,
       settings.EMAIL_INDEXING)
 
@@ -1341,7 +1347,7 @@ thanks,
        settings.SITE_NAME,
        settings.SITE_URL)
 
-    changeset.indexer.email_user('GCD change sent back', email_body,
+    email_user(changeset.indexer, 'GCD change sent back', email_body,
       settings.EMAIL_INDEXING)
 
     send_comment_observer(request, changeset, comment_text)
@@ -1386,7 +1392,7 @@ thanks,
                      .exclude(commenter__in=excluding)\
                      .values_list('commenter', flat=True))
     for commenter in commenters:
-        User.objects.get(id=commenter).email_user('GCD comment',
+        email_user(User.objects.get(id=commenter), 'GCD comment',
             email_body, settings.EMAIL_INDEXING)
 
 
@@ -1428,10 +1434,10 @@ thanks,
            settings.SITE_URL)
 
         if request.user != changeset.indexer:
-            changeset.indexer.email_user('GCD comment', email_body,
+            email_user(changeset.indexer, 'GCD comment', email_body,
               settings.EMAIL_INDEXING)
         if changeset.approver and request.user != changeset.approver:
-            changeset.approver.email_user('GCD comment', email_body,
+            email_user(changeset.approver, 'GCD comment', email_body,
               settings.EMAIL_INDEXING)
 
         send_comment_observer(request, changeset, comment_text)
@@ -4305,6 +4311,8 @@ def _reorder_series(request, series, issues):
 
     if 'commit' in request.POST:
         set_series_first_last(series)
+        CoverGalleryEntry.objects.update_series(series)
+        bump_display_versions([series])
         return HttpResponseRedirect(urlresolvers.reverse(
           'show_series', kwargs={ 'series_id': series.id }))
 
@@ -4369,61 +4377,43 @@ def _reorder_children(request, parent, children, sort_field, child_set,
 
     if unique:
         # There's a "unique together" constraint on series_id and sort_code in
-        # the issue table, which is great for avoiding nonsensical sort_code
-        # situations that we had in the old system, but annoying when updating
-        # the codes.  Get around it by shifing the numbers down to starting
-        # at one if they'll fit, or up above the current range if not.  Given that
-        # the numbers were all set to consecutive ranges when we migrated to this
-        # system, and this code always produces consecutive ranges, the chances
-        # that we won't have room at one end or the other are very slight.
-
-        # Use child_set because children may be a list, not a query set.
-        min = child_set.aggregate(Min(sort_field))['%s__min' % sort_field]
-        max = child_set.aggregate(Max(sort_field))['%s__max' % sort_field]
-        num_children = child_set.count()
-
-        if num_children < min:
-            current_code = 1
-        elif num_children <= sys.maxsize - max:
-            current_code = max + 1
-        else:
-            # This should be extremely rare, so let's not bother to
-            # code our way out.
-            raise ViewTerminationError(render_error(request,
-              "Can't find room for rearranged sort codes, please contact an admin",
-              redirect=False))
+        # the issue table.  apply_sort_codes works around it when writing,
+        # here we only number the children with gaps, so that added issues
+        # usually fit in without moving the later ones.
+        current_code = step = settings.SORT_CODE_GAP
+        scope = child_set
     else:
         # If there's no uniqueness constraints, always sort starting with zero.
         current_code = 0
+        step = 1
+        scope = None
 
     child_list = []
     found_skip = False
     for child in children:
         if skip is not None:
-            current_sort_code = getattr(child, sort_field)
             skip_code = getattr(skip, sort_field)
             if not found_skip and current_code >= skip_code:
                 found_skip = True
                 setattr(skip, sort_field, current_code)
-                current_code += 1
-        if commit:
-            setattr(child, sort_field, current_code)
-            child.save()
-        else:
-            child_list.append((child, current_code))
-        current_code += 1
+                current_code += step
+        child_list.append((child, current_code))
+        current_code += step
 
     # Special case if there were no children and therefore for loop did nothing.
     if not children and skip is not None:
         setattr(skip, sort_field, current_code)
 
-    if commit and extras:
+    if not commit:
+        return child_list
+
+    if extras:
         for child in extras:
-            setattr(child, sort_field, current_code)
-            child.save()
-            current_code += 1
+            child_list.append((child, current_code))
+            current_code += step
 
-    return child_list
+    apply_sort_codes(child_list, sort_field, scope=scope)
+    return []
 
 
 ##############################################################################
@@ -4453,59 +4443,12 @@ def show_queue(request, queue_name):
     elif 'editor_log' == queue_name:
         return show_editor_log(request)
 
-    changes = Changeset.objects.filter(**kwargs).select_related(
-      'indexer__indexer', 'approver__indexer')
-
-    awards = changes.filter(change_type=CTYPES['award'])
-    creators = changes.filter(change_type=CTYPES['creator'])
-    creator_art_influences = changes.filter(change_type=CTYPES['creator_art_influence'])
-    received_awards = changes.filter(change_type=CTYPES['received_award'])
-    creator_memberships = changes.filter(change_type=CTYPES['creator_membership'])
-    creator_non_comic_works = changes.filter(change_type=CTYPES['creator_non_comic_work'])
-    creator_relations = changes.filter(change_type=CTYPES['creator_relation'])
-    creator_schools = changes.filter(change_type=CTYPES['creator_school'])
-    creator_signatures = changes.filter(change_type=CTYPES['creator_signature'])
-    creator_degres = changes.filter(change_type=CTYPES['creator_degree'])
-    publishers = changes.filter(change_type=CTYPES['publisher']) \
-                        .prefetch_related('publisherrevisions__previous_revision',
-                                          'publisherrevisions__country')
-    indicia_publishers = changes.filter(change_type=CTYPES['indicia_publisher'])
-    brand_groups = changes.filter(change_type=CTYPES['brand_group'])
-    brands = changes.filter(change_type=CTYPES['brand'])
-    brand_uses = changes.filter(change_type=CTYPES['brand_use'])
-    printers = changes.filter(change_type=CTYPES['printer']) \
-                      .prefetch_related('printerrevisions__previous_revision',
-                                        'printerrevisions__country')
-    indicia_printers = changes.filter(change_type=CTYPES['indicia_printer'])
-    series = changes.filter(change_type=CTYPES['series'])\
-                    .prefetch_related('seriesrevisions__series')
-    series_bonds = changes.filter(change_type=CTYPES['series_bond'])
-    issue_adds = changes.filter(change_type=CTYPES['issue_add']) \
-                        .prefetch_related('issuerevisions__issue',
-                                          'issuerevisions__series')
-    issues = changes.filter(change_type__in=[CTYPES['issue'],
-                                             CTYPES['variant_add'],
-                                             CTYPES['two_issues']])\
-                    .prefetch_related('issuerevisions__issue',
-                                      'issuerevisions__variant_of',
-                                      'issuerevisions__series',
-                                      'issuerevisions__previous_revision')
-    issue_bulks = changes.filter(change_type=CTYPES['issue_bulk'])
-    covers = changes.filter(change_type=CTYPES['cover'])\
-                    .prefetch_related('coverrevisions__previous_revision',
-                                      'coverrevisions__cover')
-    features = changes.filter(change_type=CTYPES['feature'])
-    feature_logos = changes.filter(change_type=CTYPES['feature_logo'])
-    feature_relations = changes.filter(change_type=CTYPES['feature_relation'])
-    characters = changes.filter(change_type=CTYPES['character'])
-    character_relations = changes.filter(
-      change_type=CTYPES['character_relation'])
-    groups = changes.filter(change_type=CTYPES['group'])
-    group_relations = changes.filter(change_type=CTYPES['group_relation'])
-    group_memberships = changes.filter(change_type=CTYPES['group_membership'])
-    images = changes.filter(change_type=CTYPES['image'])
-    countries = dict(Country.objects.values_list('id', 'code'))
-    country_names = dict(Country.objects.values_list('id', 'name'))
+    countries = {}
+    country_names = {}
+    for country_id, code, name in Country.objects.values_list('id', 'code',
+                                                              'name'):
+        countries[country_id] = code
+        country_names[country_id] = name
     response = oi_render(
       request,
       'oi/queues/%s.html' % queue_name,
@@ -4515,218 +4458,7 @@ def show_queue(request, queue_name):
         'states': states,
         'countries': countries,
         'country_names': country_names,
-        'data': [
-          {
-            'object_name': 'Awards',
-            'object_type': 'award',
-            'changesets': awards.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Creators',
-            'object_type': 'creator',
-            'changesets': creators.order_by('modified', 'id')
-                                  .annotate(
-              country=Max('creatorrevisions__birth_country__id'))
-          },
-          {
-            'object_name': 'Creator Signatures',
-            'object_type': 'creator_signature',
-            'changesets': creator_signatures.order_by('modified', 'id')
-                                            .annotate(
-              country=Max(
-                'creatorsignaturerevisions__creator__birth_country__id'))
-          },
-          {
-            'object_name': 'Publishers',
-            'object_type': 'publisher',
-            'changesets': publishers.order_by('modified', 'id')
-                                    .annotate(
-              country=Max('publisherrevisions__country__id')),
-          },
-          {
-            'object_name': 'Indicia / Colophon Publishers',
-            'object_type': 'indicia_publisher',
-            'changesets': indicia_publishers.order_by('modified', 'id')
-                                            .annotate(
-              country=Max('indiciapublisherrevisions__country__id')),
-          },
-          {
-            'object_name': 'Brand Groups',
-            'object_type': 'brand_groups',
-            'changesets': brand_groups.order_by('modified', 'id')
-                                      .annotate(
-              country=Max('brandgrouprevisions__parent__country__id')),
-          },
-          {
-            'object_name': 'Brand Emblems',
-            'object_type': 'brands',
-            'changesets': brands.order_by('modified', 'id')
-                                .annotate(
-              country=Max('brandrevisions__group__parent__country__id')),
-          },
-          {
-            'object_name': 'Brand Uses',
-            'object_type': 'brand_uses',
-            'changesets': brand_uses.order_by('modified', 'id')
-                                    .annotate(
-              country=Max('branduserevisions__publisher__country__id')),
-          },
-          {
-            'object_name': 'Printers',
-            'object_type': 'printer',
-            'changesets': printers.order_by('modified', 'id')
-                                  .annotate(
-              country=Max('printerrevisions__country__id')),
-          },
-          {
-            'object_name': 'Indicia Printers',
-            'object_type': 'indicia_printer',
-            'changesets': indicia_printers.order_by('modified', 'id')
-                                          .annotate(
-              country=Max('indiciaprinterrevisions__country__id')),
-          },
-          {
-            'object_name': 'Series',
-            'object_type': 'series',
-            'changesets': series.order_by('modified', 'id')
-                                .annotate(country=Max(
-                                          'seriesrevisions__country__id')),
-          },
-          {
-            'object_name': 'Features',
-            'object_type': 'feature',
-            'changesets': features.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Feature Logos',
-            'object_type': 'feature_logo',
-            'changesets': feature_logos.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Characters',
-            'object_type': 'character',
-            'changesets': characters.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Groups',
-            'object_type': 'group',
-            'changesets': groups.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Group Memberships',
-            'object_type': 'group_membership',
-            'changesets': group_memberships.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Issue Skeletons',
-            'object_type': 'issue',
-            'changesets': issue_adds.order_by('modified', 'id')
-                                    .annotate(
-              country=Max('issuerevisions__series__country__id')),
-          },
-          {
-            'object_name': 'Issue Bulk Changes',
-            'object_type': 'issue',
-            'changesets': issue_bulks.order_by('state', 'modified', 'id')
-                                     .annotate(
-              country=Max('issuerevisions__series__country__id')),
-          },
-          {
-            'object_name': 'Issues',
-            'object_type': 'issue',
-            'changesets': issues.order_by('state', 'modified', 'id')
-                                .annotate(
-              country=Max('issuerevisions__series__country__id')),
-          },
-          {
-            'object_name': 'Received Awards',
-            'object_type': 'received_award',
-            'changesets': received_awards.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Creator Art Influences',
-            'object_type': 'creator_art_influence',
-            'changesets': creator_art_influences.order_by('modified',
-                                                          'id')
-                                                .annotate(
-              country=Max(
-                'creatorartinfluencerevisions__creator__birth_country__id'))
-          },
-          {
-            'object_name': 'Creator Degrees',
-            'object_type': 'creator_degree',
-            'changesets': creator_degres.order_by('modified', 'id')
-                                        .annotate(
-              country=Max(
-                'creatordegreerevisions__creator__birth_country__id'))
-          },
-          {
-            'object_name': 'Creator Memberships',
-            'object_type': 'creator_membership',
-            'changesets': creator_memberships.order_by('modified', 'id')
-                                             .annotate(
-              country=Max(
-                'creatormembershiprevisions__creator__birth_country__id'))
-          },
-          {
-            'object_name': 'Creator Non Comic Works',
-            'object_type': 'creator_non_comic_work',
-            'changesets': creator_non_comic_works.order_by('modified', 'id')
-                                                 .annotate(
-              country=Max(
-                'creatornoncomicworkrevisions__creator__birth_country__id'))
-          },
-          {
-            'object_name': 'Creator Relations',
-            'object_type': 'creator_relation',
-            'changesets': creator_relations.order_by('modified', 'id')
-                                           .annotate(
-              country=Max(
-                'creatorrelationrevisions__from_creator__birth_country__id'))
-          },
-          {
-            'object_name': 'Creator Schools',
-            'object_type': 'creator_school',
-            'changesets': creator_schools.order_by('modified', 'id')
-                                         .annotate(
-              country=Max(
-                'creatorschoolrevisions__creator__birth_country__id'))
-          },
-          {
-            'object_name': 'Series Bonds',
-            'object_type': 'series_bond',
-            'changesets': series_bonds.order_by('modified', 'id')
-                                      .annotate(
-              country=Max('seriesbondrevisions__origin__country__id')),
-          },
-          {
-            'object_name': 'Feature Relations',
-            'object_type': 'feature_relation',
-            'changesets': feature_relations.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Character Relations',
-            'object_type': 'character_relation',
-            'changesets': character_relations.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Group Relations',
-            'object_type': 'group_relation',
-            'changesets': group_relations.order_by('modified', 'id')
-          },
-          {
-            'object_name': 'Covers',
-            'object_type': 'cover',
-            'changesets': covers.order_by('state', 'modified', 'id')
-                                .annotate(
-              country=Max('coverrevisions__issue__series__country__id')),
-          },
-          {
-            'object_name': 'Images',
-            'object_type': 'image',
-            'changesets': images.order_by('state', 'modified', 'id'),
-          },
-        ],
+        'data': queue_sections(**kwargs),
       }
     )
     response['Cache-Control'] = "no-cache, no-store, max-age=0," \
@@ -1,4 +1,7 @@
 # -*- coding: utf-8 -*-
+import threading
+from contextlib import contextmanager
+
 from django.db import models
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -8,8 +11,57 @@ from apps.gcd.models import Publisher, Series, Issue, INDEXED, Story, Cover,\
                             Creator
 
 
+# deltas collected by CountStatsManager.batch() in the current thread
+_batch = threading.local()
+
+
 class CountStatsManager(models.Manager):
 
+    @contextmanager
+    def batch(self):
+        """
+        Collects the statistic updates done within the context and applies
+        them when it is left, with one UPDATE per statistic row.
+
+        Approving a large changeset otherwise updates the same few rows
+        thousands of times.  Opposing deltas cancel out, and the rows are
+        updated in a fixed order to avoid deadlocks between approvals.
+        Nothing is applied if the context is left with an exception.
+        Nested batches are merged into the outermost one.  Deltas for
+        language or country statistics that do not exist yet are dropped,
+        scripts/rebuild_count_stats.py creates them.
+        """
+        if getattr(_batch, 'deltas', None) is not None:
+            yield
+            return
+
+        _batch.deltas = {}
+        try:
+            yield
+            deltas = _batch.deltas
+        finally:
+            _batch.deltas = None
+        self._apply_deltas(deltas)
+
+    def _apply_deltas(self, deltas):
+        for key in sorted(deltas, key=lambda key: (key[0], key[1] or 0,
+                                                   key[2] or 0)):
+            if deltas[key]:
+                name, language_id, country_id = key
+                # missing stats are left to scripts/rebuild_count_stats.py
+                self.filter(name=name, language_id=language_id,
+                            country_id=country_id)\
+                    .update(count=models.F('count') + deltas[key])
+
+    def _add_delta(self, field, delta, language=None, country=None):
+        keys = [(field, None, None)]
+        if language:
+            keys.append((field, language.id, None))
+        if country:
+            keys.append((field, None, country.id))
+        for key in keys:
+            _batch.deltas[key] = _batch.deltas.get(key, 0) + delta
+
     def init_stats(self, language=None, country=None):
         if language and country:
             raise ValueError('either country or language stats')
@@ -73,18 +125,27 @@ class CountStatsManager(models.Manager):
         The generic statistic is always updated.  The language and/or
         country statistics are updated if their respective parameters
         are not None.
+
+        Within batch() the update is only collected.
         """
+        if getattr(_batch, 'deltas', None) is not None:
+            self._add_delta(field, delta, language=language, country=country)
+            return
+
         stat = self.get(name=field, language=None, country=None)
         stat.count = models.F('count') + delta
         stat.save()
 
+        # Language or country stats which do not exist yet are not
+        # initialized here, as counting takes too long for a request.
+        # They are created by scripts/rebuild_count_stats.py.
         if language:
             try:
                 stat = self.get(name=field, language=language, country=None)
                 stat.count = models.F('count') + delta
                 stat.save()
             except CountStats.DoesNotExist:
-                self.init_stats(language=language)
+                pass
 
         if country:
             try:
@@ -92,7 +153,7 @@ class CountStatsManager(models.Manager):
                 stat.count = models.F('count') + delta
                 stat.save()
             except CountStats.DoesNotExist:
-                self.init_stats(country=country)
+                pass
 
     def update_all_counts(self, deltas, negate=False,
                           language=None, country=None):
@@ -107,22 +168,10 @@ class CountStatsManager(models.Manager):
         By default, the deltas are added, but if negate=True, then the
         deltas will be subtracted (by negating them before update).
 
-        If the language or country do not have stats yet, they will
-        be initialized and the deltas will not be applied to them.
-        As this should be called after the changes have been committed
-        back to the display (which is needed to get the deltas),
-        the stats initialization will include the latest changes.
+        If the language or country do not have stats yet, the deltas
+        are not applied to them.  Their stats are created with the current
+        counts by scripts/rebuild_count_stats.py.
         """
-        if country and not self.filter(country=country,
-                                       language=None).exists():
-            self.init_stats(country=country)
-            country = None
-
-        if language and not self.filter(language=language,
-                                        country=None).exists():
-            self.init_stats(language=language)
-            language = None
-
         for field in deltas:
             # 'series issues' apply only to the Series object, not CountStats.
             if field not in ['series issues', 'publisher series'] \
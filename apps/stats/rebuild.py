@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+Recounting the statistics and the cached counts from the data.
+
+CountStats and the *_count fields of publishers, series etc. are kept
+up to date by applying deltas when changes are approved.  The functions
+here count everything anew, report where the stored values drifted from
+the data, and fix them.  Counting is done with GROUP BY queries over id
+ranges, so no single query has to scan the large tables at once.
+
+This is too slow for a request, use scripts/rebuild_count_stats.py.
+"""
+
+from collections import Counter
+
+from django.db.models import Count, Max, Min
+
+from apps.gcd.models import Publisher, IndiciaPublisher, BrandGroup, Brand, \
+                            Series, Issue, INDEXED, Story, Cover, Creator
+from apps.stats.models import CountStats
+
+# number of ids of the counted table per GROUP BY query
+CHUNK_SIZE = 100000
+
+
+def grouped_counts(queryset, fields, chunk_size=CHUNK_SIZE):
+    """
+    Returns a Counter mapping the value tuples of the fields to the number
+    of objects in the queryset having them.
+    """
+    bounds = queryset.model.objects.aggregate(Min('id'), Max('id'))
+    counts = Counter()
+    if bounds['id__min'] is None:
+        return counts
+    for start in range(bounds['id__min'], bounds['id__max'] + 1, chunk_size):
+        rows = queryset.filter(id__gte=start, id__lt=start + chunk_size)\
+                       .order_by().values_list(*fields)\
+                       .annotate(num=Count('id'))
+        for row in rows:
+            counts[row[:-1]] += row[-1]
+    return counts
+
+
+def _comics_base_issues():
+    return Issue.objects.filter(deleted=False, variant_of=None,
+                                series__is_comics_publication=True)
+
+
+def _count_stats_querysets():
+    """
+    Returns tuples of the name of the statistic, the counted objects,
+    and the paths to their language and country, as used by init_stats.
+    """
+    return [
+      ('publishers', Publisher.objects.filter(deleted=False),
+       None, 'country_id'),
+      ('creators', Creator.objects.filter(deleted=False), None, None),
+      ('series', Series.objects.filter(deleted=False,
+                                       is_comics_publication=True),
+       'language_id', 'country_id'),
+      ('issues', _comics_base_issues(),
+       'series__language_id', 'series__country_id'),
+      ('variant issues',
+       Issue.objects.filter(deleted=False,
+                            series__is_comics_publication=True)
+                    .exclude(variant_of=None),
+       'series__language_id', 'series__country_id'),
+      ('issue indexes',
+       _comics_base_issues().exclude(is_indexed=INDEXED['skeleton']),
+       'series__language_id', 'series__country_id'),
+      ('covers', Cover.objects.filter(deleted=False),
+       'issue__series__language_id', 'issue__series__country_id'),
+      ('stories', Story.objects.filter(deleted=False),
+       'issue__series__language_id', 'issue__series__country_id'),
+    ]
+
+
+def expected_count_stats(chunk_size=CHUNK_SIZE):
+    """
+    Returns a dict mapping (name, language_id, country_id) of all
+    CountStats rows to the count they should have.
+
+    As with init_stats, each language and country with data gets all
+    its statistics, even if some of them are zero.
+    """
+    expected = {}
+    languages = set()
+    countries = set()
+    per_scope = []
+    for name, queryset, language_path, country_path \
+            in _count_stats_querysets():
+        paths = [path for path in (language_path, country_path) if path]
+        # without paths group on a constant to get the plain count
+        counts = grouped_counts(queryset, paths or ['deleted'], chunk_size)
+        expected[(name, None, None)] = sum(counts.values())
+        by_scope = Counter()
+        for values, count in counts.items():
+            values = dict(zip(paths, values))
+            if language_path and values[language_path]:
+                by_scope[(values[language_path], None)] += count
+                languages.add(values[language_path])
+            if country_path and values[country_path]:
+                by_scope[(None, values[country_path])] += count
+                countries.add(values[country_path])
+        per_scope.append((name, language_path, country_path, by_scope))
+
+    for name, language_path, country_path, by_scope in per_scope:
+        if language_path:
+            for language_id in languages:
+                expected[(name, language_id, None)] = \
+                  by_scope[(language_id, None)]
+        if country_path:
+            for country_id in countries:
+                expected[(name, None, country_id)] = \
+                  by_scope[(None, country_id)]
+    return expected
+
+
+def rebuild_count_stats(fix=True, chunk_size=CHUNK_SIZE):
+    """
+    Compares the CountStats rows with the counts from the data, and if fix
+    is set, corrects them and creates missing ones.
+
+    Returns the drift as a list of (name, language_id, country_id, stored
+    count, counted) tuples, the stored count is None for missing rows.
+    """
+    expected = expected_count_stats(chunk_size)
+    stored = {}
+    for id, name, language_id, country_id, count in \
+            CountStats.objects.values_list('id', 'name', 'language_id',
+                                           'country_id', 'count'):
+        stored[(name, language_id, country_id)] = (id, count)
+
+    drift = []
+    for key in sorted(expected, key=lambda key: (key[0], key[1] or 0,
+                                                 key[2] or 0)):
+        name, language_id, country_id = key
+        if key not in stored:
+            drift.append((name, language_id, country_id, None,
+                          expected[key]))
+            if fix:
+                CountStats.objects.create(name=name, language_id=language_id,
+                                          country_id=country_id,
+                                          count=expected[key])
+        elif stored[key][1] != expected[key]:
+            drift.append((name, language_id, country_id, stored[key][1],
+                          expected[key]))
+            if fix:
+                CountStats.objects.filter(id=stored[key][0])\
+                                  .update(count=expected[key])
+    return drift
+
+
+def _cached_count_querysets():
+    """
+    Returns tuples of the model and its cached count field, together with
+    the counted objects and their path to the model, matching how the
+    stat_counts() deltas are applied on approval.
+    """
+    return [
+      (Series, 'issue_count',
+       Issue.objects.filter(deleted=False, variant_of=None), 'series_id'),
+      (Publisher, 'series_count', Series.objects.filter(deleted=False),
+       'publisher_id'),
+      (Publisher, 'issue_count', _comics_base_issues(),
+       'series__publisher_id'),
+      (Publisher, 'brand_count', BrandGroup.objects.filter(deleted=False),
+       'parent_id'),
+      (Publisher, 'indicia_publisher_count',
+       IndiciaPublisher.objects.filter(deleted=False), 'parent_id'),
+      (IndiciaPublisher, 'issue_count', _comics_base_issues(),
+       'indicia_publisher_id'),
+      (BrandGroup, 'issue_count', _comics_base_issues(), 'brand__group'),
+      (Brand, 'issue_count', _comics_base_issues(), 'brand_id'),
+    ]
+
+
+def rebuild_cached_counts(fix=True, chunk_size=CHUNK_SIZE):
+    """
+    Compares the cached counts of the non-deleted objects with the counts
+    from the data, and if fix is set, corrects them.
+
+    Returns the drift as a list of (model name, field, object id, stored
+    count, counted) tuples.
+    """
+    drift = []
+    for model, field, queryset, path in _cached_count_querysets():
+        counts = grouped_counts(queryset, [path], chunk_size)
+        stored = model.objects.filter(deleted=False).order_by('id')\
+                              .values_list('id', field)
+        for id, count in stored.iterator():
+            if count != counts[(id,)]:
+                drift.append((model.__name__, field, id, count,
+                              counts[(id,)]))
+                if fix:
+                    model.objects.filter(id=id)\
+                                 .update(**{field: counts[(id,)]})
+    return drift
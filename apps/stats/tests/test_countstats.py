@@ -307,7 +307,7 @@ def test_update_neither(mocks_for_update):
     _check_delta_applications(f_mock, cs_mocks, 1)
 
 
-def test_update_init_language_update_both(mocks_for_update):
+def test_update_missing_language_update_both(mocks_for_update):
     get_mock, is_mock, f_mock, cs_mocks = mocks_for_update
 
     cs_iter = iter(cs_mocks)
@@ -321,7 +321,7 @@ def test_update_init_language_update_both(mocks_for_update):
     get_mock.side_effect = fake_get
     CountStats.objects.update_count('foo', 1, country=ANY_COUNTRY,
                                     language=ANY_LANGUAGE)
-    is_mock.assert_called_once_with(language=ANY_LANGUAGE)
+    assert is_mock.called is False
 
     get_mock.assert_has_calls([
         mock.call(name='foo', language=None, country=None),
@@ -331,7 +331,7 @@ def test_update_init_language_update_both(mocks_for_update):
     _check_delta_applications(f_mock, cs_mocks, 2)
 
 
-def test_update_init_country_no_language(mocks_for_update):
+def test_update_missing_country_no_language(mocks_for_update):
     get_mock, is_mock, f_mock, cs_mocks = mocks_for_update
 
     cs_iter = iter(cs_mocks)
@@ -344,7 +344,7 @@ def test_update_init_country_no_language(mocks_for_update):
 
     get_mock.side_effect = fake_get
     CountStats.objects.update_count('foo', 1, country=ANY_COUNTRY)
-    is_mock.assert_called_once_with(country=ANY_COUNTRY)
+    assert is_mock.called is False
 
     get_mock.assert_has_calls([
         mock.call(name='foo', language=None, country=None),
@@ -380,8 +380,7 @@ def test_update_all_language_only(mocks_for_update_all):
         {'foo': 1, 'bar': 5, 'series issues': 100}, language=ANY_LANGUAGE)
 
     assert is_mock.called is False
-    filter_mock.assert_called_once_with(language=ANY_LANGUAGE, country=None)
-    filter_mock.return_value.exists.assert_called_once_with()
+    assert filter_mock.called is False
 
     uc_mock.assert_has_calls([
         mock.call(field='foo', delta=1, language=ANY_LANGUAGE, country=None),
@@ -397,8 +396,7 @@ def test_update_all_country_only(mocks_for_update_all):
         {'foo': 1, 'bar': 5}, country=ANY_COUNTRY)
 
     assert is_mock.called is False
-    filter_mock.assert_called_once_with(language=None, country=ANY_COUNTRY)
-    filter_mock.return_value.exists.assert_called_once_with()
+    assert filter_mock.called is False
 
     uc_mock.assert_has_calls([
         mock.call(field='foo', delta=1, language=None, country=ANY_COUNTRY),
@@ -407,29 +405,21 @@ def test_update_all_country_only(mocks_for_update_all):
     assert uc_mock.call_count == 2
 
 
-def test_update_all_init_both(mocks_for_update_all):
+def test_update_all_no_init(mocks_for_update_all):
     filter_mock, is_mock, uc_mock = mocks_for_update_all
 
-    filter_mock.return_value.exists.return_value = False
-
     CountStats.objects.update_all_counts(
         {'foo': 1, 'bar': 5}, country=ANY_COUNTRY, language=ANY_LANGUAGE)
 
-    filter_mock.assert_has_calls([mock.call(country=ANY_COUNTRY,
-                                            language=None),
-                                  mock.call(country=None,
-                                            language=ANY_LANGUAGE)],
-                                 any_order=True)
-    assert filter_mock.call_count == 2
-
-    is_mock.assert_has_calls([mock.call(country=ANY_COUNTRY),
-                              mock.call(language=ANY_LANGUAGE)],
-                             any_order=True)
-    assert is_mock.call_count == 2
+    # missing stats are left to the rebuild script, update_count skips them
+    assert filter_mock.called is False
+    assert is_mock.called is False
 
     uc_mock.assert_has_calls([
-        mock.call(field='foo', delta=1, language=None, country=None),
-        mock.call(field='bar', delta=5, language=None, country=None),
+        mock.call(field='foo', delta=1,
+                  language=ANY_LANGUAGE, country=ANY_COUNTRY),
+        mock.call(field='bar', delta=5,
+                  language=ANY_LANGUAGE, country=ANY_COUNTRY),
     ])
     assert uc_mock.call_count == 2
 
@@ -442,13 +432,7 @@ def test_update_all_negate(mocks_for_update_all):
                                          country=ANY_COUNTRY,
                                          language=ANY_LANGUAGE)
 
-    filter_mock.assert_has_calls([mock.call(country=ANY_COUNTRY,
-                                            language=None),
-                                  mock.call(country=None,
-                                            language=ANY_LANGUAGE)],
-                                 any_order=True)
-    assert filter_mock.call_count == 2
-
+    assert not filter_mock.called
     assert not is_mock.called
 
     uc_mock.assert_has_calls([
@@ -457,3 +441,82 @@ def test_update_all_negate(mocks_for_update_all):
         mock.call(field='bar', delta=-5,
                   language=ANY_LANGUAGE, country=ANY_COUNTRY)])
     assert uc_mock.call_count == 2
+
+
+@pytest.yield_fixture
+def mocks_for_batch():
+    """
+    Returns a 3-tuple of mocks for testing CountStatsManager.batch().
+
+    In order (on CountStatsManager): filter, init_stats, get
+    """
+    path = 'apps.stats.models.CountStatsManager'
+    with mock.patch('%s.filter' % path) as filter_mock, \
+            mock.patch('%s.init_stats' % path) as is_mock, \
+            mock.patch('%s.get' % path) as get_mock:
+        filter_mock.return_value.update.return_value = 1
+        yield filter_mock, is_mock, get_mock
+
+
+def test_batch_coalesces_updates(mocks_for_batch):
+    filter_mock, is_mock, get_mock = mocks_for_batch
+
+    with CountStats.objects.batch():
+        CountStats.objects.update_count('stories', 1, language=ANY_LANGUAGE)
+        CountStats.objects.update_count('stories', 2, language=ANY_LANGUAGE,
+                                        country=ANY_COUNTRY)
+        CountStats.objects.update_count('covers', 1)
+        CountStats.objects.update_count('covers', -1)
+        # nested batches are part of the outer one
+        with CountStats.objects.batch():
+            CountStats.objects.update_count('issues', 1)
+        assert filter_mock.called is False
+
+    assert get_mock.called is False
+    assert is_mock.called is False
+    # the cancelled out covers are skipped, the rest sorted
+    assert filter_mock.call_args_list == [
+        mock.call(name='issues', language_id=None, country_id=None),
+        mock.call(name='stories', language_id=None, country_id=None),
+        mock.call(name='stories', language_id=None, country_id=1),
+        mock.call(name='stories', language_id=1, country_id=None)]
+    assert filter_mock.return_value.update.call_count == 4
+
+
+def test_batch_missing_stats(mocks_for_batch):
+    filter_mock, is_mock, get_mock = mocks_for_batch
+    filter_mock.return_value.update.side_effect = [1, 0]
+
+    with CountStats.objects.batch():
+        CountStats.objects.update_count('series', 1, language=ANY_LANGUAGE)
+
+    assert is_mock.called is False
+    assert filter_mock.return_value.update.call_count == 2
+
+
+def test_batch_exception(mocks_for_batch):
+    filter_mock, is_mock, get_mock = mocks_for_batch
+
+    with pytest.raises(ValueError):
+        with CountStats.objects.batch():
+            CountStats.objects.update_count('stories', 1)
+            raise ValueError
+
+    assert filter_mock.called is False
+    # afterwards updates are applied directly again
+    CountStats.objects.update_count('stories', 1)
+    get_mock.assert_called_once_with(name='stories', language=None,
+                                     country=None)
+
+
+def test_batch_update_all(mocks_for_batch):
+    filter_mock, is_mock, get_mock = mocks_for_batch
+
+    with CountStats.objects.batch():
+        CountStats.objects.update_all_counts({'stories': 2},
+                                             language=ANY_LANGUAGE,
+                                             country=ANY_COUNTRY)
+        assert filter_mock.called is False
+
+    assert is_mock.called is False
+    assert filter_mock.return_value.update.call_count == 3
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+
+
+import mock
+import pytest
+
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from apps.middleware.query_budget import fingerprint, percentile, \
+                                         QueryRecorder, QueryBudgetMiddleware, \
+                                         record_sample, view_statistics, \
+                                         query_budget, assert_query_budget, \
+                                         assert_view_query_budget, \
+                                         QueryBudgetTemplates
+
+
+BUDGET = 'apps.middleware.query_budget'
+ISSUE_SQL = 'SELECT * FROM gcd_issue WHERE id = %s'
+
+
+def _recorder(*statements):
+    recorder = QueryRecorder()
+    execute = mock.MagicMock()
+    for sql in statements:
+        recorder(execute, sql, (), False, {})
+    return recorder
+
+
+def test_fingerprint():
+    assert fingerprint("SELECT * FROM gcd_issue WHERE id IN (%s, %s, %s) "
+                       "AND number = '12' LIMIT 21") == \
+        'SELECT * FROM gcd_issue WHERE id IN (...) AND number = ? LIMIT ?'
+
+
+def test_recorder():
+    recorder = _recorder(ISSUE_SQL, ISSUE_SQL, 'SELECT 1')
+    assert recorder.count == 3
+    assert recorder.duplicates() == [(ISSUE_SQL, 2)]
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 95) == 95
+    assert percentile([3], 99) == 3
+    assert percentile([], 50) is None
+
+
+@pytest.yield_fixture
+def locmem_cache():
+    with override_settings(CACHES={'default': {
+      'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+      'LOCATION': 'query_budget_test'}}), \
+            mock.patch('%s.cache' % BUDGET) as cache_mock:
+        cache = caches['default']
+        cache.clear()
+        for method in ('get', 'set', 'get_many'):
+            getattr(cache_mock, method).side_effect = getattr(cache, method)
+        yield cache
+
+
+@override_settings(QUERY_BUDGET_SAMPLES=2)
+def test_view_statistics(locmem_cache):
+    record_sample('show_issue', _recorder(ISSUE_SQL), 0.5)
+    record_sample('show_issue', _recorder(ISSUE_SQL, ISSUE_SQL), 0.3, 1)
+    record_sample('show_issue', _recorder(ISSUE_SQL, ISSUE_SQL, 'SELECT 1'),
+                  0.2, 1)
+    record_sample('home', _recorder(), 0.1)
+
+    home, issue = sorted(view_statistics(), key=lambda row: row['name'])
+    assert issue['samples'] == 2
+    assert issue['queries'] == [2, 3, 3]
+    assert issue['over_budget'] == 2
+    assert issue['duplicates'] == [(ISSUE_SQL, 4)]
+    assert home['queries'] == [0, 0, 0]
+    assert home['render_ms'] == [0, 0, 0]
+
+
+@override_settings(QUERY_BUDGET_SAMPLE_RATE=1)
+def test_middleware():
+    @query_budget(5)
+    def view(request):
+        return HttpResponse()
+
+    request = RequestFactory().get('/issue/1/')
+    request.resolver_match = mock.MagicMock(view_name='show_issue', func=view)
+    with mock.patch('%s.record_sample' % BUDGET) as record_mock:
+        QueryBudgetMiddleware(lambda request: HttpResponse())(request)
+    name, recorder, elapsed, budget = record_mock.call_args[0]
+    assert (name, recorder.count, budget) == ('show_issue', 0, 5)
+
+
+def _template_backend():
+    return QueryBudgetTemplates({'NAME': 'django', 'DIRS': [],
+                                 'APP_DIRS': False, 'OPTIONS': {}})
+
+
+@override_settings(QUERY_BUDGET_SAMPLE_RATE=1)
+def test_middleware_render_time():
+    template = _template_backend().from_string('{{ issue }}')
+
+    def view(request):
+        return HttpResponse(template.render({'issue': 'X-Men #1'}))
+
+    request = RequestFactory().get('/issue/1/')
+    request.resolver_match = mock.MagicMock(view_name='show_issue', func=view)
+    with mock.patch('%s.record_sample' % BUDGET) as record_mock, \
+            mock.patch('%s.time.time' % BUDGET) as time_mock:
+        time_mock.side_effect = [10.0, 10.5, 10.75, 11.0]
+        response = QueryBudgetMiddleware(view)(request)
+
+    assert response.content == b'X-Men #1'
+    name, recorder, elapsed, budget = record_mock.call_args[0]
+    assert recorder.render_time == 0.25
+    assert elapsed == 1.0
+    # outside of sampled requests nothing is recorded
+    assert template.render({'issue': 'X-Men #2'}) == 'X-Men #2'
+
+
+@override_settings(QUERY_BUDGET_SAMPLE_RATE=1)
+def test_middleware_streaming():
+    wrappers = []
+
+    def rows():
+        for row in range(2):
+            # the queries while streaming, after the view returned
+            wrappers.append(list(connection.execute_wrappers))
+            yield 'row %d\n' % row
+
+    request = RequestFactory().get('/export/')
+    request.resolver_match = mock.MagicMock(view_name='export', func=None)
+    with mock.patch('%s.record_sample' % BUDGET) as record_mock:
+        response = QueryBudgetMiddleware(
+          lambda request: StreamingHttpResponse(rows()))(request)
+        assert not record_mock.called
+        assert b''.join(response.streaming_content) == b'row 0\nrow 1\n'
+    assert record_mock.call_count == 1
+    recorder = record_mock.call_args[0][1]
+    assert wrappers == [[recorder], [recorder]]
+    assert connection.execute_wrappers == []
+
+
+def test_assert_query_budget():
+    with assert_query_budget(2) as recorder:
+        recorder(mock.MagicMock(), ISSUE_SQL, (), False, {})
+
+    with pytest.raises(AssertionError) as excinfo:
+        with assert_query_budget(1) as recorder:
+            recorder(mock.MagicMock(), ISSUE_SQL, (), False, {})
+            recorder(mock.MagicMock(), ISSUE_SQL, (), False, {})
+    assert '2 queries exceed the budget of 1' in str(excinfo.value)
+
+
+def test_assert_view_query_budget():
+    @query_budget(0)
+    def view(request):
+        return HttpResponse('page')
+
+    response = assert_view_query_budget(view, RequestFactory().get('/'))
+    assert response.content == b'page'
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+
+from collections import Counter
+
+import mock
+import pytest
+
+from apps.gcd.models import Series
+from apps.stats.rebuild import grouped_counts, expected_count_stats, \
+                               rebuild_count_stats, rebuild_cached_counts
+
+
+REBUILD = 'apps.stats.rebuild'
+
+
+def test_grouped_counts():
+    queryset = mock.MagicMock(model=Series)
+    rows = queryset.filter.return_value.order_by.return_value.values_list\
+                   .return_value.annotate
+    rows.side_effect = [[(1, 2, 5), (1, 3, 1)], [(1, 2, 4)]]
+
+    with mock.patch('%s.Series.objects.aggregate' % REBUILD) as agg_mock:
+        agg_mock.return_value = {'id__min': 3, 'id__max': 12}
+        counts = grouped_counts(queryset, ['language_id', 'country_id'],
+                                chunk_size=5)
+
+    assert counts == {(1, 2): 9, (1, 3): 1}
+    assert queryset.filter.call_args_list == [
+        mock.call(id__gte=3, id__lt=8), mock.call(id__gte=8, id__lt=13)]
+
+
+def test_grouped_counts_empty():
+    queryset = mock.MagicMock(model=Series)
+
+    with mock.patch('%s.Series.objects.aggregate' % REBUILD) as agg_mock:
+        agg_mock.return_value = {'id__min': None, 'id__max': None}
+        assert grouped_counts(queryset, ['language_id']) == {}
+
+    assert queryset.filter.called is False
+
+
+@pytest.yield_fixture
+def stats_querysets():
+    with mock.patch('%s._count_stats_querysets' % REBUILD) as qs_mock, \
+            mock.patch('%s.grouped_counts' % REBUILD) as counts_mock:
+        qs_mock.return_value = [
+          ('publishers', 'publisher qs', None, 'country_id'),
+          ('creators', 'creator qs', None, None),
+          ('series', 'series qs', 'language_id', 'country_id')]
+        counts_mock.side_effect = [
+          Counter({(5,): 2, (6,): 1}),
+          Counter({(False,): 7}),
+          Counter({(1, 5): 3, (2, 5): 1, (None, 6): 1})]
+        yield counts_mock
+
+
+def test_expected_count_stats(stats_querysets):
+    expected = expected_count_stats()
+
+    assert stats_querysets.call_args_list[1] == mock.call('creator qs',
+                                                          ['deleted'],
+                                                          100000)
+    assert expected == {
+      ('publishers', None, None): 3,
+      ('publishers', None, 5): 2,
+      ('publishers', None, 6): 1,
+      ('creators', None, None): 7,
+      ('series', None, None): 5,
+      ('series', 1, None): 3,
+      ('series', 2, None): 1,
+      ('series', None, 5): 4,
+      ('series', None, 6): 1}
+
+
+@pytest.yield_fixture
+def stored_stats():
+    with mock.patch('%s.expected_count_stats' % REBUILD) as expected_mock, \
+            mock.patch('%s.CountStats.objects' % REBUILD) as stats_mock:
+        expected_mock.return_value = {('series', None, None): 5,
+                                      ('series', 1, None): 3,
+                                      ('series', None, 5): 4}
+        stats_mock.values_list.return_value = [(10, 'series', None, None, 5),
+                                               (11, 'series', 1, None, 2)]
+        yield stats_mock
+
+
+def test_rebuild_count_stats(stored_stats):
+    drift = rebuild_count_stats()
+
+    assert drift == [('series', None, 5, None, 4),
+                     ('series', 1, None, 2, 3)]
+    stored_stats.create.assert_called_once_with(name='series',
+                                                language_id=None,
+                                                country_id=5, count=4)
+    stored_stats.filter.assert_called_once_with(id=11)
+    stored_stats.filter.return_value.update.assert_called_once_with(count=3)
+
+
+def test_rebuild_count_stats_check(stored_stats):
+    drift = rebuild_count_stats(fix=False)
+
+    assert len(drift) == 2
+    assert stored_stats.create.called is False
+    assert stored_stats.filter.called is False
+
+
+def test_rebuild_cached_counts():
+    model = mock.MagicMock(__name__='Series')
+    model.objects.filter.return_value.order_by.return_value.values_list\
+         .return_value.iterator.return_value = [(1, 4), (2, 3), (3, 1)]
+
+    with mock.patch('%s._cached_count_querysets' % REBUILD) as qs_mock, \
+            mock.patch('%s.grouped_counts' % REBUILD) as counts_mock:
+        qs_mock.return_value = [(model, 'issue_count', 'issue qs',
+                                 'series_id')]
+        counts_mock.return_value = Counter({(1,): 4, (2,): 5})
+        drift = rebuild_cached_counts()
+
+    counts_mock.assert_called_once_with('issue qs', ['series_id'], 100000)
+    assert drift == [('Series', 'issue_count', 2, 3, 5),
+                     ('Series', 'issue_count', 3, 1, 0)]
+    model.objects.filter.assert_has_calls([mock.call(id=2),
+                                           mock.call().update(issue_count=5),
+                                           mock.call(id=3),
+                                           mock.call().update(issue_count=0)])
@@ -9,4 +9,5 @@ from apps.stats import views
 app_name = 'stats'
 urlpatterns = [url(r'^download/', views.download, {}, name='download'),
                url(r'^countries/$', views.countries_in_use),
+               url(r'^query_budgets/$', views.query_budgets),
 ]
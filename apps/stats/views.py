@@ -18,6 +18,7 @@ from apps.stats.forms import DownloadForm
 from apps.gcd.models import Creator, Publisher, Series
 from apps.indexer.models import Indexer
 from apps.stddata.models import Country
+from apps.middleware.query_budget import view_statistics
 
 @login_required
 def download(request):
@@ -123,3 +124,20 @@ def countries_in_use(request):
         return render(request, 'indexer/error.html',
                       {'error_text':
                        'You are not allowed to access this page.'})
+
+
+def query_budgets(request):
+    """
+    Show the recorded query counts and times per view, for finding views
+    running too many or repeated queries.
+    """
+
+    if request.user.is_authenticated and \
+       request.user.groups.filter(name='admin'):
+        return render(request, 'gcd/admin/query_budgets.html',
+                      {'views': view_statistics(),
+                       'sample_rate': settings.QUERY_BUDGET_SAMPLE_RATE})
+    else:
+        return render(request, 'indexer/error.html',
+                      {'error_text':
+                       'You are not allowed to access this page.'})
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+
+import random
+
+import mock
+import pytest
+
+from apps.voting.models import Option, Vote
+from apps.voting.views import _calculate_results, _ranked_ballots
+
+VIEWS = 'apps.voting.views'
+OPTION_IDS = list(range(1, 11))
+VOTERS = 5000
+
+
+def _electorate():
+    """
+    Returns the votes of VOTERS voters, ordered as the database would.
+    Every voter ranks option 3 first and the other options in random order,
+    partly with equal ranks and with gaps between the ranks.
+    """
+    rng = random.Random(17)
+    votes = []
+    vote_id = 0
+    for voter_id in range(1, VOTERS + 1):
+        others = [option_id for option_id in OPTION_IDS if option_id != 3]
+        rng.shuffle(others)
+        ranks = [(2, 3)] + [(4 + 2 * (position // 2), option_id)
+                            for position, option_id in enumerate(others)]
+        for rank, option_id in ranks:
+            vote_id += 1
+            votes.append(Vote(id=vote_id, voter_id=voter_id,
+                              option_id=option_id, rank=rank))
+    return votes
+
+
+@pytest.yield_fixture
+def vote_mocks():
+    with mock.patch('%s.Vote.objects.filter' % VIEWS) as filter_mock, \
+            mock.patch('%s.Vote.objects.bulk_update' % VIEWS) as vote_update, \
+            mock.patch('%s.Option.objects.bulk_update' % VIEWS) \
+            as option_update:
+        votes = filter_mock.return_value.order_by.return_value.only
+        votes.return_value = _electorate()
+        yield filter_mock, vote_update, option_update
+
+
+def test_ranked_ballots(vote_mocks):
+    filter_mock, vote_update, option_update = vote_mocks
+    topic = mock.MagicMock()
+
+    ballots = _ranked_ballots(topic)
+
+    filter_mock.assert_called_once_with(option__topic=topic,
+                                        voter__isnull=False)
+    assert len(ballots) == VOTERS
+    ballot = ballots[0]['ballot']
+    assert ballot[0] == [3]
+    assert [len(group) for group in ballot] == [1, 2, 2, 2, 2, 1]
+    assert sorted(sum(ballot, [])) == OPTION_IDS
+
+    assert vote_update.call_count == 1
+    renumbered = vote_update.call_args[0][0]
+    assert len(renumbered) == VOTERS * len(OPTION_IDS)
+    assert sorted(set(vote.rank for vote in renumbered)) == list(range(1, 7))
+
+
+def test_calculate_results_schulze(vote_mocks):
+    filter_mock, vote_update, option_update = vote_mocks
+    topic = mock.MagicMock()
+    topic.agenda.quorum = None
+    topic.vote_type.name = 'Ranked choice'
+    topic.vote_type.max_votes = None
+    topic.options.all.return_value = [Option(id=option_id)
+                                      for option_id in OPTION_IDS]
+
+    with mock.patch('%s._send_result_email' % VIEWS):
+        _calculate_results([topic])
+
+    options = option_update.call_args[0][0]
+    assert [option.id for option in options if option.result] == [3]
+    assert len(options) == len(OPTION_IDS)
+    assert topic.result_calculated is True
+    topic.save.assert_called_once_with()
+
+
+def test_calculate_results_tied_winners():
+    topic = mock.MagicMock()
+    topic.agenda.quorum = None
+    topic.vote_type.name = 'Board election'
+    topic.vote_type.max_votes = 2
+    topic.vote_type.max_winners = 2
+    options = [Option(id=option_id) for option_id in range(1, 5)]
+    for option, num_votes in zip(options, (9, 5, 5, 1)):
+        option.num_votes = num_votes
+    topic.counted_options.return_value.filter.return_value = \
+        mock.MagicMock(count=mock.MagicMock(return_value=4),
+                       __iter__=lambda self: iter(options))
+
+    with mock.patch('%s.Option.objects.bulk_update' % VIEWS) \
+            as option_update, \
+            mock.patch('%s._send_result_email' % VIEWS):
+        _calculate_results([topic])
+
+    winners = option_update.call_args[0][0]
+    assert [option.id for option in winners] == [1, 2, 3]
+    assert all(option.result for option in winners)
+    assert topic.invalid is True
@@ -2,6 +2,7 @@ import hashlib
 from random import random
 import os.path
 from datetime import datetime
+from itertools import groupby
 from py3votecore.schulze_method import SchulzeMethod
 from py3votecore.condorcet import CondorcetHelper
 
@@ -12,13 +13,15 @@ from django.core.mail import send_mail
 from django.http import HttpResponseRedirect
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required, permission_required
-from django.contrib.auth.models import User
 
 from apps.indexer.views import render_error
 from apps.voting.models import Agenda, Option, Receipt, Topic, Vote, \
                                TYPE_CHARTER, TYPE_PASS_FAIL
 from functools import reduce
 
+# renumbered votes written per query
+RANK_BATCH_SIZE = 1000
+
 EMAIL_RESULT = """
 All ballots have been received for the following topic from the %s agenda:
 
@@ -99,6 +102,38 @@ def dashboard(request):
                    'agendas': Agenda.objects.all()})
 
 
+def _ranked_ballots(topic):
+    """
+    Returns the ballots of the ranked choice topic in the grouping notation,
+    each a list of groups of equally ranked option ids, from one ordered
+    query for all votes of the topic.  The ranks of the votes are
+    renumbered to consecutive ranks starting with 1 on the way.
+    """
+    votes = Vote.objects.filter(option__topic=topic, voter__isnull=False)\
+                        .order_by('voter_id', 'rank', 'id')\
+                        .only('id', 'voter_id', 'option_id', 'rank')
+    ballots = []
+    renumbered = []
+    now = datetime.now()
+    for voter_id, voter_votes in groupby(votes, lambda vote: vote.voter_id):
+        ordered_votes = []
+        last_rank = None
+        for vote in voter_votes:
+            if ordered_votes and vote.rank == last_rank:
+                ordered_votes[-1].append(vote.option_id)
+            else:
+                ordered_votes.append([vote.option_id])
+                last_rank = vote.rank
+            if vote.rank != len(ordered_votes):
+                vote.rank = len(ordered_votes)
+                vote.updated = now
+                renumbered.append(vote)
+        ballots.append({'ballot': ordered_votes})
+    Vote.objects.bulk_update(renumbered, ['rank', 'updated'],
+                             batch_size=RANK_BATCH_SIZE)
+    return ballots
+
+
 def _calculate_results(unresolved):
     """
     Given a QuerySet of unresolved topics (with expired deadlines),
@@ -151,48 +186,23 @@ def _calculate_results(unresolved):
 
         elif not topic.vote_type.max_votes:
             # evaluate Schulze method. First collect votes, than use library.
-            voters = User.objects.filter(votes__option__topic=topic).distinct()
-            options = topic.options.all()
-            ballots = []
-            for voter in voters:
-                votes = Vote.objects.filter(option__in=options, voter=voter)\
-                                    .order_by('rank')
-                ordered_votes = []
-                last_rank = votes[0].rank-1
-                current_rank = 0
-                for vote in votes:
-                    if vote.rank == last_rank:
-                        ordered_votes[-1].append(vote.option_id)
-                    else:
-                        ordered_votes.append([vote.option_id])
-                        last_rank = vote.rank
-                        current_rank += 1
-                    vote.rank = current_rank
-                    vote.save()
-                ballot = {'ballot': ordered_votes}
-                ballots.append(ballot)
             result = SchulzeMethod(
-              ballots,
+              _ranked_ballots(topic),
               ballot_notation=CondorcetHelper.BALLOT_NOTATION_GROUPING)
+            options = list(topic.options.all())
             if hasattr(result, 'tied_winners'):
                 # Schulze method can be tied as well, treat as other ties
-                options = Option.objects.filter(id__in=result.tied_winners)
+                options = [option for option in options
+                           if option.id in result.tied_winners]
                 for option in options:
                     option.result = True
-                    option.save()
                 topic.invalid = True
-                topic.result_calculated = True
-                topic.save()
             else:
-                option = Option.objects.get(id=result.winner)
-                option.result = True
-                option.save()
-                options = options.exclude(id=result.winner)
                 for option in options:
-                    option.result = False
-                    option.save()
-                topic.result_calculated = True
-                topic.save()
+                    option.result = option.id == result.winner
+            Option.objects.bulk_update(options, ['result'])
+            topic.result_calculated = True
+            topic.save()
 
         elif topic.vote_type.max_votes <= topic.vote_type.max_winners:
             # Flag ties that affect the validity of the results,
@@ -200,23 +210,18 @@ def _calculate_results(unresolved):
             # to a "winning" result as well, indicating that they are all
             # equally plausible as winners despite producing more winners
             # than are allowed.
+            options = list(options)
             i = topic.vote_type.max_winners
+            winners = options[0:i]
             while (i > 0 and i < num_options and
                    options[i-1].num_votes == options[i].num_votes):
                 topic.invalid = True
-
-                # Note that setting options[i].result = True and then
-                # saving options[i] does not work, probably as a side effect of
-                # evaluationg the options queryset (it's not actualy an array)
-                option = options[i]
-                option.result = True
-                option.save()
+                winners.append(options[i])
                 i += 1
 
-            # Set all non-tied winning results.
-            for option in options[0:topic.vote_type.max_winners]:
+            for option in winners:
                 option.result = True
-                option.save()
+            Option.objects.bulk_update(winners, ['result'])
 
             topic.result_calculated = True
             topic.save()
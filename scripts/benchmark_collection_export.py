@@ -0,0 +1,98 @@
+"""
+This script measures the CSV export of a large collection.  It creates a
+synthetic collection of the first count issues, by default 20000, for the
+collector of the given user name, or the first collector, with a location,
+an acquisition date and a price for each item.  It then compares reading
+the items one at a time, as the export did before, with the chunked
+export, reporting rows per second and the number of queries.  The
+synthetic collection is rolled back at the end.
+
+Usage: benchmark_collection_export.py [count] [username]
+"""
+
+import sys
+import time
+from decimal import Decimal
+
+import django
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+MARKER = 'export benchmark'
+
+
+def create_collection(collector, count):
+    from apps.gcd.models import Issue
+    from apps.mycomics.models import Collection, CollectionItem, Location
+    from apps.stddata.models import Date
+
+    collection = Collection.objects.create(
+      collector=collector, name=MARKER, acquisition_date_used=True,
+      location_used=True, price_paid_used=True)
+    location = Location.objects.create(user=collector, name=MARKER)
+    date = Date.objects.create(year='2020', month='01', day='01')
+    issue_ids = Issue.objects.filter(deleted=False).order_by('id')\
+                             .values_list('id', flat=True)[:count]
+    CollectionItem.objects.bulk_create(
+      [CollectionItem(issue_id=issue_id, notes=MARKER, location=location,
+                      acquisition_date=date, price_paid=Decimal('1.99'))
+       for issue_id in issue_ids], batch_size=1000)
+
+    through = CollectionItem.collections.through
+    through.objects.bulk_create(
+      [through(collection_id=collection.id, collectionitem_id=item_id)
+       for item_id in CollectionItem.objects.filter(location=location)
+                                            .values_list('id', flat=True)],
+      batch_size=1000)
+    return collection
+
+
+def per_item_rows(collection):
+    from apps.mycomics.export import export_columns, _value, _keywords
+
+    columns = export_columns(collection)
+    for item in collection.items.all():
+        yield [_value(item, path) for header, path in columns] + \
+              [_keywords(item)]
+
+
+def chunked_rows(collection):
+    from apps.mycomics.export import collection_csv_rows
+
+    for lines in collection_csv_rows(collection):
+        for line in lines.splitlines():
+            yield line
+
+
+def main(*args):
+    from apps.mycomics.models import Collector
+
+    args = list(args)
+    count = int(args.pop(0)) if args and args[0].isdigit() else 20000
+    if args:
+        collector = Collector.objects.get(user__username=args[0])
+    else:
+        collector = Collector.objects.order_by('id').first()
+
+    with transaction.atomic():
+        collection = create_collection(collector, count)
+        print("collection of %d items" % collection.items.count())
+        for name, rows in (('per item', per_item_rows),
+                           ('chunked', chunked_rows)):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.time()
+                # the chunked export includes the header
+                exported = sum(1 for row in rows(collection))
+                elapsed = time.time() - start
+            print("  %-10s %9.1f rows/s %7d queries" % (
+                  name, exported / elapsed, len(queries)))
+        transaction.set_rollback(True)
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
@@ -0,0 +1,85 @@
+"""
+This script measures the resolution of a collection import.  It builds a
+synthetic import file of count lines, by default 10000, from the series
+name, number and publisher of the first issues, every tenth line with a
+series name that does not exist.  It reports the lines per second, the
+number of queries and the found issues of the batched import, and for
+comparison the same for the first 500 lines resolved with a query per
+line, as the import did before.
+
+Usage: benchmark_collection_import.py [count]
+"""
+
+import io
+import sys
+import time
+
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# lines resolved with a query per line
+PER_LINE_COUNT = 500
+
+
+def synthetic_file(count):
+    from apps.gcd.models import Issue
+
+    issues = Issue.objects.filter(deleted=False, series__deleted=False)\
+                          .exclude(number='')\
+                          .order_by('id')\
+                          .values_list('series__name', 'number',
+                                       'series__publisher__name')[:count]
+    lines = []
+    for position, (series, number, publisher) in enumerate(issues):
+        if position % 10 == 9:
+            series = 'No such series %d' % position
+        lines.append('"%s","%s","%s"' % (series.replace('"', '""'),
+                                         number.replace('"', '""'),
+                                         publisher.replace('"', '""')))
+    return '\n'.join(lines) + '\n'
+
+
+def per_line(csv_file):
+    import csv
+    from apps.gcd.models import Issue
+
+    issue_ids = set()
+    for position, line in enumerate(csv.reader(csv_file)):
+        if position == PER_LINE_COUNT:
+            break
+        issues = Issue.objects.filter(series__name__icontains=line[0].strip(),
+                                      number=line[1].strip(),
+                                      series__publisher__name__icontains=
+                                      line[2].strip())
+        issue_ids.update(issues.values_list('id', flat=True))
+    return issue_ids, PER_LINE_COUNT
+
+
+def batched(csv_file):
+    from apps.mycomics.importer import import_issues
+
+    lines = csv_file.getvalue().count('\n')
+    return import_issues(csv_file)[0], lines
+
+
+def main(*args):
+    count = int(args[0]) if args else 10000
+    data = synthetic_file(count)
+    print("import of %d lines" % data.count('\n'))
+    for name, resolve in (('per line', per_line), ('batched', batched)):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.time()
+            issue_ids, lines = resolve(io.StringIO(data))
+            elapsed = time.time() - start
+        print("  %-10s %6d lines %9.1f lines/s %7d queries %7d issues" % (
+              name, lines, lines / elapsed, len(queries), len(issue_ids)))
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
@@ -0,0 +1,140 @@
+"""
+This script compares the generating of the scaled cover images by
+apps.oi.covers.generate_sizes with the previous implementation, which
+scaled the full scan three times.
+
+Usage: benchmark_cover_sizes.py <directory with scans> [wraparound]
+
+Each implementation runs in its own process over all scans in the
+directory, the wall time and the peak RSS of the process are reported.
+With 'wraparound' the scans are treated as wraparound covers with the
+front part being the right half, as for uploads.  The sizes of the
+generated images are checked to match between the implementations.
+"""
+
+import glob
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import django
+import PIL.Image as pyImage
+
+
+class BenchmarkCover(object):
+    def __init__(self, id, target_dir, size, wraparound):
+        self.id = id
+        self.target_dir = target_dir
+        self.is_wraparound = wraparound
+        self.front_left = size[0] // 2 if wraparound else 0
+        self.front_right = size[0]
+        self.front_top = 0
+        self.front_bottom = size[1]
+
+    def base_dir(self):
+        return self.target_dir
+
+
+def legacy_generate_sizes(cover, im):
+    # generate_sizes before the draft decoding and the resize cascade,
+    # ANTIALIAS is an alias of LANCZOS
+    base_dir = cover.base_dir()
+    if im.mode != "RGB":
+        im = im.convert("RGB")
+
+    if cover.is_wraparound:
+        front_part = im.crop((cover.front_left, cover.front_top,
+                              cover.front_right, cover.front_bottom))
+        full_cover = im
+        im = front_part
+
+    for width in [100, 200, 400]:
+        scaled_name = "%s/w%d/%d.jpg" % (base_dir, width, cover.id)
+        if cover.is_wraparound and width == 400:
+            width = float(full_cover.size[0]) / \
+                    float(cover.front_right - cover.front_left)*400.
+            size = int(width), \
+                   int(width / full_cover.size[0] * full_cover.size[1])
+            if size[1] < 400:
+                size = int(full_cover.size[0]*400./full_cover.size[1]), 400
+            scaled = full_cover.resize(size, pyImage.LANCZOS)
+        else:
+            if width == 400 and im.size[0] > im.size[1]:
+                size = int(float(width)/im.size[1]*im.size[0]), width
+            else:
+                size = width, int(float(width)/im.size[0]*im.size[1])
+            scaled = im.resize(size, pyImage.LANCZOS)
+        scaled.save(scaled_name, subsampling='4:4:4')
+
+
+def _run(name, scans, target_dir, wraparound, results):
+    from apps.oi.covers import generate_sizes
+    func = legacy_generate_sizes if name == 'legacy' else generate_sizes
+    for width in [100, 200, 400]:
+        os.mkdir("%s/w%d" % (target_dir, width))
+
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.time()
+    for n, scan in enumerate(scans):
+        im = pyImage.open(scan)
+        func(BenchmarkCover(n, target_dir, im.size, wraparound), im)
+    elapsed = time.time() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, start_rss, peak_rss))
+
+
+def benchmark(name, scans, wraparound):
+    target_dir = tempfile.mkdtemp(prefix='cover_sizes_%s_' % name)
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run,
+                                      args=(name, scans, target_dir,
+                                            wraparound, results))
+    process.start()
+    elapsed, start_rss, peak_rss = results.get()
+    process.join()
+    print("%-8s %8.2f s %8.1f ms/scan   peak RSS %7.1f MB (+%.1f MB)" % (
+          name, elapsed, elapsed * 1000. / len(scans), peak_rss / 1024.,
+          (peak_rss - start_rss) / 1024.))
+    return target_dir
+
+
+def main(*args):
+    if not args:
+        print(__doc__)
+        return
+    scans = sorted(name for name in glob.glob(os.path.join(args[0], '*'))
+                   if os.path.isfile(name))
+    wraparound = 'wraparound' in args[1:]
+    print("%d scans%s" % (len(scans), ', as wraparounds' if wraparound
+                                      else ''))
+
+    legacy_dir = benchmark('legacy', scans, wraparound)
+    current_dir = benchmark('current', scans, wraparound)
+
+    mismatches = 0
+    for width in [100, 200, 400]:
+        for n in range(len(scans)):
+            name = "w%d/%d.jpg" % (width, n)
+            legacy_size = pyImage.open(os.path.join(legacy_dir, name)).size
+            current_size = pyImage.open(os.path.join(current_dir, name)).size
+            if legacy_size != current_size:
+                mismatches += 1
+                print("size mismatch for %s: %s %s" % (name, legacy_size,
+                                                       current_size))
+    if not mismatches:
+        print("all image sizes match")
+    shutil.rmtree(legacy_dir)
+    shutil.rmtree(current_dir)
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
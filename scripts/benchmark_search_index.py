@@ -0,0 +1,83 @@
+"""
+This script compares preparing the search index documents one object at a
+time, as before, with the prefetching index querysets, and measures the
+chunked indexing with one and several worker processes.
+
+Usage: benchmark_search_index.py [count] [workers] [using] [model ...]
+
+For each model the documents of about the first count objects are
+prepared, by default 2000, reporting documents per second and the number
+of queries.  Then the same objects are indexed into the haystack
+connection using, by default 'default'.  For measuring without a running
+Elasticsearch add a connection with the simple backend, i.e.
+'haystack.backends.simple_backend.SimpleEngine', to HAYSTACK_CONNECTIONS,
+whose updates do nothing.
+"""
+
+import sys
+import time
+
+import django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+MODELS = ['gcd.story', 'gcd.issue', 'gcd.series']
+
+
+def prepare_documents(index, queryset):
+    count = 0
+    for obj in queryset:
+        index.full_prepare(obj)
+        count += 1
+    return count
+
+
+def main(*args):
+    from django.apps import apps
+    from haystack import connections
+    from apps.gcd.search_index_build import index_chunks
+
+    args = list(args)
+    count = int(args.pop(0)) if args and args[0].isdigit() else 2000
+    workers = int(args.pop(0)) if args and args[0].isdigit() else 4
+    using = args.pop(0) if args and '.' not in args[0] else 'default'
+    models = args or MODELS
+
+    for model_label in models:
+        model = apps.get_model(model_label)
+        index = connections[using].get_unified_index().get_index(model)
+        queryset = index.index_queryset(using=using).order_by('id')
+        last_id = queryset.values_list('id', flat=True)[count - 1:count]
+        if not last_id:
+            continue
+        queryset = queryset.filter(id__lte=last_id[0])
+        print(model_label)
+
+        for name, objects in (
+          ('per object', queryset.select_related(None)
+                                 .prefetch_related(None)),
+          ('prefetched', queryset)):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.time()
+                documents = prepare_documents(index, objects)
+                elapsed = time.time() - start
+            print("  prepare %-18s %9.1f documents/s %7d queries" % (
+                  name, documents / elapsed, len(queries)))
+
+        for chunk_workers in sorted(set([1, workers])):
+            start = time.time()
+            documents = sum(chunk[2] for chunk in
+                            index_chunks(model_label, chunk_workers,
+                                         using=using, last_id=last_id[0]))
+            elapsed = time.time() - start
+            print("  index %2d worker(s) %13.1f documents/s" % (
+                  chunk_workers, documents / elapsed))
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
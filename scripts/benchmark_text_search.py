@@ -0,0 +1,77 @@
+"""
+This script compares the text search engines for the 'Contains' matching of
+story text fields in the advanced search on typical sequence searches.
+
+Usage: benchmark_text_search.py [repeats] [engine ...]
+
+The engines default to apps.gcd.text_search.IcontainsEngine and
+MySQLFulltextEngine.  For each search the best time of the repeats for
+counting the results and fetching the first page is reported, together
+with the number of results.  As the full-text engine only matches words
+starting with the searched ones, it can find fewer results.
+"""
+
+import sys
+import time
+
+import django
+from django.http import QueryDict
+from django.test.utils import override_settings
+
+ENGINES = ['apps.gcd.text_search.IcontainsEngine',
+           'apps.gcd.text_search.MySQLFulltextEngine']
+
+SEARCHES = [
+  'title=spider',
+  'title=the+return+of',
+  'characters=batman',
+  'characters=wolverine&pencils=kirby',
+  'script=stan+lee&pencils=ditko',
+  'first_line=meanwhile',
+  'synopsis=time+travel',
+  'reprint_notes=marvel+tales',
+  'notes=uncredited',
+  'script=moore&logic=True&pencils=moore',
+]
+
+
+def run_search(query):
+    from apps.gcd.views.search import do_advanced_search
+
+    class Request(object):
+        GET = QueryDict('target=sequence&method=icontains&logic=False&' +
+                        query)
+        user = None
+
+    items = do_advanced_search(Request)[0]
+    count = items.count()
+    list(items.values_list('id', flat=True)[:50])
+    return count
+
+
+def main(*args):
+    args = list(args)
+    repeats = int(args.pop(0)) if args and args[0].isdigit() else 3
+    engines = args or ENGINES
+
+    for query in SEARCHES:
+        print(query)
+        for engine in engines:
+            with override_settings(TEXT_SEARCH_ENGINE=engine):
+                best = None
+                for n in range(repeats):
+                    start = time.time()
+                    count = run_search(query)
+                    elapsed = time.time() - start
+                    best = elapsed if best is None else min(best, elapsed)
+            print("  %-40s %9.3f s %9d results" % (engine.rsplit('.', 1)[-1],
+                                                   best, count))
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
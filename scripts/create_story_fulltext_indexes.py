@@ -0,0 +1,47 @@
+"""
+This script creates the FULLTEXT indexes on the story text fields used by
+the MySQLFulltextEngine for the 'Contains' matching in the advanced search.
+Run it before switching TEXT_SEARCH_ENGINE to that engine, the default
+IcontainsEngine does not use the indexes.
+
+Usage: create_story_fulltext_indexes.py [--drop]
+
+With --drop the indexes are removed again.  InnoDB builds only one
+FULLTEXT index per statement and the first one rebuilds the table, so
+this takes a while on a full database.
+"""
+
+import sys
+import logging
+import django
+from django.db import connection
+
+
+def main(*args):
+    from apps.gcd.text_search import STORY_FULLTEXT_FIELDS
+
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    if connection.vendor != 'mysql':
+        logging.error("FULLTEXT indexes are only supported on MySQL")
+        return
+    with connection.cursor() as cursor:
+        for field in STORY_FULLTEXT_FIELDS:
+            if '--drop' in args:
+                cursor.execute('DROP INDEX gcd_story_ft_%s ON gcd_story'
+                               % field)
+                logging.info("Dropped the FULLTEXT index on %s" % field)
+            else:
+                cursor.execute('CREATE FULLTEXT INDEX gcd_story_ft_%s '
+                               'ON gcd_story (%s)' % (field, field))
+                logging.info("Created the FULLTEXT index on %s" % field)
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
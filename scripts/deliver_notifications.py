@@ -0,0 +1,28 @@
+"""
+This script sends the e-mails of the editing workflow still in the outbox,
+i.e. retries the failed ones.  Run it from cron.
+
+Usage: deliver_notifications.py
+"""
+
+import sys
+import logging
+import django
+
+
+def main(*args):
+    from apps.oi.notifications import deliver_notifications
+
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    logging.info("%d e-mails sent" % deliver_notifications())
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
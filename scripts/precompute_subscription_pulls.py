@@ -0,0 +1,32 @@
+"""
+This script precomputes the issues created since the last pull of the
+subscribed series of each collection, so that the pull page of a
+collection only needs to look for the issues created since.  It is meant
+to run as a scheduled job, e.g. hourly, the precomputed pulls expire after
+a day.
+
+Usage: precompute_subscription_pulls.py
+"""
+
+import sys
+import logging
+import django
+
+
+def main(*args):
+    from apps.mycomics.subscriptions import precompute_pulls
+
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    logging.info("Precomputed the pulls of %d collections" %
+                 precompute_pulls())
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
@@ -0,0 +1,28 @@
+"""
+This script updates the search index with the objects of approved changes
+still in the outbox, i.e. retries the failed ones.  Run it from cron.
+
+Usage: process_search_outbox.py
+"""
+
+import sys
+import logging
+import django
+
+
+def main(*args):
+    from apps.oi.search_outbox import process_outbox
+
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    logging.info("%d search index updates done" % process_outbox())
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
@@ -0,0 +1,52 @@
+"""
+This script recounts the statistics and the cached counts of publishers,
+series, brands etc., reports where they drifted from the data, and fixes
+them.
+
+Usage: rebuild_count_stats.py [check]
+
+With 'check' the drift is only reported.  Statistics of languages and
+countries which got their first data since the last run are created
+here, not when approving changes.  Changes approved while the script
+runs can lead to wrong counts, which the next run corrects, so it is
+best run when there is little editing, e.g. nightly.
+"""
+
+import sys
+import logging
+import django
+from django.db import transaction
+
+
+def main(*args):
+    from apps.stats.rebuild import rebuild_count_stats, rebuild_cached_counts
+
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    fix = 'check' not in args
+
+    with transaction.atomic():
+        drift = rebuild_count_stats(fix=fix)
+    for name, language_id, country_id, stored, counted in drift:
+        logging.warning("CountStats '%s' language %s country %s: %s, "
+                        "counted %d" % (name, language_id, country_id,
+                                        'missing' if stored is None
+                                        else stored, counted))
+    logging.info("%d CountStats drifted" % len(drift))
+
+    with transaction.atomic():
+        drift = rebuild_cached_counts(fix=fix)
+    for model_name, field, id, stored, counted in drift:
+        logging.warning("%s %d %s: %d, counted %d" % (model_name, id, field,
+                                                      stored, counted))
+    logging.info("%d cached counts drifted" % len(drift))
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
@@ -0,0 +1,53 @@
+"""
+This script (re)builds the creator credit summaries used by the creator
+lists of series and features and by the series list of creators.
+
+Usage: rebuild_credit_summaries.py [chunk size]
+
+The summaries are maintained when changes are approved, so this is only
+needed once after the gcd_creator_credit_summary table is created, or to
+repair the summaries after changes done outside of the approval workflow,
+e.g. when a creator name is moved to another creator or the type of a
+feature changes.  Until the first run finished approvals don't maintain
+the summaries and the pages use the slow queries.
+"""
+
+import sys
+import logging
+import django
+from django.db import transaction
+from django.db.models import Max
+from apps.gcd.models import Creator, CreatorNameDetail, CreatorCreditSummary
+
+OWNER_MODELS = [('name_series', CreatorNameDetail),
+                ('name_feature', CreatorNameDetail),
+                ('creator_series', Creator)]
+
+
+def main(*args):
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    chunk_size = int(args[0]) if args else 1000
+
+    # approvals from now on update the summaries of the chunks built
+    CreatorCreditSummary.objects.start_build()
+    for kind, model in OWNER_MODELS:
+        last_id = model.objects.aggregate(Max('id'))['id__max'] or 0
+        for first_id in range(0, last_id + 1, chunk_size):
+            if first_id % (chunk_size * 100) == 0:
+                logging.info("Building %s summaries from id %d of %d" %
+                             (kind, first_id, last_id))
+            with transaction.atomic():
+                CreatorCreditSummary.objects.rebuild(
+                  kind, first_id, first_id + chunk_size - 1)
+    CreatorCreditSummary.objects.finish_build()
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
@@ -0,0 +1,37 @@
+"""
+This script (re)builds the indexer ranking shown on the profile pages,
+the worldwide and national rank of each indexer by imps.
+
+Usage: rebuild_indexer_ranking.py
+
+The ranking is filled by the migration creating the indexer_ranking
+table and maintained when imps are added or the country of an indexer
+changes, so this is only needed to repair it after imps were changed
+otherwise, e.g. by recalculating them.  Profiles without a current ranking
+fall back to the slow queries.
+"""
+
+import sys
+import logging
+import django
+from django.db import transaction
+
+
+def main(*args):
+    from apps.indexer.models import IndexerRanking
+
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    with transaction.atomic():
+        IndexerRanking.objects.rebuild()
+    logging.info("Ranked %d indexers" % IndexerRanking.objects.count())
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
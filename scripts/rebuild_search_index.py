@@ -0,0 +1,51 @@
+"""
+This script (re)indexes the search index in id ranges, with several worker
+processes if wanted, and reports the documents per second.
+
+Usage: rebuild_search_index.py [workers] [model ...]
+
+The models default to gcd.story, gcd.issue and gcd.series.  Existing
+documents are overwritten, documents of objects deleted meanwhile are
+not removed, use the clear_index command of haystack before for a
+complete rebuild.
+"""
+
+import sys
+import time
+import logging
+import django
+
+MODELS = ['gcd.story', 'gcd.issue', 'gcd.series']
+
+
+def main(*args):
+    from apps.gcd.search_index_build import index_chunks
+
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+    args = list(args)
+    workers = int(args.pop(0)) if args and args[0].isdigit() else 1
+    models = args or MODELS
+
+    for model_label in models:
+        start = time.time()
+        total = 0
+        for first_id, last_id, count in index_chunks(model_label, workers):
+            total += count
+            logging.info("%s %d-%d: %d documents, %.1f documents/s" % (
+                         model_label, first_id, last_id, count,
+                         total / (time.time() - start)))
+        elapsed = time.time() - start
+        logging.info("%s: %d documents in %.1f s, %.1f documents/s" % (
+                     model_label, total, elapsed,
+                     total / elapsed if elapsed else 0))
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
@@ -0,0 +1,38 @@
+"""
+This script (re)builds the denormalized cover gallery entries of all series.
+
+The entries are maintained when covers and issues are approved, so this
+is only needed once after the gcd_cover_gallery_entry table is created,
+or to repair the entries after changes done outside of the approval
+workflow.  Series without entries fall back to the slow queries.
+"""
+
+import sys
+import logging
+import django
+from django.db import transaction
+from apps.gcd.models import Series, CoverGalleryEntry
+
+
+def main(*args):
+    logging.basicConfig(level=logging.INFO,
+                        stream=sys.stdout,
+                        format='%(asctime)s %(levelname)s: %(message)s')
+
+    series_ids = Series.objects.filter(deleted=False).order_by('id')\
+                               .values_list('id', flat=True)
+    for n, series_id in enumerate(series_ids.iterator(), start=1):
+        if n % 1000 == 1:
+            logging.info("Updating series %d (id %d)" % (n, series_id))
+        with transaction.atomic():
+            CoverGalleryEntry.objects.update_series(
+              Series.objects.get(id=series_id))
+
+
+def run(*args):
+    main(*args)
+
+
+if __name__ == '__main__':
+    django.setup()
+    main(*sys.argv[1:])
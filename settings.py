@@ -166,6 +166,7 @@ INSTALLED_APPS = (
     'taggit',
     'imagekit',
     'haystack',
+    'django_rq',
 #    'elasticstack',
     'bootstrap3',
     'contact_form',
@@ -258,9 +259,10 @@ HAYSTACK_CONNECTIONS = {
     },
 }
 
-# This processes the updates inline, and shouldn't be used in production.
-# Comment out on a dev-setup with running ElasticSearch / Haystack
-# HAYSTACK_SIGNAL_PROCESSOR = 'haystack.signals.RealtimeSignalProcessor'
+# Records the objects committed by approved changes in an outbox, from
+# which a job on SEARCH_INDEX_QUEUE updates their documents in bulk.  With
+# JOBS_RUN_INLINE nothing is recorded, run update_index instead.
+HAYSTACK_SIGNAL_PROCESSOR = 'apps.oi.search_outbox.OutboxSignalProcessor'
 
 # assumingly this needs elasticstack
 ELASTICSEARCH_INDEX_SETTINGS = {
@@ -354,6 +356,27 @@ LIMIT_SYNOPSIS_LENGTH = 600
 
 RECENTS_COUNT = 5
 
+# Seconds the rendered issue page body for anonymous users is cached.
+# Approved changes invalidate it earlier via the display versions.
+ISSUE_BODY_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Seconds the total counts shown for keyset-paginated listings are cached.
+PAGINATION_COUNT_CACHE_TIMEOUT = 60 * 60
+
+# Maximum number of rows in a CSV export of advanced search results.
+CSV_EXPORT_MAX_ROWS = 250000
+
+# Seconds the revision summaries of the changesets in the queues are cached.
+# Saving a revision invalidates them earlier via the changeset versions, but
+# not changes of the other objects they name, e.g. of the series of issues.
+QUEUE_SUMMARY_CACHE_TIMEOUT = 60 * 60
+
+# Engine for the 'Contains' matching of story text fields in the advanced
+# search, 'apps.gcd.text_search.MySQLFulltextEngine' uses the FULLTEXT
+# indexes created by scripts/create_story_fulltext_indexes.py, but only
+# matches at the start of words.
+TEXT_SEARCH_ENGINE = 'apps.gcd.text_search.IcontainsEngine'
+
 SITE_URL = 'https://www.comics.org/'
 SITE_NAME = 'Grand Comics Database'
 
@@ -364,6 +387,41 @@ NEW_COVERS_DIR = '/img/gcd/new_covers/'
 GENERIC_IMAGE_DIR = 'img/gcd/generic_images/'
 NEW_GENERIC_IMAGE_DIR = 'img/gcd/new_generic_images/'
 
+# Share of the requests whose queries are recorded per view, and the number
+# of recent samples per view kept for the report under /query_budgets/.
+QUERY_BUDGET_SAMPLE_RATE = 0.05
+QUERY_BUDGET_SAMPLES = 200
+
+# Part of the ETags of the display pages, change it on deployments changing
+# their markup, e.g. to the deployed revision.
+DEPLOYMENT_VERSION = ''
+
+# Step between the sort codes of reordered issues, leaving room for issues
+# added later without moving the following ones.
+SORT_CODE_GAP = 10
+
+# Run the jobs of the editing workflow inline instead of on the RQ queues,
+# only for tests and local setups without a redis server.
+JOBS_RUN_INLINE = False
+
+# RQ queue for generating the scaled cover images and moving approved covers
+COVER_JOBS_QUEUE = 'default'
+
+# RQ queue for updating the search index with the approved changes, and
+# how often the update of an object failing to index is tried.
+SEARCH_INDEX_QUEUE = 'default'
+SEARCH_INDEX_MAX_ATTEMPTS = 5
+
+# RQ queue for sending the e-mails of the editing workflow after their
+# transaction committed, and how often a failing e-mail is tried.
+NOTIFICATION_QUEUE = 'default'
+NOTIFICATION_MAX_ATTEMPTS = 5
+
+# E-mail backend for these e-mails, None for EMAIL_BACKEND.  Use e.g.
+# 'django.core.mail.backends.filebased.EmailBackend' with EMAIL_FILE_PATH
+# or 'django.core.mail.backends.console.EmailBackend' for local setups.
+NOTIFICATION_EMAIL_BACKEND = None
+
 # Name of the directory in the gcd/icons tree under the media root
 # to use for icons within the app.
 ICON_SET = "gnome"
@@ -433,6 +491,14 @@ except ImportError:
 #GCD Official name field name in NameType model
 GCD_OFFICIAL_NAME_FIELDNAME = 'GCD Official'
 
+if QUERY_BUDGET_SAMPLE_RATE:
+    MIDDLEWARE += \
+      ('apps.middleware.query_budget.QueryBudgetMiddleware',)
+    # times the rendering of the templates of the sampled requests
+    TEMPLATES[0].update(
+      BACKEND='apps.middleware.query_budget.QueryBudgetTemplates',
+      NAME='django')
+
 if READ_ONLY or NO_OI:
     MIDDLEWARE += \
       ('apps.middleware.read_only.ReadOnlyMiddleware',)